@@ -3,6 +3,7 @@
 from langchain_openai.chat_models.base import ChatOpenAI
 
 from core.registry import agent
+from llm.resilience import call_with_resilience
 
 
 @agent("default")
@@ -14,7 +15,8 @@ class DefaultAgent:
 
     def __init__(self):
         """Initialize the default agent."""
-        self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+        # Retries and timeouts come from the "default" call policy alone
+        self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0, max_retries=0)
 
     async def run(self, input_text: str, context: dict) -> str:
         """Process the input text and return a response.
@@ -29,5 +31,7 @@ class DefaultAgent:
             A string response
 
         """
-        response = await self.llm.ainvoke(input_text)
+        response = await call_with_resilience(
+            "default", lambda: self.llm.ainvoke(input_text)
+        )
         return response.content
@@ -1,10 +1,12 @@
 """A math agent that can perform calculations and solve mathematical expressions."""
 
+from typing import Any
+
 from core.registry import agent
-from mcp_servers.math_server import MathServer
+from mcp_servers.math_server import ERROR_PREFIXES, get_math_server
 
 
-@agent("math")
+@agent("math", cache_ttl=24 * 60 * 60)
 class MathAgent:
     """A math agent that can perform calculations and solve mathematical expressions."""
 
@@ -14,7 +16,22 @@ class MathAgent:
         "mathematical expressions"
     )
 
+    @staticmethod
+    def match(input_text: str) -> float:
+        """Return full confidence for pure arithmetic the math server can parse."""
+        return 1.0 if get_math_server().is_expression(input_text) else 0.0
+
+    @staticmethod
+    def cacheable(response: str) -> bool:
+        """Keep error messages out of the response caches."""
+        return not response.startswith(ERROR_PREFIXES)
+
     async def run(self, input_text: str, context: dict) -> str:
         """Run the math agent on the input text."""
-        server = MathServer()
-        return await server.send_request(input_text)
+        return await get_math_server().send_request(input_text)
+
+    async def run_batch(
+        self, expression: str, variables: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Evaluate an expression over many bindings of its variables."""
+        return await get_math_server().send_batch(expression, variables)
@@ -5,9 +5,10 @@ from typing import Any
 from langchain_anthropic.chat_models import ChatAnthropic
 
 from core.registry import agent
+from llm.resilience import call_with_resilience
 
 
-@agent("programming")
+@agent("programming", max_concurrency=8, max_queue=32)
 class ProgrammingAgent:
     """A programming assistant that helps with coding tasks, debugging, and software."""
 
@@ -22,7 +23,8 @@ class ProgrammingAgent:
         self.llm = ChatAnthropic(
             model_name="claude-3-opus-20240229",
             temperature=0,
-            timeout=60,
+            # Retries and timeouts come from the "programming" call policy alone
+            max_retries=0,
             stop=None,
         )
 
@@ -39,7 +41,9 @@ class ProgrammingAgent:
             The agent's response as a string
 
         """
-        response = await self.llm.ainvoke(input_text)
+        response = await call_with_resilience(
+            "programming", lambda: self.llm.ainvoke(input_text)
+        )
         if isinstance(response.content, str):
             return response.content
         return str(response.content)
@@ -3,7 +3,7 @@
 from core.registry import agent
 
 
-@agent("weather")
+@agent("weather", cache_ttl=10 * 60)
 class WeatherAgent:
     """Agent that provides current weather information and forecasts.
 
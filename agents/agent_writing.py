@@ -5,9 +5,10 @@ from typing import Any
 from langchain_openai.chat_models.base import ChatOpenAI
 
 from core.registry import agent
+from llm.resilience import call_with_resilience
 
 
-@agent("writing")
+@agent("writing", max_concurrency=8, max_queue=32)
 class WritingAgent:
     """A writing assistant that helps with content creation."""
 
@@ -19,7 +20,8 @@ class WritingAgent:
 
     def __init__(self) -> None:
         """Initialize the writing agent with GPT-4 model."""
-        self.llm = ChatOpenAI(model="gpt-4", temperature=0)
+        # Retries and timeouts come from the "writing" call policy alone
+        self.llm = ChatOpenAI(model="gpt-4", temperature=0, max_retries=0)
 
     async def run(self, input_text: str, context: dict[str, Any]) -> str:
         """Process the input text and return a response.
@@ -34,7 +36,9 @@ class WritingAgent:
             The processed text response as a string
 
         """
-        response = await self.llm.ainvoke(input_text)
+        response = await call_with_resilience(
+            "writing", lambda: self.llm.ainvoke(input_text)
+        )
         if isinstance(response.content, str):
             return response.content
         if isinstance(response.content, list):
@@ -1,13 +1,85 @@
 """API for the Christopher chatbot."""
 
-from fastapi import FastAPI
+import asyncio
+import json
+import logging
+import math
+import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
-from conversations.thread_store import get_thread, list_threads
-from core.christopher import load_agents, run_with_langgraph
+from api.websocket import websocket_chat
+from conversations.thread_store import close_thread_store, get_thread, list_threads
+from core.bulkhead import AgentOverloadedError
+from core.christopher import (
+    GRAPH_FORMATS,
+    load_agents,
+    render_graph,
+    run_batch,
+    run_with_langgraph,
+    stream_batch,
+    stream_with_langgraph,
+    watch_agents,
+)
+from core.config import CONFIG
+from core.metrics import collect_stats
+from core.registry import AGENT_REGISTRY, get_agent_instance
+from core.response_cache import close_response_cache
+from llm.ollama_client import close_ollama_client
+from mcp_servers.math_server import close_math_server
+
+logger = logging.getLogger(__name__)
+
+STREAM_FORMATS = {"sse": "text/event-stream", "ndjson": "application/x-ndjson"}
+
+
+def _hot_reload_enabled() -> bool:
+    """Check whether agents should be reloaded when their modules change."""
+    flag = os.getenv("WATCH_AGENTS")
+    if flag is not None:
+        return flag.lower() in ("1", "true", "yes")
+    return CONFIG["hot_reload"]["enabled"]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Load agents before serving requests and release clients on shutdown.
+
+    With hot reload enabled, agent modules are watched while the app runs.
+    """
+    load_agents()
+    watcher = None
+    if _hot_reload_enabled():
+        watcher = asyncio.create_task(
+            watch_agents(CONFIG["hot_reload"]["interval_seconds"])
+        )
+    yield
+    if watcher is not None:
+        watcher.cancel()
+        with suppress(asyncio.CancelledError):
+            await watcher
+    await close_ollama_client()
+    await close_response_cache()
+    close_thread_store()
+    close_math_server()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_api_websocket_route("/ws", websocket_chat)
 
-app = FastAPI()
-load_agents()
+
+@app.exception_handler(AgentOverloadedError)
+async def agent_overloaded(request: Request, exc: AgentOverloadedError):
+    """Reject requests for an agent at capacity with 503 and Retry-After."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
 
 
 class ChatRequest(BaseModel):
@@ -23,6 +95,126 @@ async def chat(req: ChatRequest):
     return {"response": response}
 
 
+class BatchChatRequest(BaseModel):
+    """Request body for the batch chat endpoint."""
+
+    messages: list[str]
+
+
+async def _encode_stream(
+    events: AsyncIterator[dict], format: str
+) -> AsyncIterator[str]:
+    """Encode a chat event stream as Server-Sent Events or NDJSON."""
+    try:
+        async for event in events:
+            yield _encode_event(event, format)
+    except Exception as e:
+        logger.error(f"Error while streaming chat: {e}")
+        yield _encode_event({"type": "error", "message": str(e)}, format)
+
+
+def _encode_event(event: dict, format: str) -> str:
+    """Encode one chat event in the requested stream format."""
+    data = json.dumps(event)
+    if format == "ndjson":
+        return f"{data}\n"
+    return f"event: {event['type']}\ndata: {data}\n\n"
+
+
+def _check_stream_format(format: str) -> None:
+    """Reject an unsupported stream format."""
+    if format not in STREAM_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format, expected one of: {', '.join(STREAM_FORMATS)}",
+        )
+
+
+@app.post("/chat/stream")
+async def chat_stream(req: ChatRequest, format: str = "sse"):
+    """Streaming chat endpoint.
+
+    Streams the agent's response as it is generated, either as Server-Sent
+    Events (``format=sse``) or newline-delimited JSON (``format=ndjson``).
+    """
+    _check_stream_format(format)
+    return StreamingResponse(
+        _encode_stream(stream_with_langgraph(req.message), format),
+        media_type=STREAM_FORMATS[format],
+    )
+
+
+@app.post("/chat/batch")
+async def chat_batch(req: BatchChatRequest, format: str | None = None):
+    """Batch chat endpoint.
+
+    Routes all messages together and runs their agents concurrently. Without a
+    ``format`` the results are returned in input order once all are done; with
+    ``format=sse`` or ``format=ndjson`` each result is streamed as soon as it
+    completes, tagged with its ``index``.
+    """
+    max_size = CONFIG["batch"]["max_size"]
+    if len(req.messages) > max_size:
+        raise HTTPException(
+            status_code=400, detail=f"Too many messages, at most {max_size} allowed"
+        )
+    if format is None:
+        return {"results": await run_batch(req.messages)}
+    _check_stream_format(format)
+    return StreamingResponse(
+        _encode_stream(stream_batch(req.messages), format),
+        media_type=STREAM_FORMATS[format],
+    )
+
+
+class MathBatchRequest(BaseModel):
+    """Request body for the math batch endpoint."""
+
+    expression: str
+    variables: dict[str, list[float] | float]
+
+
+@app.post("/math/batch")
+async def math_batch(req: MathBatchRequest):
+    """Math batch endpoint.
+
+    Evaluates one expression, such as ``a * x ** 2 + b``, for every binding of
+    its variables. A variable is either a list with one value per binding or a
+    single value shared by all of them.
+    """
+    if "math" not in AGENT_REGISTRY:
+        raise HTTPException(status_code=404, detail="The math agent is not enabled")
+    instance = get_agent_instance("math")
+    try:
+        return await instance.run_batch(req.expression, req.variables)
+    except (ValueError, SyntaxError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+@app.get("/graph")
+def graph(format: str = "png"):
+    """Graph endpoint.
+
+    Returns a diagram of the agent graph. The diagram is rendered once per graph
+    version and served from cache afterwards.
+    """
+    if format not in GRAPH_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format, expected one of: {', '.join(GRAPH_FORMATS)}",
+        )
+    diagram = render_graph(format)
+    if format == "png":
+        return Response(content=diagram, media_type="image/png")
+    return Response(content=diagram, media_type="text/plain")
+
+
+@app.get("/metrics")
+def metrics():
+    """Metrics endpoint."""
+    return collect_stats()
+
+
 @app.get("/threads")
 def threads():
     """Threads endpoint."""
@@ -30,6 +222,22 @@ def threads():
 
 
 @app.get("/thread/{thread_id}")
-def thread(thread_id: str):
-    """Thread endpoint."""
-    return {"messages": get_thread(thread_id)}
+def thread(
+    thread_id: str,
+    limit: int | None = Query(default=None, ge=1, le=1000),
+    before: int | None = None,
+):
+    """Thread endpoint.
+
+    Returns the whole thread, or with ``limit`` its most recent messages. Older
+    messages are read by passing the returned ``next_before`` as ``before``;
+    it is None once the start of the thread is reached.
+    """
+    if limit is None:
+        return {"messages": get_thread(thread_id, before=before), "next_before": None}
+    messages = get_thread(thread_id, limit=limit + 1, before=before)
+    next_before = None
+    if len(messages) > limit:
+        messages = messages[1:]
+        next_before = messages[0]["id"]
+    return {"messages": messages, "next_before": next_before}
@@ -0,0 +1,177 @@
+"""WebSocket chat endpoint for the Christopher chatbot.
+
+A single connection can carry several conversations at once. Clients send JSON
+messages:
+
+- ``{"type": "chat", "id": "...", "thread_id": "...", "message": "..."}`` starts
+  a chat; ``thread_id`` is optional and stores the exchange in that thread
+- ``{"type": "cancel", "id": "..."}`` cancels an in-flight chat
+
+Every event sent back carries the ``id`` (and ``thread_id``) of the chat it
+belongs to. Chat events are the ones produced by ``stream_with_langgraph``
+(``route``, ``token``, ``done``), plus ``cancelled`` and ``error``.
+
+Outgoing events go through a bounded queue drained by a single sender, so a
+client that reads slowly makes its chats wait instead of buffering without
+limit. Replies to the client's own messages never wait for room: they are
+dropped when the queue is full, so ``cancel`` messages are still handled.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from conversations.thread_store import save_message
+from core.christopher import stream_with_langgraph
+from core.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class ChatConnection:
+    """State of one WebSocket chat connection.
+
+    Attributes
+    ----------
+        websocket: The underlying WebSocket
+        outbox: Bounded queue of events waiting to be sent to the client
+        tasks: In-flight chats keyed by their client-supplied id
+
+    """
+
+    def __init__(self, websocket: WebSocket) -> None:
+        """Initialize the connection.
+
+        Args:
+        ----
+            websocket: The accepted or about to be accepted WebSocket
+
+        """
+        settings = CONFIG["websocket"]
+        self.websocket = websocket
+        self.max_in_flight: int = settings["max_in_flight"]
+        self.outbox: asyncio.Queue[dict[str, Any]] = asyncio.Queue(
+            maxsize=settings["send_queue_size"]
+        )
+        self.tasks: dict[str, asyncio.Task] = {}
+
+    async def run(self) -> None:
+        """Serve the connection until the client disconnects."""
+        await self.websocket.accept()
+        sender = asyncio.create_task(self._send_loop())
+        try:
+            while True:
+                raw = await self.websocket.receive_text()
+                try:
+                    data = json.loads(raw)
+                except json.JSONDecodeError:
+                    self._reply({"type": "error", "message": "Invalid JSON"})
+                    continue
+                await self.handle(data)
+        except WebSocketDisconnect:
+            logger.info("WebSocket client disconnected")
+        finally:
+            for task in list(self.tasks.values()):
+                task.cancel()
+            sender.cancel()
+
+    async def _send_loop(self) -> None:
+        """Send queued events to the client, one at a time."""
+        while True:
+            event = await self.outbox.get()
+            await self.websocket.send_json(event)
+
+    async def handle(self, data: Any) -> None:
+        """Handle one message from the client.
+
+        Args:
+        ----
+            data: The decoded JSON message
+
+        """
+        if not isinstance(data, dict):
+            self._reply({"type": "error", "message": "Expected an object"})
+            return
+        message_type = data.get("type")
+        message_id = data.get("id")
+        if not isinstance(message_id, str) or not message_id:
+            self._reply({"type": "error", "message": "Missing message id"})
+            return
+
+        if message_type == "chat":
+            self._start_chat(message_id, data)
+        elif message_type == "cancel":
+            task = self.tasks.get(message_id)
+            if task is None:
+                self._error(message_id, None, "Unknown message id")
+            else:
+                task.cancel()
+        else:
+            self._error(message_id, None, f"Unsupported type: {message_type}")
+
+    def _start_chat(self, message_id: str, data: dict[str, Any]) -> None:
+        """Validate a chat message and start it in the background."""
+        thread_id = data.get("thread_id")
+        message = data.get("message")
+        if thread_id is not None and not isinstance(thread_id, str):
+            self._error(message_id, None, "thread_id must be a string")
+        elif not isinstance(message, str):
+            self._error(message_id, thread_id, "Missing message text")
+        elif message_id in self.tasks:
+            self._error(message_id, thread_id, "Message id already in flight")
+        elif len(self.tasks) >= self.max_in_flight:
+            self._error(message_id, thread_id, "Too many in-flight messages")
+        else:
+            task = asyncio.create_task(self.chat(message_id, thread_id, message))
+            self.tasks[message_id] = task
+            task.add_done_callback(lambda _: self.tasks.pop(message_id, None))
+
+    async def chat(self, message_id: str, thread_id: str | None, message: str) -> None:
+        """Run one chat and queue its events for the client.
+
+        Args:
+        ----
+            message_id: The client-supplied id of the chat
+            thread_id: Optional thread to store the exchange in
+            message: The user's message
+
+        """
+        tags = {"id": message_id, "thread_id": thread_id}
+        try:
+            if thread_id:
+                save_message(thread_id, "user", message)
+            async for event in stream_with_langgraph(message, thread_id):
+                await self.outbox.put({**event, **tags})
+                if event["type"] == "done" and thread_id:
+                    sender = event.get("agent_id") or "default"
+                    save_message(thread_id, sender, event["response"])
+        except asyncio.CancelledError:
+            try:
+                self.outbox.put_nowait({"type": "cancelled", **tags})
+            except asyncio.QueueFull:
+                pass
+            raise
+        except Exception as e:
+            logger.error(f"Error in WebSocket chat {message_id}: {e}")
+            await self.outbox.put({"type": "error", **tags, "message": str(e)})
+
+    def _reply(self, event: dict[str, Any]) -> None:
+        """Queue an event without waiting, dropping it if the queue is full."""
+        try:
+            self.outbox.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.warning(f"Send queue full, dropped {event['type']} event")
+
+    def _error(self, message_id: str, thread_id: str | None, text: str) -> None:
+        """Queue an error event for a chat."""
+        self._reply(
+            {"type": "error", "id": message_id, "thread_id": thread_id, "message": text}
+        )
+
+
+async def websocket_chat(websocket: WebSocket) -> None:
+    """WebSocket chat endpoint."""
+    await ChatConnection(websocket).run()
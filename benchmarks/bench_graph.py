@@ -0,0 +1,61 @@
+"""Benchmark the per-request cost of obtaining the LangGraph graph.
+
+Compares compiling the graph on every request (the old behaviour) with reusing
+the cached compiled graph.
+
+Usage:
+    python -m benchmarks.bench_graph --agents 10 --iterations 200
+"""
+
+import argparse
+import time
+
+from core.christopher import get_compiled_graph, invalidate_compiled_graph
+from core.langgraph_runner import create_graph
+from core.registry import AGENT_REGISTRY
+
+
+class _BenchAgent:
+    """Placeholder agent used to populate the registry."""
+
+    description = "Benchmark agent"
+
+    async def run(self, input_text: str, context: dict) -> str:
+        """Return a fixed response."""
+        return "ok"
+
+
+def _time_per_call(fn, iterations: int) -> float:
+    """Return the mean wall-clock time of ``fn`` in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--agents", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    AGENT_REGISTRY.clear()
+    AGENT_REGISTRY["default"] = {"instance": _BenchAgent(), "description": "Default"}
+    for i in range(args.agents):
+        AGENT_REGISTRY[f"agent{i}"] = {
+            "instance": _BenchAgent(),
+            "description": f"Benchmark agent {i}",
+        }
+
+    invalidate_compiled_graph()
+    uncached = _time_per_call(create_graph, args.iterations)
+    cached = _time_per_call(get_compiled_graph, args.iterations)
+
+    print(f"agents: {len(AGENT_REGISTRY)}  iterations: {args.iterations}")  # noqa: T201
+    print(f"compile per request: {uncached:.3f} ms")  # noqa: T201
+    print(f"cached graph:        {cached:.3f} ms")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
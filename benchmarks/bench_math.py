@@ -0,0 +1,88 @@
+"""Benchmark the throughput of the math server in expressions per second.
+
+Compares parsing and walking the AST on every request (the old behaviour) with
+the shared server's cached compiled programs, for a mix of short and long
+expressions repeated the way users and the router's matcher repeat them.
+
+Usage:
+    python -m benchmarks.bench_math --expressions 50 --iterations 20000
+"""
+
+import argparse
+import ast
+import asyncio
+import random
+import time
+
+from mcp_servers.math_server import MathServer
+
+
+def _tree_walk(server: MathServer, expression: str) -> float:
+    """Parse and evaluate an expression the old way, recursively."""
+
+    def walk(node: ast.AST) -> float:
+        if isinstance(node, ast.Constant):
+            return float(node.value)
+        if isinstance(node, ast.BinOp):
+            return server._operator(node.op)(walk(node.left), walk(node.right))
+        return server._operator(node.op)(walk(node.operand))
+
+    return walk(ast.parse(expression, mode="eval").body)
+
+
+def _expressions(count: int) -> list[str]:
+    """Build a reproducible mix of expressions."""
+    rng = random.Random(0)
+    expressions = []
+    for _ in range(count):
+        terms = [str(rng.randint(1, 100)) for _ in range(rng.randint(2, 30))]
+        operators = [rng.choice("+-*/") for _ in terms[1:]]
+        expression = terms[0]
+        for op, term in zip(operators, terms[1:], strict=True):
+            expression += (
+                f" {op} ({term} ** 2)" if rng.random() < 0.2 else f" {op} {term}"
+            )
+        expressions.append(expression)
+    return expressions
+
+
+def _per_second(fn, workload: list[str]) -> float:
+    """Return how many expressions ``fn`` handles per second."""
+    start = time.perf_counter()
+    for expression in workload:
+        fn(expression)
+    return len(workload) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--expressions", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    expressions = _expressions(args.expressions)
+    workload = random.Random(1).choices(expressions, k=args.iterations)
+    server = MathServer()
+    loop = asyncio.new_event_loop()
+
+    uncached = _per_second(lambda e: _tree_walk(server, e), workload)
+    cold = _per_second(lambda e: server._compile(e).evaluate(), workload)
+    cached = _per_second(lambda e: server.compile(e).evaluate(), workload)
+    request = _per_second(
+        lambda e: loop.run_until_complete(server.send_request(e)), workload
+    )
+    loop.close()
+
+    print(  # noqa: T201
+        f"distinct expressions: {args.expressions}  iterations: {args.iterations}"
+    )
+    print(f"parse + tree walk:      {uncached:>10,.0f} expr/s")  # noqa: T201
+    print(f"compile + run (no LRU): {cold:>10,.0f} expr/s")  # noqa: T201
+    print(f"cached program:         {cached:>10,.0f} expr/s")  # noqa: T201
+    print(f"send_request (cached):  {request:>10,.0f} expr/s")  # noqa: T201
+    print(f"cache: {server.cache_info()}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
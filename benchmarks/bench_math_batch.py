@@ -0,0 +1,83 @@
+"""Benchmark evaluating one formula over a parameter sweep.
+
+Compares sending one request per value, with the value written into the
+expression (the old way of sweeping), evaluating the compiled expression once
+per binding, and the vectorized batch API.
+
+Usage:
+    python -m benchmarks.bench_math_batch --sizes 100 10000 100000
+"""
+
+import argparse
+import asyncio
+import time
+
+from mcp_servers.math_server import MathServer
+
+EXPRESSION = "a * x ** 3 - b * x ** 2 + c * x / (1 + x ** 2) - 7"
+CONSTANTS = {"a": 0.5, "b": 2.0, "c": 3.0}
+
+
+def _per_call(server: MathServer, sweep: list[float]) -> None:
+    """Send one request per value, substituted into the expression."""
+    loop = asyncio.new_event_loop()
+    for x in sweep:
+        expression = EXPRESSION.replace("x", repr(x))
+        for name, value in CONSTANTS.items():
+            expression = expression.replace(name, repr(value))
+        loop.run_until_complete(server.send_request(expression))
+    loop.close()
+
+
+def _scalar(server: MathServer, sweep: list[float]) -> None:
+    """Evaluate the compiled expression once per binding."""
+    program = server.compile(EXPRESSION, ["x", *CONSTANTS])
+    for x in sweep:
+        program.evaluate({"x": x, **CONSTANTS})
+
+
+def _batch(server: MathServer, sweep: list[float]) -> None:
+    """Evaluate the expression over the whole sweep at once."""
+    server.evaluate_batch(EXPRESSION, {"x": sweep, **CONSTANTS})
+
+
+def _per_second(fn, server: MathServer, sweep: list[float]) -> float:
+    """Return how many bindings ``fn`` evaluates per second."""
+    start = time.perf_counter()
+    fn(server, sweep)
+    return len(sweep) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10000, 100000])
+    parser.add_argument(
+        "--per-call-limit",
+        type=int,
+        default=10000,
+        help="largest sweep also measured one request per value",
+    )
+    args = parser.parse_args()
+
+    server = MathServer(cache_size=max(args.sizes), max_batch_size=max(args.sizes))
+    print(f"expression: {EXPRESSION}")  # noqa: T201
+    print(  # noqa: T201
+        f"{'bindings':>10}  {'per call':>14}  {'scalar':>14}  {'batch':>14}"
+    )
+    for size in args.sizes:
+        sweep = [i / size for i in range(size)]
+        per_call = (
+            f"{_per_second(_per_call, server, sweep):>10,.0f} /s"
+            if size <= args.per_call_limit
+            else f"{'-':>12}"
+        )
+        scalar = _per_second(_scalar, server, sweep)
+        batch = _per_second(_batch, server, sweep)
+        print(  # noqa: T201
+            f"{size:>10}  {per_call:>14}  {scalar:>12,.0f} /s  {batch:>12,.0f} /s"
+        )
+
+
+if __name__ == "__main__":
+    main()
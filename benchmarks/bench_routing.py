@@ -0,0 +1,123 @@
+"""Benchmark routing prompt construction and, optionally, routing latency.
+
+By default this compares building the routing prompt from the registry on every
+request (the old behaviour) with the cached fixed prefix plus a per-request
+suffix. With ``--live`` it also measures end-to-end routing latency against the
+Ollama server configured through ``OLLAMA_BASE_URL``/``OLLAMA_MODEL``.
+
+Usage:
+    python -m benchmarks.bench_routing --agents 10 --iterations 10000
+    python -m benchmarks.bench_routing --live --iterations 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from core.langgraph_runner import (
+    AgentResponseFormatter,
+    router_prompt,
+    router_system_prompt,
+)
+from core.registry import AGENT_REGISTRY
+from llm.ollama_client import close_ollama_client, get_ollama_client
+
+INPUTS = [
+    "Can you help me fix this Python traceback?",
+    "Write a short poem about autumn",
+    "What's the forecast for tomorrow in Paris?",
+    "Explain recursion to a five year old",
+]
+
+
+def _legacy_prompt(text: str) -> str:
+    """Build the routing prompt the way entry_node used to."""
+    agent_descriptions = "\n".join(
+        [
+            f"id: {agent_id}\ndescription: {data['description']}"
+            for agent_id, data in AGENT_REGISTRY.items()
+            if agent_id != "default"
+        ]
+    )
+    return f"""Route this request to the right agent.
+Available agents:
+{agent_descriptions}
+
+Only return the id value of the agent that best matches the request.
+Do not include any other text in your response.
+
+Input: {text}"""
+
+
+def _split_prompt(text: str) -> tuple[str, str]:
+    """Build the routing prompt as a cached prefix and a short suffix."""
+    return router_system_prompt(), router_prompt(text)
+
+
+def _time_build(fn, iterations: int) -> float:
+    """Return the mean time of building a prompt in microseconds."""
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(INPUTS[i % len(INPUTS)])
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def _time_live(split: bool, iterations: int) -> list[float]:
+    """Return routing latencies in milliseconds against the live server."""
+    client = get_ollama_client()
+    latencies = []
+    for i in range(iterations):
+        text = INPUTS[i % len(INPUTS)]
+        start = time.perf_counter()
+        if split:
+            system, prompt = _split_prompt(text)
+            await client.generate(prompt, AgentResponseFormatter, system=system)
+        else:
+            await client.generate(_legacy_prompt(text), AgentResponseFormatter)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--agents", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=10000)
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+
+    if not args.live:
+        AGENT_REGISTRY.clear()
+        AGENT_REGISTRY["default"] = {"description": "Default"}
+        for i in range(args.agents):
+            AGENT_REGISTRY[f"agent{i}"] = {"description": f"Benchmark agent {i}"}
+        legacy = _time_build(_legacy_prompt, args.iterations)
+        split = _time_build(_split_prompt, args.iterations)
+        print(f"agents: {len(AGENT_REGISTRY)}")  # noqa: T201
+        print(f"rebuild prompt per request: {legacy:.2f} us")  # noqa: T201
+        print(f"cached prefix + suffix:     {split:.2f} us")  # noqa: T201
+        return
+
+    from core.christopher import load_agents
+
+    load_agents()
+
+    async def run() -> None:
+        try:
+            for label, split in (("single prompt", False), ("prefix + suffix", True)):
+                # Warm up so model loading is not counted
+                await _time_live(split, 1)
+                latencies = await _time_live(split, args.iterations)
+                print(  # noqa: T201
+                    f"{label:16} median {statistics.median(latencies):.1f} ms  "
+                    f"max {max(latencies):.1f} ms"
+                )
+        finally:
+            await close_ollama_client()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
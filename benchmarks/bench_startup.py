@@ -0,0 +1,87 @@
+"""Benchmark the cold-start time and memory of the API and CLI.
+
+Each run starts a fresh interpreter that imports the entry point and loads the
+agents, as the API lifespan and the CLI do. Three ways of loading are compared:
+
+- ``import+build``: import every agent module and build every agent
+- ``import``: import every agent module, building agents on first use
+- ``manifest``: register agents from the manifest, importing nothing
+  (``load_agents`` as it is now)
+
+The manifest is built before the runs, so they measure a warm manifest cache.
+
+Usage:
+    python -m benchmarks.bench_startup --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from core.manifest import load_manifest
+
+ENTRY_POINTS = {"api": "api.server", "cli": "cli.cli"}
+
+MODES = ("import+build", "import", "manifest")
+
+_CHILD = """
+import json, resource, sys, time
+start = time.perf_counter()
+import {module}
+from core import christopher
+from core.manifest import AGENTS_DIR
+from core.registry import AGENT_REGISTRY, get_agent_instance
+if "{mode}" == "manifest":
+    christopher.load_agents()
+else:
+    for path in sorted(AGENTS_DIR.glob("agent_*.py")):
+        christopher._import_agent_module(str(path))
+    christopher.get_compiled_graph()
+if "{mode}" == "import+build":
+    for agent_id in list(AGENT_REGISTRY):
+        get_agent_instance(agent_id)
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+json.dump({{"ms": elapsed * 1000, "rss_mib": rss / 1024}}, sys.stdout)
+"""
+
+
+def _run(module: str, mode: str) -> dict[str, float]:
+    """Start a fresh interpreter and return its startup time and peak RSS."""
+    env = {
+        # Clients are only constructed, never called, so placeholder keys do
+        "OPENAI_API_KEY": "bench",
+        "ANTHROPIC_API_KEY": "bench",
+        **os.environ,
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", _CHILD.format(module=module, mode=mode)],
+        capture_output=True,
+        check=True,
+        env=env,
+        text=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    load_manifest()
+    print(f"runs: {args.runs}  (median)")  # noqa: T201
+    for name, module in ENTRY_POINTS.items():
+        for mode in MODES:
+            runs = [_run(module, mode) for _ in range(args.runs)]
+            ms = statistics.median(run["ms"] for run in runs)
+            rss = statistics.median(run["rss_mib"] for run in runs)
+            print(f"{name} {mode:<12}  {ms:8.1f} ms  {rss:7.1f} MiB")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark the memory used per message by the in-memory thread store.
+
+Compares one dict per message with an ISO timestamp string (the old layout)
+with the column-based layout of MemoryThreadStore. Message contents are
+created up front and shared by both, so only the per-message overhead is
+measured.
+
+Usage:
+    python -m benchmarks.bench_thread_store --messages 1000000 --threads 1000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import datetime
+
+from conversations.thread_store import MemoryThreadStore
+
+SENDERS = ("user", "default", "programming", "writing", "math", "weather")
+
+
+def _dict_store(thread_ids: list[str], contents: list[str]) -> dict:
+    """Store the messages the old way, one dict per message."""
+    threads: dict[str, list[dict]] = {}
+    for index, content in enumerate(contents):
+        thread_id = thread_ids[index % len(thread_ids)]
+        if thread_id not in threads:
+            threads[thread_id] = []
+        threads[thread_id].append(
+            {
+                "sender": SENDERS[index % len(SENDERS)],
+                "content": content,
+                "timestamp": datetime.utcnow().isoformat(),
+            }
+        )
+    return threads
+
+
+def _compact_store(thread_ids: list[str], contents: list[str]) -> MemoryThreadStore:
+    """Store the messages in a MemoryThreadStore."""
+    store = MemoryThreadStore()
+    for index, content in enumerate(contents):
+        store.save_messages(
+            thread_ids[index % len(thread_ids)],
+            [(SENDERS[index % len(SENDERS)], content)],
+        )
+    return store
+
+
+def _measure(build, thread_ids: list[str], contents: list[str]) -> tuple[int, float]:
+    """Return the bytes allocated and seconds taken to build a store."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    store = build(thread_ids, contents)
+    elapsed = time.perf_counter() - start
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del store
+    return allocated, elapsed
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--threads", type=int, default=1000)
+    args = parser.parse_args()
+
+    thread_ids = [f"thread-{n}" for n in range(args.threads)]
+    contents = [f"message {n}" for n in range(args.messages)]
+
+    print(f"messages: {args.messages}  threads: {args.threads}")  # noqa: T201
+    for name, build in (("dict per message", _dict_store), ("columns", _compact_store)):
+        allocated, elapsed = _measure(build, thread_ids, contents)
+        print(  # noqa: T201
+            f"{name:<17} {allocated / args.messages:6.1f} bytes/message  "
+            f"{allocated / 2**20:7.1f} MiB  {elapsed:.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
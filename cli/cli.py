@@ -1,12 +1,23 @@
 """CLI for Christopher."""
 
+import argparse
 import asyncio
 import logging
 
 import inquirer
 from dotenv import load_dotenv
 
-from core.christopher import load_agents, run_with_langgraph
+from conversations.thread_store import close_thread_store
+from core.christopher import (
+    GRAPH_FORMATS,
+    load_agents,
+    reload_agents,
+    render_graph,
+    run_with_langgraph,
+)
+from core.response_cache import close_response_cache
+from llm.ollama_client import close_ollama_client
+from mcp_servers.math_server import close_math_server
 
 # Configure logging
 logging.basicConfig(
@@ -20,34 +31,97 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 
-async def main():
-    """Run the main CLI loop."""
+async def main(watch: bool = False):
+    """Run the main CLI loop.
+
+    Args:
+    ----
+        watch: Whether to pick up changed agent modules before each message
+
+    """
     logger.info("Starting Christopher CLI")
     load_agents()
     logger.info("Agents loaded successfully")
     # thread_id = await inquirer.text("Thread ID (new or existing)")
 
-    while True:
-        user_input = inquirer.text(
-            "You:"
-        )  # Remove await since inquirer.text is not async
-        logger.info(f"User input: {user_input}")
-
-        if user_input.lower() in ["exit", "quit"]:
-            logger.info("User requested exit")
-            break
-
-        try:
-            logger.info("Processing user input with langgraph")
-            response = await run_with_langgraph(user_input)
-            logger.info(f"Generated response: {response}")
-            print(f"Christopher: {response}")  # noqa: T201
-        except Exception as e:
-            logger.error(f"Error occurred: {str(e)}", exc_info=True)
-            logger.error(f"Error: {e}")
+    try:
+        while True:
+            user_input = inquirer.text(
+                "You:"
+            )  # Remove await since inquirer.text is not async
+            logger.info(f"User input: {user_input}")
+
+            if user_input.lower() in ["exit", "quit"]:
+                logger.info("User requested exit")
+                break
+
+            try:
+                if watch:
+                    reload_agents()
+                logger.info("Processing user input with langgraph")
+                response = await run_with_langgraph(user_input)
+                logger.info(f"Generated response: {response}")
+                print(f"Christopher: {response}")  # noqa: T201
+            except Exception as e:
+                logger.error(f"Error occurred: {str(e)}", exc_info=True)
+                logger.error(f"Error: {e}")
+    finally:
+        await close_ollama_client()
+        await close_response_cache()
+        close_thread_store()
+        close_math_server()
 
     logger.info("Christopher CLI session ended")
 
 
+def write_graph(output: str, fmt: str = "png") -> None:
+    """Render the agent graph and write it to a file.
+
+    Args:
+    ----
+        output: Path of the file to write
+        fmt: Diagram format, either "png" or "mermaid"
+
+    """
+    load_agents()
+    diagram = render_graph(fmt)
+    mode = "wb" if isinstance(diagram, bytes) else "w"
+    with open(output, mode) as f:
+        f.write(diagram)
+    logger.info(f"Graph written to {output}")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse command line arguments.
+
+    Args:
+    ----
+        argv: Arguments to parse, defaults to ``sys.argv[1:]``
+
+    Returns:
+    -------
+        The parsed arguments
+
+    """
+    parser = argparse.ArgumentParser(description="Christopher CLI")
+    subparsers = parser.add_subparsers(dest="command")
+    chat_parser = subparsers.add_parser(
+        "chat", help="Start an interactive chat (default)"
+    )
+    chat_parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Reload changed agent modules before each message",
+    )
+    graph_parser = subparsers.add_parser("graph", help="Render the agent graph")
+    graph_parser.add_argument("--output", "-o", default="graph.png")
+    graph_parser.add_argument("--format", "-f", choices=GRAPH_FORMATS, default="png")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args()
+    if args.command == "graph":
+        write_graph(args.output, args.format)
+    else:
+        asyncio.run(main(watch=getattr(args, "watch", False)))
@@ -1,28 +1,816 @@
-"""Thread store for storing and retrieving conversation threads."""
+"""Thread store for storing and retrieving conversation threads.
 
-from datetime import datetime
+Messages are kept by a backend selected with ``CONFIG["thread_store"]``:
 
-threads: dict[str, list[dict]] = {}
+- ``memory``: compact columns in the process, bounded by message, byte and
+  idle-time budgets, lost on restart and not shared between workers
+- ``sqlite``: a SQLite database in WAL mode, durable and shared by all workers
+  on the host
+
+SQLite writes follow ``CONFIG["thread_store"]["durability"]``. In the default
+``async`` mode they are queued and committed in the background, so saving a
+message never waits for the disk.
+
+Each message has an ``id`` that increases within its thread. Threads are read a
+page at a time by passing ``limit`` and, for older pages, ``before`` set to the
+``id`` of the oldest message already read.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Protocol
+
+from core.config import CONFIG
+from core.metrics import register_stats
+from llm.resilience import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+# How SQLite writes are made durable:
+# - sync: each save is committed before it returns
+# - group: saves are committed in groups, by the save that fills a group or a
+#   timer for a partial one
+# - async: saves are queued and committed in groups by a writer thread
+DURABILITY_MODES = ("sync", "group", "async")
+
+
+class ThreadStore(Protocol):
+    """Storage used for conversation threads."""
+
+    name: str
+
+    def save_messages(self, thread_id: str, messages: list[tuple[str, str]]) -> None:
+        """Append ``(sender, content)`` messages to a thread."""
+
+    def get_thread(
+        self, thread_id: str, limit: int | None = None, before: int | None = None
+    ) -> list[dict]:
+        """Get a thread's messages, oldest first."""
+
+    def list_threads(self) -> list[str]:
+        """List all thread ids, oldest first."""
+
+    def stats(self) -> dict[str, Any]:
+        """Return the store's counters."""
+
+    def close(self) -> None:
+        """Persist pending writes and release resources."""
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _timestamp() -> str:
+    return datetime.utcnow().isoformat()
+
+
+# Bytes held per message besides its content: the sender id, the timestamp
+# and the pointer to the content
+_MESSAGE_OVERHEAD = 4 + 8 + 8
+
+
+class _Thread:
+    """Messages of one thread, stored column by column.
+
+    Keeping each field in its own column avoids a dict per message: senders
+    are small integers into the store's sender table and timestamps are
+    microseconds since the epoch, turned into ISO strings only when read.
+    Messages trimmed by the per-thread cap are dropped from the front, so
+    ``first_id`` is the id of the first message still held.
+    """
+
+    __slots__ = ("senders", "contents", "timestamps", "first_id", "size", "used_at")
+
+    def __init__(self) -> None:
+        self.senders = array("I")
+        self.contents: list[str] = []
+        self.timestamps = array("q")
+        self.first_id = 0
+        self.size = 0
+        self.used_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self.contents)
+
+
+def _isoformat(timestamp_us: int) -> str:
+    return (_EPOCH + timedelta(microseconds=timestamp_us)).isoformat()
+
+
+def _message_size(content: str) -> int:
+    return sys.getsizeof(content) + _MESSAGE_OVERHEAD
+
+
+class MemoryThreadStore:
+    """In-process thread store for a single worker.
+
+    The store can be bounded. Each thread keeps at most
+    ``max_thread_messages`` messages, the oldest being dropped first. Threads
+    idle for ``idle_ttl_seconds`` are evicted, and so are the least recently
+    used threads while the store holds more than ``max_messages`` messages or
+    ``max_bytes`` bytes. Evicted threads are written to ``spill_dir`` when it
+    is set, and read back on their next use; otherwise they are dropped.
+
+    Attributes
+    ----------
+        threads: Threads held in memory, least recently used first
+        senders: Sender names, indexed by the ids stored in the threads
+        counters: Eviction, trim, spill and reload counters
+
+    """
+
+    name = "memory"
+
+    def __init__(
+        self,
+        max_messages: int | None = None,
+        max_bytes: int | None = None,
+        max_thread_messages: int | None = None,
+        idle_ttl_seconds: float | None = None,
+        spill_dir: str | Path | None = None,
+    ) -> None:
+        """Initialize an empty store.
+
+        Args:
+        ----
+            max_messages: Messages held across all threads, None for no limit
+            max_bytes: Approximate bytes held across all threads, None for no
+                limit
+            max_thread_messages: Messages kept per thread, None for no limit
+            idle_ttl_seconds: Time after which an unused thread is evicted,
+                None to keep idle threads
+            spill_dir: Directory evicted threads are written to, None to drop
+                them
+
+        """
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.max_thread_messages = max_thread_messages
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.spill_dir = Path(spill_dir) if spill_dir is not None else None
+        if self.spill_dir is not None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self.threads: OrderedDict[str, _Thread] = OrderedDict()
+        self.senders: list[str] = []
+        self._sender_ids: dict[str, int] = {}
+        # Every thread held in memory or spilled to disk, oldest first
+        self._known: dict[str, None] = {}
+        self._lock = threading.RLock()
+        self.messages = 0
+        self.bytes = 0
+        self.counters: Counter[str] = Counter(
+            evicted_lru=0,
+            evicted_idle=0,
+            trimmed_messages=0,
+            spilled=0,
+            reloaded=0,
+            lost=0,
+            spill_errors=0,
+        )
+
+    def _sender_id(self, sender: str) -> int:
+        sender_id = self._sender_ids.get(sender)
+        if sender_id is None:
+            sender_id = self._sender_ids[sender] = len(self.senders)
+            self.senders.append(sender)
+        return sender_id
+
+    def _spill_path(self, thread_id: str) -> Path:
+        digest = hashlib.sha256(thread_id.encode()).hexdigest()
+        return self.spill_dir / f"{digest}.json"
+
+    def _use(self, thread_id: str, create: bool = False) -> _Thread | None:
+        """Get a thread, reloading it if spilled, and mark it recently used."""
+        thread = self.threads.get(thread_id)
+        reloaded = False
+        if thread is None:
+            if thread_id in self._known and self.spill_dir is not None:
+                thread = self._reload(thread_id)
+                reloaded = thread is not None
+            if thread is None:
+                if not create:
+                    return None
+                thread = _Thread()
+                self._known[thread_id] = None
+            self.threads[thread_id] = thread
+        else:
+            self.threads.move_to_end(thread_id)
+        thread.used_at = time.monotonic()
+        if reloaded:
+            # A reloaded thread grows the store like a write does
+            self._apply_limits(thread)
+        return thread
+
+    def _reload(self, thread_id: str) -> _Thread | None:
+        """Read a spilled thread back, or forget it if its file is gone."""
+        path = self._spill_path(thread_id)
+        try:
+            data = json.loads(path.read_text())
+        except FileNotFoundError:
+            logger.warning(
+                f"Spilled thread {thread_id} is missing, treating it as lost"
+            )
+            del self._known[thread_id]
+            self.counters["lost"] += 1
+            return None
+        path.unlink()
+        thread = _Thread()
+        thread.senders.extend(self._sender_id(sender) for sender in data["senders"])
+        thread.contents = data["contents"]
+        thread.timestamps.extend(data["timestamps"])
+        thread.first_id = data["first_id"]
+        thread.size = sum(_message_size(content) for content in thread.contents)
+        self.messages += len(thread)
+        self.bytes += thread.size
+        self.counters["reloaded"] += 1
+        return thread
+
+    def _evict(self, thread_id: str, reason: str) -> None:
+        """Drop a thread from memory, spilling it to disk first if enabled.
+
+        Raises
+        ------
+            OSError: If the spill file could not be written; the thread is
+                then still held in memory
+
+        """
+        thread = self.threads[thread_id]
+        if self.spill_dir is not None:
+            data = {
+                "thread_id": thread_id,
+                "first_id": thread.first_id,
+                "senders": [self.senders[sender] for sender in thread.senders],
+                "contents": thread.contents,
+                "timestamps": thread.timestamps.tolist(),
+            }
+            self._spill_path(thread_id).write_text(json.dumps(data))
+            self.counters["spilled"] += 1
+        else:
+            del self._known[thread_id]
+        del self.threads[thread_id]
+        self.messages -= len(thread)
+        self.bytes -= thread.size
+        self.counters[f"evicted_{reason}"] += 1
+
+    def _enforce_limits(self) -> None:
+        """Evict idle threads, then least recently used ones while over budget.
+
+        If a thread cannot be spilled, it is kept and the store stays over
+        budget until a later write or read tries again.
+        """
+        try:
+            if self.idle_ttl_seconds is not None:
+                cutoff = time.monotonic() - self.idle_ttl_seconds
+                while self.threads:
+                    thread_id, thread = next(iter(self.threads.items()))
+                    if thread.used_at > cutoff:
+                        break
+                    self._evict(thread_id, "idle")
+            # The most recently used thread is the one being written, keep it
+            while len(self.threads) > 1 and (
+                (self.max_messages is not None and self.messages > self.max_messages)
+                or (self.max_bytes is not None and self.bytes > self.max_bytes)
+            ):
+                self._evict(next(iter(self.threads)), "lru")
+        except OSError as e:
+            self.counters["spill_errors"] += 1
+            logger.error(f"Failed to spill a thread, keeping it in memory: {e}")
+
+    def _apply_limits(self, thread: _Thread) -> None:
+        """Cap the thread that just grew, then bring the store within budget."""
+        if (
+            self.max_thread_messages is not None
+            and len(thread) > self.max_thread_messages
+        ):
+            self._trim(thread)
+        self._enforce_limits()
+
+    def _trim(self, thread: _Thread) -> None:
+        excess = len(thread) - self.max_thread_messages
+        removed = sum(_message_size(content) for content in thread.contents[:excess])
+        del thread.senders[:excess]
+        del thread.contents[:excess]
+        del thread.timestamps[:excess]
+        thread.first_id += excess
+        thread.size -= removed
+        self.messages -= excess
+        self.bytes -= removed
+        self.counters["trimmed_messages"] += excess
+
+    def save_messages(self, thread_id: str, messages: list[tuple[str, str]]) -> None:
+        """Append ``(sender, content)`` messages to a thread."""
+        timestamp = time.time_ns() // 1000
+        with self._lock:
+            thread = self._use(thread_id, create=True)
+            for sender, content in messages:
+                thread.senders.append(self._sender_id(sender))
+                thread.contents.append(content)
+                thread.timestamps.append(timestamp)
+                size = _message_size(content)
+                thread.size += size
+                self.bytes += size
+            self.messages += len(messages)
+            self._apply_limits(thread)
+
+    def get_thread(
+        self, thread_id: str, limit: int | None = None, before: int | None = None
+    ) -> list[dict]:
+        """Get a thread's messages, oldest first."""
+        with self._lock:
+            thread = self._use(thread_id)
+            if thread is None:
+                return []
+            end = len(thread)
+            if before is not None:
+                end = max(0, min(before - thread.first_id, end))
+            start = 0 if limit is None else max(0, end - limit)
+            return [
+                {
+                    "id": thread.first_id + index,
+                    "sender": self.senders[thread.senders[index]],
+                    "content": thread.contents[index],
+                    "timestamp": _isoformat(thread.timestamps[index]),
+                }
+                for index in range(start, end)
+            ]
+
+    def list_threads(self) -> list[str]:
+        """List all thread ids, oldest first."""
+        with self._lock:
+            self._enforce_limits()
+            return list(self._known)
+
+    def stats(self) -> dict[str, Any]:
+        """Return the store's footprint and eviction counters.
+
+        Returns
+        -------
+            A dictionary with the threads, messages and bytes held in memory,
+            the number of spilled threads and the counters
+
+        """
+        with self._lock:
+            return {
+                "backend": self.name,
+                "threads": len(self.threads),
+                "spilled_threads": len(self._known) - len(self.threads),
+                "messages": self.messages,
+                "bytes": self.bytes,
+                **self.counters,
+            }
+
+    def close(self) -> None:
+        """Delete spilled threads, which do not outlive the process."""
+        with self._lock:
+            if self.spill_dir is not None:
+                for thread_id in self._known:
+                    if thread_id not in self.threads:
+                        self._spill_path(thread_id).unlink(missing_ok=True)
+
+
+class SQLiteThreadStore:
+    """SQLite thread store shared by all workers on a host.
+
+    The database runs in WAL mode so readers in other workers are not blocked
+    by writes. Single messages are committed in groups: pending messages are
+    held in memory and written in one transaction by the save that brings
+    them to ``batch_size``, or by a timer thread once the first of them has
+    waited ``commit_interval`` seconds, so a crash loses at most that much
+    history. No transaction stays open between calls, so other workers can
+    write meanwhile. Reads commit pending messages first, and ``close``
+    commits whatever is left.
+
+    Attributes
+    ----------
+        path: The database file
+        batch_size: Pending messages that trigger a commit
+        commit_interval: Seconds a message may stay pending
+
+    """
+
+    name = "sqlite"
+
+    def __init__(
+        self,
+        path: str | Path,
+        batch_size: int = 32,
+        commit_interval: float = 1.0,
+    ) -> None:
+        """Open the database, creating it if needed.
+
+        Args:
+        ----
+            path: The database file, or ":memory:"
+            batch_size: Pending messages that trigger a commit
+            commit_interval: Seconds a message may stay pending
+
+        """
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+        self._lock = threading.Lock()
+        self._pending: list[tuple[str, str, str, str]] = []
+        self._pending_since = 0.0
+        self.connection = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "thread_id TEXT NOT NULL, "
+            "sender TEXT NOT NULL, "
+            "content TEXT NOT NULL, "
+            "timestamp TEXT NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS messages_thread ON messages (thread_id, id)"
+        )
+        self._closed = threading.Event()
+        self._timer: threading.Thread | None = None
+        if batch_size > 1:
+            self._timer = threading.Thread(
+                target=self._run, name="thread-store-commit", daemon=True
+            )
+            self._timer.start()
+
+    def save_messages(self, thread_id: str, messages: list[tuple[str, str]]) -> None:
+        """Append ``(sender, content)`` messages to a thread."""
+        timestamp = _timestamp()
+        self._insert(
+            [(thread_id, sender, content, timestamp) for sender, content in messages]
+        )
+
+    def save_batch(self, rows: list[tuple[str, str, str, str]]) -> None:
+        """Append messages of any threads and commit them together.
+
+        Args:
+        ----
+            rows: ``(thread_id, sender, content, timestamp)`` tuples
+
+        Raises:
+        ------
+            sqlite3.Error: If the commit failed; the rows are not kept, so the
+                caller owns the retry
+
+        """
+        self._insert(rows, commit=True)
+
+    def _insert(self, rows: list[tuple[str, str, str, str]], commit: bool = False):
+        if not rows:
+            return
+        with self._lock:
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending.extend(rows)
+            if (
+                commit
+                or len(self._pending) >= self.batch_size
+                or time.monotonic() - self._pending_since >= self.commit_interval
+            ):
+                try:
+                    self._commit()
+                except Exception:
+                    if commit:
+                        # Only messages saved without a commit are retried here
+                        del self._pending[-len(rows) :]
+                    raise
+
+    def _commit(self) -> None:
+        """Write and commit the pending messages in one transaction."""
+        if not self._pending:
+            return
+        self.connection.execute("BEGIN")
+        try:
+            self.connection.executemany(
+                "INSERT INTO messages (thread_id, sender, content, timestamp) "
+                "VALUES (?, ?, ?, ?)",
+                self._pending,
+            )
+            self.connection.execute("COMMIT")
+        except Exception:
+            # Keep the messages pending so a later commit can retry them
+            self.connection.execute("ROLLBACK")
+            raise
+        self._pending = []
+
+    def _run(self) -> None:
+        while not self._closed.wait(self.commit_interval / 2):
+            with self._lock:
+                if (
+                    self._pending
+                    and time.monotonic() - self._pending_since >= self.commit_interval
+                ):
+                    try:
+                        self._commit()
+                    except sqlite3.Error as e:
+                        logger.error(f"Failed to commit pending messages: {e}")
+
+    def flush(self) -> None:
+        """Commit pending messages."""
+        with self._lock:
+            self._commit()
+
+    def get_thread(
+        self, thread_id: str, limit: int | None = None, before: int | None = None
+    ) -> list[dict]:
+        """Get a thread's messages, oldest first."""
+        query = (
+            "SELECT id, sender, content, timestamp FROM messages WHERE thread_id = ?"
+        )
+        params: list = [thread_id]
+        if before is not None:
+            query += " AND id < ?"
+            params.append(before)
+        query += " ORDER BY id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            self._commit()
+            rows = self.connection.execute(query, params).fetchall()
+        return [
+            {
+                "id": message_id,
+                "sender": sender,
+                "content": content,
+                "timestamp": timestamp,
+            }
+            for message_id, sender, content, timestamp in reversed(rows)
+        ]
+
+    def list_threads(self) -> list[str]:
+        """List all thread ids, oldest first."""
+        with self._lock:
+            self._commit()
+            rows = self.connection.execute(
+                "SELECT thread_id FROM messages GROUP BY thread_id ORDER BY MIN(id)"
+            ).fetchall()
+        return [thread_id for (thread_id,) in rows]
+
+    def close(self) -> None:
+        """Commit pending messages and close the database."""
+        self._closed.set()
+        if self._timer is not None:
+            self._timer.join()
+        with self._lock:
+            self._commit()
+            self.connection.close()
+
+    def stats(self) -> dict[str, Any]:
+        """Return the store's counters.
+
+        Returns
+        -------
+            A dictionary with the backend name and the uncommitted messages
+
+        """
+        return {"backend": self.name, "pending": len(self._pending)}
+
+
+class WriteBehindThreadStore:
+    """Thread store that writes messages to SQLite in the background.
+
+    Saving a message only appends it to an in-process queue, so a chat turn
+    never waits for the disk. A writer thread drains the queue into the
+    database, committing messages of all threads together once
+    ``batch_size`` are queued or every ``flush_interval`` seconds. Reads flush
+    the queue first, so they always see earlier writes, and ``close`` flushes
+    whatever is left. A crash loses at most the queued messages.
+
+    Attributes
+    ----------
+        store: The SQLite store written to
+        batch_size: Queued messages that wake the writer
+        flush_interval: Seconds between flushes of a partially filled queue
+        commit_latency: Durations of the group commits
+
+    """
+
+    def __init__(
+        self,
+        store: SQLiteThreadStore,
+        batch_size: int = 32,
+        flush_interval: float = 1.0,
+    ) -> None:
+        """Start the writer thread.
+
+        Args:
+        ----
+            store: The SQLite store written to
+            batch_size: Queued messages that wake the writer
+            flush_interval: Seconds between flushes of a partially filled queue
+
+        """
+        self.store = store
+        self.name = store.name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.commit_latency = LatencyTracker(min_samples=1)
+        self.counters: Counter[str] = Counter(
+            queued=0, committed=0, commits=0, errors=0
+        )
+        self._queue: list[tuple[str, str, str, str]] = []
+        self._queue_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._writer = threading.Thread(
+            target=self._run, name="thread-store-writer", daemon=True
+        )
+        self._writer.start()
+
+    def save_messages(self, thread_id: str, messages: list[tuple[str, str]]) -> None:
+        """Queue ``(sender, content)`` messages for a thread."""
+        timestamp = _timestamp()
+        with self._queue_lock:
+            self._queue.extend(
+                (thread_id, sender, content, timestamp) for sender, content in messages
+            )
+            depth = len(self._queue)
+            self.counters["queued"] += len(messages)
+        if depth >= self.batch_size:
+            self._wake.set()
+
+    def flush(self) -> None:
+        """Write and commit every queued message.
+
+        Raises
+        ------
+            sqlite3.Error: If the write failed, the messages stay queued
+
+        """
+        with self._write_lock:
+            with self._queue_lock:
+                rows, self._queue = self._queue, []
+            if not rows:
+                return
+            start = time.monotonic()
+            try:
+                self.store.save_batch(rows)
+            except Exception:
+                self.counters["errors"] += 1
+                with self._queue_lock:
+                    self._queue[:0] = rows
+                raise
+            self.commit_latency.record(time.monotonic() - start)
+            self.counters["commits"] += 1
+            self.counters["committed"] += len(rows)
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Failed to write queued messages: {e}")
+
+    def get_thread(
+        self, thread_id: str, limit: int | None = None, before: int | None = None
+    ) -> list[dict]:
+        """Get a thread's messages, oldest first."""
+        self.flush()
+        return self.store.get_thread(thread_id, limit=limit, before=before)
+
+    def list_threads(self) -> list[str]:
+        """List all thread ids, oldest first."""
+        self.flush()
+        return self.store.list_threads()
+
+    def stats(self) -> dict[str, Any]:
+        """Return the queue depth and commit counters and latencies.
+
+        Returns
+        -------
+            A dictionary with the queue depth, counters and commit latency
+            percentiles in milliseconds
+
+        """
+        p50 = self.commit_latency.percentile(50)
+        p95 = self.commit_latency.percentile(95)
+        return {
+            "backend": self.name,
+            "durability": "async",
+            "queue_depth": len(self._queue),
+            **self.counters,
+            "commit_p50_ms": round(p50 * 1000, 2) if p50 is not None else None,
+            "commit_p95_ms": round(p95 * 1000, 2) if p95 is not None else None,
+        }
+
+    def close(self) -> None:
+        """Stop the writer, flush the queue and close the store."""
+        self._closed = True
+        self._wake.set()
+        self._writer.join()
+        self.flush()
+        self.store.close()
+
+
+_thread_store: ThreadStore | None = None
+
+
+def get_thread_store() -> ThreadStore:
+    """Get the process-wide thread store, creating it on first use.
+
+    Returns
+    -------
+        The configured ThreadStore
+
+    Raises
+    ------
+        ValueError: If the configured backend or durability mode is unknown
+
+    """
+    global _thread_store
+    if _thread_store is None:
+        settings = CONFIG["thread_store"]
+        if settings["backend"] == "memory":
+            _thread_store = MemoryThreadStore(
+                max_messages=settings["max_messages"],
+                max_bytes=settings["max_bytes"],
+                max_thread_messages=settings["max_thread_messages"],
+                idle_ttl_seconds=settings["idle_ttl_seconds"],
+                spill_dir=settings["spill_dir"],
+            )
+        elif settings["backend"] == "sqlite":
+            durability = settings["durability"]
+            if durability not in DURABILITY_MODES:
+                raise ValueError(f"Unknown thread store durability: {durability}")
+            store = SQLiteThreadStore(
+                settings["path"],
+                # The write-behind queue does the grouping in async mode
+                batch_size=(settings["batch_size"] if durability == "group" else 1),
+                commit_interval=settings["commit_interval"],
+            )
+            if durability == "async":
+                store = WriteBehindThreadStore(
+                    store,
+                    batch_size=settings["batch_size"],
+                    flush_interval=settings["commit_interval"],
+                )
+            _thread_store = store
+        else:
+            raise ValueError(f"Unknown thread store backend: {settings['backend']}")
+    return _thread_store
+
+
+def close_thread_store() -> None:
+    """Close and discard the process-wide thread store, if one was created."""
+    global _thread_store
+    store, _thread_store = _thread_store, None
+    if store is not None:
+        store.close()
+
+
+def _thread_store_stats() -> dict[str, Any]:
+    return _thread_store.stats() if _thread_store is not None else {}
+
+
+register_stats("thread_store", _thread_store_stats)
 
 
 def save_message(thread_id: str, sender: str, content: str):
     """Save a message to the thread store."""
-    if thread_id not in threads:
-        threads[thread_id] = []
-    threads[thread_id].append(
-        {
-            "sender": sender,
-            "content": content,
-            "timestamp": datetime.utcnow().isoformat(),
-        }
-    )
+    get_thread_store().save_messages(thread_id, [(sender, content)])
+
+
+def save_messages(thread_id: str, messages: list[tuple[str, str]]):
+    """Save several ``(sender, content)`` messages to a thread at once."""
+    get_thread_store().save_messages(thread_id, messages)
+
+
+def get_thread(
+    thread_id: str, limit: int | None = None, before: int | None = None
+) -> list[dict]:
+    """Get a thread from the thread store.
+
+    Args:
+    ----
+        thread_id: The thread to read
+        limit: Maximum number of messages, the most recent ones, None for all
+        before: Only return messages with an id lower than this one
 
+    Returns:
+    -------
+        The selected messages, oldest first
 
-def get_thread(thread_id: str) -> list[dict]:
-    """Get a thread from the thread store."""
-    return threads.get(thread_id, [])
+    """
+    return get_thread_store().get_thread(thread_id, limit=limit, before=before)
 
 
 def list_threads() -> list[str]:
     """List all threads in the thread store."""
-    return list(threads.keys())
+    return get_thread_store().list_threads()
@@ -0,0 +1,144 @@
+"""Bulkhead module for limiting how many requests an agent runs at once.
+
+Each limited agent gets its own bulkhead, so a burst of requests to one slow or
+expensive agent cannot exhaust capacity needed by the others. Requests beyond
+the concurrency limit wait in a bounded queue; once the queue is full, new
+requests are rejected immediately instead of adding to the latency of
+everything already waiting.
+"""
+
+import asyncio
+import time
+from types import TracebackType
+from typing import Any
+
+from core.config import CONFIG
+
+
+class AgentOverloadedError(Exception):
+    """Raised when an agent's bulkhead has no free slot or queue space.
+
+    Attributes
+    ----------
+        agent_id: The overloaded agent
+        retry_after: Suggested number of seconds before retrying
+
+    """
+
+    def __init__(self, agent_id: str, retry_after: float) -> None:
+        """Initialize the error.
+
+        Args:
+        ----
+            agent_id: The overloaded agent
+            retry_after: Suggested number of seconds before retrying
+
+        """
+        super().__init__(f"Agent {agent_id} is overloaded, retry later")
+        self.agent_id = agent_id
+        self.retry_after = retry_after
+
+
+class Bulkhead:
+    """Concurrency limit with a bounded wait queue for one agent.
+
+    Use as an async context manager around the agent call::
+
+        async with bulkhead:
+            response = await agent.run(input_text, context)
+
+    Attributes
+    ----------
+        agent_id: The agent the bulkhead protects
+        max_concurrency: Maximum number of calls running at once
+        max_queue: Maximum number of calls waiting for a slot
+        active: Calls currently running
+        waiting: Calls currently waiting for a slot
+
+    """
+
+    def __init__(self, agent_id: str, max_concurrency: int, max_queue: int = 0) -> None:
+        """Initialize the bulkhead.
+
+        Args:
+        ----
+            agent_id: The agent the bulkhead protects
+            max_concurrency: Maximum number of calls running at once
+            max_queue: Maximum number of calls waiting for a slot
+
+        Raises:
+        ------
+            ValueError: If the limits are out of range
+
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if max_queue < 0:
+            raise ValueError("max_queue must not be negative")
+        self.agent_id = agent_id
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.queue_time_total = 0.0
+        self.queue_time_max = 0.0
+
+    async def __aenter__(self) -> "Bulkhead":
+        """Take a slot, waiting in the queue if needed.
+
+        Raises
+        ------
+            AgentOverloadedError: If no slot is free and the queue is full
+
+        """
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise AgentOverloadedError(
+                self.agent_id, CONFIG["bulkhead"]["retry_after_seconds"]
+            )
+        start = time.monotonic()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        queue_time = time.monotonic() - start
+        self.queue_time_total += queue_time
+        self.queue_time_max = max(self.queue_time_max, queue_time)
+        self.admitted += 1
+        self.active += 1
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        """Release the slot."""
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> dict[str, Any]:
+        """Return the bulkhead's occupancy and queue-time stats.
+
+        Returns
+        -------
+            A dictionary of counters and queue times in milliseconds
+
+        """
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "queue_ms_avg": (
+                self.queue_time_total / self.admitted * 1000 if self.admitted else 0.0
+            ),
+            "queue_ms_max": self.queue_time_max * 1000,
+        }
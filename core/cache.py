@@ -0,0 +1,128 @@
+"""In-process cache primitives shared by Christopher's caching layers."""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+
+class TTLCache:
+    """A size-bounded LRU cache whose entries optionally expire after a TTL.
+
+    Attributes
+    ----------
+        max_size: Maximum number of entries kept before evicting the least
+            recently used one
+        ttl_seconds: Lifetime of an entry in seconds, or None for no expiry
+        hits: Number of lookups that found a live entry
+        misses: Number of lookups that found nothing or an expired entry
+        evictions: Number of entries dropped to stay within max_size
+        expirations: Number of entries dropped because their TTL elapsed
+
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float | None = None) -> None:
+        """Initialize the cache.
+
+        Args:
+        ----
+            max_size: Maximum number of entries to keep
+            ttl_seconds: Lifetime of an entry in seconds, or None for no expiry
+
+        Raises:
+        ------
+            ValueError: If max_size is not positive
+
+        """
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: OrderedDict[Hashable, tuple[float | None, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Look up a key, refreshing its recency on a hit.
+
+        Args:
+        ----
+            key: The cache key
+            default: Value returned when the key is missing or expired
+
+        Returns:
+        -------
+            The cached value or ``default``
+
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: float | None = None) -> None:
+        """Store a value, evicting the least recently used entry if full.
+
+        Args:
+        ----
+            key: The cache key
+            value: The value to store
+            ttl_seconds: Lifetime for this entry, defaults to the cache TTL
+
+        """
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        """Remove a key if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def __len__(self) -> int:
+        """Return the number of stored entries, including expired ones."""
+        return len(self._entries)
+
+    def stats(self) -> dict[str, Any]:
+        """Return the cache counters.
+
+        Returns
+        -------
+            A dictionary with the size and hit/miss/eviction counters
+
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
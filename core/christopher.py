@@ -1,21 +1,296 @@
 """Christopher module for the application."""
 
+import asyncio
 import importlib.util
+import logging
 import os
+import time
+from collections.abc import AsyncIterator
+from types import ModuleType
+from typing import Any
 
-from core.langgraph_runner import ChatState, create_graph
-from core.registry import AGENT_REGISTRY, AgentProtocol
+from core.bulkhead import AgentOverloadedError
+from core.config import CONFIG
+from core.langgraph_runner import (
+    ChatState,
+    agent_node,
+    create_graph,
+    route_batch,
+    router_system_prompt,
+)
+from core.manifest import AGENTS_DIR, MANIFEST_PATH, load_manifest
+from core.metrics import register_stats
+from core.registry import (
+    AGENT_REGISTRY,
+    AgentProtocol,
+    capture_registrations,
+    get_agent_instance,
+    is_agent_enabled,
+    register_agent,
+    registry_fingerprint,
+)
+
+logger = logging.getLogger(__name__)
+
+# Compiled graph shared by the API and CLI, keyed on the registry it was built from
+_compiled_graph: Any = None
+_compiled_graph_fingerprint: tuple | None = None
+
+# Rendered diagrams of the compiled graph, keyed on (fingerprint, format)
+_graph_renders: dict[tuple[tuple, str], bytes | str] = {}
+
+GRAPH_FORMATS = ("png", "mermaid")
+
+STREAM_STATS: dict[str, float] = {"requests": 0, "first_token_ms_total": 0.0}
+
+
+def _stream_stats() -> dict[str, float]:
+    """Return streaming counters with the mean time to first token."""
+    requests = STREAM_STATS["requests"]
+    return {
+        "requests": requests,
+        "first_token_ms_avg": (
+            STREAM_STATS["first_token_ms_total"] / requests if requests else 0.0
+        ),
+    }
+
+
+register_stats("streaming", _stream_stats)
+
+
+_agent_modules: dict[str, ModuleType] = {}
+
+# Content hash of each agent module the registry was last loaded from
+_loaded_hashes: dict[str, str] = {}
+
+# Agents registered from each agent module
+_module_agents: dict[str, list[str]] = {}
+
+RELOAD_STATS: dict[str, int] = {"reloads": 0, "errors": 0}
+
+register_stats("agent_reloads", lambda: dict(RELOAD_STATS))
+
+
+def _exec_agent_module(path: str) -> ModuleType:
+    """Run an agent module's source as a new module, without caching it."""
+    name = os.path.basename(path)[:-3]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _import_agent_module(path: str) -> ModuleType:
+    """Import an agent module by file path, once per process."""
+    module = _agent_modules.get(path)
+    if module is None:
+        module = _exec_agent_module(path)
+        _agent_modules[path] = module
+    return module
+
+
+def _agent_class(path: str, class_name: str) -> type:
+    """Import a manifest agent's module and return its class."""
+    with capture_registrations():
+        module = _import_agent_module(path)
+    return getattr(module, class_name)
+
+
+def _register_from_manifest(
+    path: str, spec: dict[str, Any], registry: dict[str, dict[str, Any]]
+) -> None:
+    """Register an agent described by the manifest without importing it."""
+    class_name = spec["class"]
+    capabilities = spec["capabilities"]
+    matcher = None
+    if capabilities["matcher"]:
+
+        def matcher(input_text: str) -> float:
+            return _agent_class(path, class_name).match(input_text)
+
+    register_agent(
+        spec["id"],
+        factory=lambda: _agent_class(path, class_name)(),
+        description=spec["description"],
+        matcher=matcher,
+        max_concurrency=capabilities["max_concurrency"],
+        max_queue=capabilities["max_queue"] or 0,
+        cache_ttl=capabilities["cache_ttl"],
+        registry=registry,
+    )
+
+
+def _sync_agents(full: bool) -> bool:
+    """Bring the registry in line with the agent modules on disk.
+
+    The new registry is staged first and swapped in at once, then the graph
+    and routing prompt are rebuilt before returning, so requests never see a
+    partly updated registry. Entries of unchanged modules are carried over
+    as they are, keeping their instances and bulkheads.
+
+    On a reload, added and changed modules are imported before the swap, even
+    those the manifest describes, so a module that fails to import raises
+    here and leaves the current registry and imported modules untouched.
+
+    Args:
+    ----
+        full: Whether to rebuild every module's entries, rather than only
+            those of added and changed modules
+
+    Returns:
+    -------
+        True if the registry was updated
+
+    """
+    global _loaded_hashes
+    manifest = load_manifest(AGENTS_DIR, MANIFEST_PATH)
+    hashes = {entry["path"]: entry["sha256"] for entry in manifest.values()}
+    if not full and hashes == _loaded_hashes:
+        return False
+
+    module_ids = {agent_id for ids in _module_agents.values() for agent_id in ids}
+    staged = {k: v for k, v in AGENT_REGISTRY.items() if k not in module_ids}
+    module_agents: dict[str, list[str]] = {}
+    imported: dict[str, ModuleType] = {}
+    for entry in manifest.values():
+        path = entry["path"]
+        if not full and _loaded_hashes.get(path) == entry["sha256"]:
+            module_agents[path] = _module_agents.get(path, [])
+            for agent_id in module_agents[path]:
+                if agent_id in AGENT_REGISTRY:
+                    staged[agent_id] = AGENT_REGISTRY[agent_id]
+            continue
+        with capture_registrations() as entries:
+            if full and entry["static"]:
+                for spec in entry["agents"]:
+                    _register_from_manifest(path, spec, entries)
+            else:
+                imported[path] = _exec_agent_module(path)
+        module_agents[path] = list(entries)
+        staged.update(entries)
+
+    AGENT_REGISTRY.replace({k: v for k, v in staged.items() if is_agent_enabled(k)})
+    # Only now that the old entries are gone, forget the modules they came from
+    for path in [p for p in _agent_modules if full or p not in hashes]:
+        del _agent_modules[path]
+    _agent_modules.update(imported)
+    _loaded_hashes = hashes
+    _module_agents.clear()
+    _module_agents.update(module_agents)
+    get_compiled_graph()
+    router_system_prompt()
+    return True
 
 
 def load_agents():
-    """Load all agents from the agents directory."""
-    agents_dir = os.path.join(os.path.dirname(__file__), "..", "agents")
-    for filename in os.listdir(agents_dir):
-        if filename.endswith(".py") and not filename.startswith("__"):
-            filepath = os.path.join(agents_dir, filename)
-            spec = importlib.util.spec_from_file_location(filename[:-3], filepath)
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
+    """Load all agents from the agents directory.
+
+    Agents are registered from the agent manifest, without importing their
+    modules; a module is imported the first time one of its agents is used.
+    Modules the manifest cannot describe are imported straight away. Agents
+    not enabled in ``CONFIG["agents"]`` are dropped from the registry.
+    """
+    _sync_agents(full=True)
+
+
+def reload_agents() -> bool:
+    """Pick up agent modules that were added, changed or removed.
+
+    In-flight requests finish with the agents they started with, as each
+    request pins a copy of the registry in its config; later requests use the
+    new registry and graph.
+
+    Returns
+    -------
+        True if any agent module changed
+
+    """
+    changed = _sync_agents(full=False)
+    if changed:
+        RELOAD_STATS["reloads"] += 1
+        logger.info(f"Reloaded agents: {', '.join(sorted(AGENT_REGISTRY))}")
+    return changed
+
+
+async def watch_agents(interval: float) -> None:
+    """Reload agents whenever their modules change, until cancelled.
+
+    Args:
+    ----
+        interval: Seconds between checks of the agents directory
+
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            reload_agents()
+        except Exception as e:
+            # Keep serving the current agents until the module is fixed
+            RELOAD_STATS["errors"] += 1
+            logger.error(f"Failed to reload agents: {e}")
+
+
+def get_compiled_graph() -> Any:
+    """Get the compiled LangGraph graph, building it only when needed.
+
+    The graph is compiled once and reused across requests. It is rebuilt only
+    when the set of registered agents changes.
+
+    Returns
+    -------
+        The compiled LangGraph state graph
+
+    """
+    global _compiled_graph, _compiled_graph_fingerprint
+    fingerprint = registry_fingerprint()
+    if _compiled_graph is None or fingerprint != _compiled_graph_fingerprint:
+        _compiled_graph = create_graph()
+        _compiled_graph_fingerprint = fingerprint
+    return _compiled_graph
+
+
+def invalidate_compiled_graph() -> None:
+    """Drop the cached compiled graph so the next request rebuilds it."""
+    global _compiled_graph, _compiled_graph_fingerprint
+    _compiled_graph = None
+    _compiled_graph_fingerprint = None
+    _graph_renders.clear()
+
+
+def render_graph(fmt: str = "png") -> bytes | str:
+    """Render a diagram of the compiled graph.
+
+    Rendering happens at most once per graph version and format; later calls
+    return the cached diagram. This is deliberately kept off the chat path.
+
+    Args:
+    ----
+        fmt: Either ``"png"`` for a Mermaid PNG image or ``"mermaid"`` for the
+            Mermaid source text
+
+    Returns:
+    -------
+        PNG bytes or Mermaid source text
+
+    Raises:
+    ------
+        ValueError: If the format is not supported
+
+    """
+    if fmt not in GRAPH_FORMATS:
+        raise ValueError(f"Unsupported graph format: {fmt}")
+    graph = get_compiled_graph()
+    key = (_compiled_graph_fingerprint, fmt)
+    if key not in _graph_renders:
+        # Drop renders of previous graph versions
+        for stale in [k for k in _graph_renders if k[0] != key[0]]:
+            del _graph_renders[stale]
+        drawable = graph.get_graph()
+        if fmt == "png":
+            _graph_renders[key] = drawable.draw_mermaid_png()
+        else:
+            _graph_renders[key] = drawable.draw_mermaid()
+    return _graph_renders[key]
 
 
 def get_agent(agent_id: str) -> AgentProtocol | None:
@@ -30,30 +305,200 @@ def get_agent(agent_id: str) -> AgentProtocol | None:
         The agent instance or None if the agent is not found
 
     """
-    agent_data = AGENT_REGISTRY.get(agent_id)
-    return agent_data["instance"] if agent_data else None
+    if agent_id not in AGENT_REGISTRY:
+        return None
+    return get_agent_instance(agent_id, AGENT_REGISTRY)
 
 
-async def run_with_langgraph(user_input: str) -> str:
+async def run_with_langgraph(user_input: str, thread_id: str | None = None) -> str:
     """Run the chat with the LangGraph graph.
 
     Args:
     ----
         user_input: The input text to send to the chat
+        thread_id: Optional conversation thread the input belongs to
 
     Returns:
     -------
         The final response from the chat
 
     """
-    graph = create_graph()
-    graph.get_graph().draw_mermaid_png(output_file_path="graph.png")
+    graph = get_compiled_graph()
     state = ChatState(user_input)
     final_state = await graph.ainvoke(
         {
             "input_text": state.input_text,
             "agent_id": state.agent_id,
             "response": state.response,
-        }
+        },
+        config={
+            "configurable": {
+                "thread_id": thread_id,
+                "agent_registry": dict(AGENT_REGISTRY),
+            }
+        },
     )
     return final_state["response"]
+
+
+def _chunk_text(content: Any) -> str:
+    """Extract the text from a chat model chunk's content.
+
+    Content is usually a string, but some providers (e.g. Anthropic) send a
+    list of content blocks.
+    """
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            block if isinstance(block, str) else str(block.get("text", ""))
+            for block in content
+            if isinstance(block, str) or block.get("type") == "text"
+        )
+    return str(content)
+
+
+async def stream_with_langgraph(
+    user_input: str, thread_id: str | None = None
+) -> AsyncIterator[dict[str, Any]]:
+    """Run the chat with the LangGraph graph, streaming the agent's output.
+
+    Tokens are yielded as soon as the agent's chat model emits them. Agents that
+    do not stream (e.g. weather, math) produce a single chunk with their full
+    response.
+
+    Args:
+    ----
+        user_input: The input text to send to the chat
+        thread_id: Optional conversation thread the input belongs to
+
+    Yields:
+    ------
+        Event dictionaries, in order:
+        ``{"type": "route", "agent_id": ...}`` once the agent is chosen,
+        ``{"type": "token", "content": ...}`` for each chunk of the response,
+        ``{"type": "done", "agent_id": ..., "response": ...,
+        "first_token_ms": ...}`` with the final response
+
+    """
+    graph = get_compiled_graph()
+    state = ChatState(user_input)
+    start = time.perf_counter()
+    first_token_ms: float | None = None
+    final_state: dict[str, Any] = {}
+
+    async for event in graph.astream_events(
+        {
+            "input_text": state.input_text,
+            "agent_id": state.agent_id,
+            "response": state.response,
+        },
+        # Agents must not retry or hedge calls whose tokens are being streamed
+        config={
+            "configurable": {
+                "stream_tokens": True,
+                "thread_id": thread_id,
+                "agent_registry": dict(AGENT_REGISTRY),
+            }
+        },
+        version="v2",
+    ):
+        kind = event["event"]
+        node = event.get("metadata", {}).get("langgraph_node")
+        if kind == "on_chain_end" and event["name"] == "entry":
+            yield {"type": "route", "agent_id": event["data"]["output"]["agent_id"]}
+        elif kind == "on_chat_model_stream" and node not in (None, "entry"):
+            content = _chunk_text(event["data"]["chunk"].content)
+            if not content:
+                continue
+            if first_token_ms is None:
+                first_token_ms = (time.perf_counter() - start) * 1000
+            yield {"type": "token", "content": content}
+        elif kind == "on_chain_end" and not event.get("parent_ids"):
+            final_state = event["data"]["output"]
+
+    response = final_state.get("response", "")
+    if first_token_ms is None:
+        # The agent did not stream, so send its whole response as one chunk
+        first_token_ms = (time.perf_counter() - start) * 1000
+        yield {"type": "token", "content": response}
+
+    STREAM_STATS["requests"] += 1
+    STREAM_STATS["first_token_ms_total"] += first_token_ms
+    logger.info(f"First token after {first_token_ms:.1f} ms")
+    yield {
+        "type": "done",
+        "agent_id": final_state.get("agent_id"),
+        "response": response,
+        "first_token_ms": round(first_token_ms, 1),
+    }
+
+
+async def stream_batch(messages: list[str]) -> AsyncIterator[dict[str, Any]]:
+    """Run many chats, yielding each result as soon as it completes.
+
+    All messages are routed together with ``route_batch``, then dispatched to
+    their agents concurrently, at most ``CONFIG["batch"]["max_concurrency"]``
+    at a time. Agent failures, including agents at capacity, are reported in
+    the response, as in ``agent_node``.
+
+    Args:
+    ----
+        messages: The input texts to send to the chat
+
+    Yields:
+    ------
+        ``{"type": "result", "index": ..., "agent_id": ..., "response": ...}``
+        for each message, in completion order
+
+    """
+    registry = dict(AGENT_REGISTRY)
+    config = {"configurable": {"agent_registry": registry}}
+    agent_ids = await route_batch(messages, registry)
+    semaphore = asyncio.Semaphore(CONFIG["batch"]["max_concurrency"])
+
+    async def run(index: int) -> dict[str, Any]:
+        async with semaphore:
+            try:
+                result = await agent_node(
+                    {
+                        "input_text": messages[index],
+                        "agent_id": agent_ids[index],
+                        "response": "",
+                        "speculation": None,
+                    },
+                    config,
+                )
+                response = result["response"]
+            except AgentOverloadedError as e:
+                response = f"Error: {e}"
+        return {
+            "type": "result",
+            "index": index,
+            "agent_id": agent_ids[index],
+            "response": response,
+        }
+
+    tasks = [asyncio.create_task(run(index)) for index in range(len(messages))]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def run_batch(messages: list[str]) -> list[dict[str, Any]]:
+    """Run many chats and return their results in input order.
+
+    Args:
+    ----
+        messages: The input texts to send to the chat
+
+    Returns:
+    -------
+        The result of each message, as yielded by ``stream_batch``
+
+    """
+    results = [result async for result in stream_batch(messages)]
+    return sorted(results, key=lambda result: result["index"])
@@ -0,0 +1,240 @@
+"""Circuit breaker module for failing fast on degraded agents.
+
+Each agent's calls go through its circuit breaker. When too many recent calls
+fail or are slow, the breaker opens and further calls are refused immediately
+(and rerouted to the fallback agent) instead of waiting for the provider to
+time out. After a cool-off period the breaker half-opens and lets a few probe
+calls through; if they succeed it closes again, otherwise it reopens.
+"""
+
+import logging
+import time
+from collections import deque
+from typing import Any
+
+from core.config import CONFIG
+from core.metrics import register_stats
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when an agent is called while its circuit is open.
+
+    Attributes
+    ----------
+        agent_id: The agent whose circuit is open
+
+    """
+
+    def __init__(self, agent_id: str) -> None:
+        """Initialize the error.
+
+        Args:
+        ----
+            agent_id: The agent whose circuit is open
+
+        """
+        super().__init__(f"Agent {agent_id} is unavailable, its circuit is open")
+        self.agent_id = agent_id
+
+
+class CircuitBreaker:
+    """Circuit breaker tracking the recent calls of one agent.
+
+    Attributes
+    ----------
+        name: The agent the breaker protects
+        state: One of "closed", "open" or "half_open"
+        outcomes: Recent calls as ``(failed, slow)`` pairs
+
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window: int = 20,
+        min_calls: int = 5,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float | None = None,
+        slow_call_rate: float = 1.0,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1,
+    ) -> None:
+        """Initialize the breaker.
+
+        Args:
+        ----
+            name: The agent the breaker protects
+            window: Number of recent calls considered
+            min_calls: Calls needed in the window before the breaker can trip
+            failure_rate: Fraction of failed calls that trips the breaker
+            slow_call_seconds: Calls taking at least this long count as slow,
+                None to ignore latency
+            slow_call_rate: Fraction of slow calls that trips the breaker
+            open_seconds: How long the breaker stays open before probing
+            half_open_probes: Calls let through at once while half-open
+
+        """
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.outcomes: deque[tuple[bool, bool]] = deque(maxlen=window)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self.times_opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """Check whether a call may go through, reserving a probe if half-open.
+
+        Every allowed call must be followed by ``record`` or ``release``.
+
+        Returns
+        -------
+            True if the call may proceed
+
+        """
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                self.rejected += 1
+                return False
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self.probes_in_flight >= self.half_open_probes:
+                self.rejected += 1
+                return False
+            self.probes_in_flight += 1
+        return True
+
+    def record(self, success: bool, duration: float = 0.0) -> None:
+        """Record the outcome of an allowed call.
+
+        Args:
+        ----
+            success: Whether the call succeeded
+            duration: How long the call took in seconds
+
+        """
+        slow = self.slow_call_seconds is not None and duration >= self.slow_call_seconds
+        if self.state == HALF_OPEN:
+            self.probes_in_flight = max(0, self.probes_in_flight - 1)
+            if success and not slow:
+                self._transition(CLOSED)
+            else:
+                self._transition(OPEN)
+            return
+        self.outcomes.append((not success, slow))
+        if self.state == CLOSED and self._should_trip():
+            self._transition(OPEN)
+
+    def release(self) -> None:
+        """Give back an allowed call that ended without a usable outcome."""
+        if self.state == HALF_OPEN:
+            self.probes_in_flight = max(0, self.probes_in_flight - 1)
+
+    def _should_trip(self) -> bool:
+        calls = len(self.outcomes)
+        if calls < self.min_calls:
+            return False
+        failures = sum(failed for failed, _ in self.outcomes)
+        slow = sum(is_slow for _, is_slow in self.outcomes)
+        return (
+            failures / calls >= self.failure_rate or slow / calls >= self.slow_call_rate
+        )
+
+    def _transition(self, state: str) -> None:
+        logger.warning(f"Circuit for {self.name}: {self.state} -> {state}")
+        self.state = state
+        self.probes_in_flight = 0
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+        elif state == CLOSED:
+            self.outcomes.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Return the breaker's state and counters.
+
+        Returns
+        -------
+            A dictionary with the state and recent failure and slow rates
+
+        """
+        calls = len(self.outcomes)
+        return {
+            "state": self.state,
+            "calls": calls,
+            "failure_rate": (
+                sum(failed for failed, _ in self.outcomes) / calls if calls else 0.0
+            ),
+            "slow_rate": (
+                sum(is_slow for _, is_slow in self.outcomes) / calls if calls else 0.0
+            ),
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+BREAKERS: dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(agent_id: str) -> CircuitBreaker | None:
+    """Get the circuit breaker for an agent, creating it on first use.
+
+    Args:
+    ----
+        agent_id: The agent to get the breaker for
+
+    Returns:
+    -------
+        The agent's breaker, or None if circuit breaking is disabled
+
+    """
+    settings = CONFIG["circuit_breaker"]
+    if not settings["enabled"]:
+        return None
+    breaker = BREAKERS.get(agent_id)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            agent_id,
+            window=settings["window"],
+            min_calls=settings["min_calls"],
+            failure_rate=settings["failure_rate"],
+            slow_call_seconds=settings["slow_call_seconds"],
+            slow_call_rate=settings["slow_call_rate"],
+            open_seconds=settings["open_seconds"],
+            half_open_probes=settings["half_open_probes"],
+        )
+        BREAKERS[agent_id] = breaker
+    return breaker
+
+
+def fallback_for(agent_id: str) -> str | None:
+    """Get the agent to reroute to while an agent's circuit is open.
+
+    Args:
+    ----
+        agent_id: The agent whose circuit is open
+
+    Returns:
+    -------
+        The fallback agent id, or None if the agent is its own fallback
+
+    """
+    fallback = CONFIG["circuit_breaker"]["fallback"]
+    return None if fallback == agent_id else fallback
+
+
+register_stats(
+    "circuit_breakers", lambda: {name: b.stats() for name, b in BREAKERS.items()}
+)
@@ -3,4 +3,83 @@
 CONFIG = {
     "mcp_servers": ["math"],  # MCP servers to use
     "agents": ["weather", "math", "writing", "programming"],  # Agents to use
+    "hot_reload": {
+        "enabled": False,  # Watch agents/ and reload changed agents (WATCH_AGENTS=1)
+        "interval_seconds": 2.0,  # How often agents/ is checked for changes
+    },
+    "routing_cache": {
+        "max_size": 1024,  # Routing decisions kept in memory
+        "ttl_seconds": 600,  # How long a routing decision stays valid
+    },
+    "prerouter": {
+        "enabled": True,  # Try local routing before asking the router LLM
+        "threshold": 0.5,  # Minimum confidence to skip the router LLM
+    },
+    "speculation": {
+        "enabled": False,  # Start the predicted agent while routing is in flight
+        "agents": None,  # Agents allowed to run speculatively, None for all
+    },
+    "llm_calls": {
+        # Timeout, retry and hedging policy per LLM call, see llm/resilience.py
+        "default": {
+            "timeout": 60,  # Seconds per attempt
+            "deadline": 120,  # Seconds for the whole call, across attempts
+            "attempts": 3,
+            "backoff_base": 0.5,  # First retry waits up to this many seconds
+            "backoff_max": 8,
+            "hedge": False,
+            "hedge_after": None,  # Seconds before hedging, None for observed p95
+        },
+        "ollama": {"timeout": 30, "deadline": 60, "hedge": True},
+        "programming": {"timeout": 90, "deadline": 180},
+    },
+    "response_cache": {
+        "enabled": True,  # Reuse responses of agents registered with cache_ttl
+        "backend": "memory",  # "memory" for one worker, "redis" to share (REDIS_URL)
+        "max_size": 4096,  # Responses kept by the memory backend
+    },
+    "semantic_cache": {
+        "enabled": False,  # Answer paraphrases of earlier inputs from the cache
+        "dim": 512,  # Dimension of the hashed input embeddings
+        "max_size": 2048,  # Entries per agent before the oldest is overwritten
+        "ttl_seconds": 3600,  # Age after which an entry is ignored
+        "agents": {  # Agents that opt in, with their similarity thresholds
+            "programming": {"threshold": 0.85},
+            "writing": {"threshold": 0.9},
+        },
+    },
+    "thread_store": {
+        "backend": "memory",  # "memory" for one worker, "sqlite" to persist and share
+        "path": "data/threads.db",  # SQLite database file
+        "durability": "async",  # SQLite writes: "sync", "group" or "async"
+        "batch_size": 32,  # Messages committed together by the SQLite backend
+        "commit_interval": 1.0,  # Seconds a message may wait for its commit
+        "max_messages": 1_000_000,  # Messages held in memory across all threads
+        "max_bytes": 256 * 2**20,  # Approximate bytes held in memory
+        "max_thread_messages": 10_000,  # Messages kept per thread, oldest dropped
+        "idle_ttl_seconds": 24 * 60 * 60,  # Unused threads are evicted after this
+        "spill_dir": None,  # Directory evicted threads are written to, or dropped
+    },
+    "circuit_breaker": {
+        "enabled": True,  # Fail fast on agents whose provider is degraded
+        "fallback": "default",  # Agent to reroute to while a circuit is open
+        "window": 20,  # Recent calls considered per agent
+        "min_calls": 5,  # Calls needed in the window before a circuit can open
+        "failure_rate": 0.5,  # Fraction of failed calls that opens the circuit
+        "slow_call_seconds": 30,  # Calls at least this long count as slow
+        "slow_call_rate": 0.8,  # Fraction of slow calls that opens the circuit
+        "open_seconds": 30,  # Time before probing an open circuit
+        "half_open_probes": 1,  # Probe calls let through at once
+    },
+    "bulkhead": {
+        "retry_after_seconds": 1,  # Sent with 503 responses for overloaded agents
+    },
+    "batch": {
+        "max_size": 1000,  # Messages accepted per batch request
+        "max_concurrency": 8,  # Agents running at once within a batch
+    },
+    "websocket": {
+        "max_in_flight": 8,  # Concurrent chats per connection
+        "send_queue_size": 64,  # Events buffered for a slow client before waiting
+    },
 }
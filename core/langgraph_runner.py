@@ -2,18 +2,49 @@
 
 import json
 import logging
+import time
+from contextlib import nullcontext
 from typing import Any, TypedDict
 
 from langchain_core.outputs import LLMResult
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import END, StateGraph
 from pydantic import BaseModel, Field
 
-from core.registry import AGENT_REGISTRY
-from llm.ollama_client import OllamaClient
+from core.bulkhead import AgentOverloadedError
+from core.cache import TTLCache
+from core.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    fallback_for,
+    get_breaker,
+)
+from core.config import CONFIG
+from core.metrics import register_stats
+from core.prerouter import preroute
+from core.registry import AGENT_REGISTRY, get_agent_instance, registry_fingerprint
+from core.response_cache import agent_model, get_response_cache
+from core.semantic_cache import get_semantic_cache
+from core.speculation import (
+    Speculation,
+    can_speculate,
+    predict_agent,
+    record_route,
+    resolve,
+    speculate,
+)
+from llm.ollama_client import get_ollama_client
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Routing decisions keyed on normalized input and the registered agent set
+ROUTING_CACHE = TTLCache(
+    max_size=CONFIG["routing_cache"]["max_size"],
+    ttl_seconds=CONFIG["routing_cache"]["ttl_seconds"],
+)
+register_stats("routing_cache", ROUTING_CACHE.stats)
+
 
 class AgentResponseFormatter(BaseModel):
     """Formatter for agent routing responses.
@@ -32,12 +63,14 @@ class ChatStateDict(TypedDict):
         input_text: The user's input text
         agent_id: Optional ID of the agent to handle the request
         response: The agent's response text
+        speculation: Agent run started speculatively during routing, if any
 
     """
 
     input_text: str
     agent_id: str | None
     response: str
+    speculation: Speculation | None
 
 
 class ChatState:
@@ -65,87 +98,456 @@ class ChatState:
         self.response = ""
 
 
-async def entry_node(state: ChatStateDict) -> dict[str, str]:
+ROUTER_INSTRUCTIONS = """Route each request to the right agent.
+Only return the id value of the agent that best matches the request.
+Do not include any other text in your response."""
+
+_router_system_prompt: str | None = None
+_router_system_prompt_fingerprint: tuple | None = None
+
+
+def router_system_prompt() -> str:
+    """Get the fixed part of the routing prompt.
+
+    The instructions and agent descriptions only change with the registry, so
+    they are built once per registry version. Keeping them byte-identical
+    across requests lets Ollama reuse the processed prefix instead of
+    re-evaluating it for every routing call.
+
+    Returns
+    -------
+        The routing system prompt listing the available agents
+
+    """
+    global _router_system_prompt, _router_system_prompt_fingerprint
+    fingerprint = registry_fingerprint(AGENT_REGISTRY)
+    if (
+        _router_system_prompt is None
+        or fingerprint != _router_system_prompt_fingerprint
+    ):
+        agent_descriptions = "\n".join(
+            f"id: {agent_id}\ndescription: {description}"
+            for agent_id, description in fingerprint
+            if agent_id != "default"
+        )
+        _router_system_prompt = (
+            f"{ROUTER_INSTRUCTIONS}\n\nAvailable agents:\n{agent_descriptions}"
+        )
+        _router_system_prompt_fingerprint = fingerprint
+    return _router_system_prompt
+
+
+def router_prompt(text: str) -> str:
+    """Build the per-request part of the routing prompt.
+
+    Args:
+    ----
+        text: The user's input text
+
+    Returns:
+    -------
+        The short prompt suffix containing only the input
+
+    """
+    return f"Input: {text}"
+
+
+def normalize_input(text: str) -> str:
+    """Normalize input text so trivially different inputs share a cache key.
+
+    Args:
+    ----
+        text: The user's input text
+
+    Returns:
+    -------
+        The text lowercased with whitespace collapsed
+
+    """
+    return " ".join(text.lower().split())
+
+
+def routing_cache_key(text: str) -> tuple[str, tuple]:
+    """Build the routing cache key for an input.
+
+    Args:
+    ----
+        text: The user's input text
+
+    Returns:
+    -------
+        A key combining the normalized input and the registry fingerprint
+
+    """
+    return (normalize_input(text), registry_fingerprint())
+
+
+def _request_registry(config: RunnableConfig | None) -> dict[str, dict[str, Any]]:
+    """Return the agents a request started with, or the live registry.
+
+    Requests pin a copy of the registry in ``configurable["agent_registry"]``
+    when they start, so a reload in the middle of a request neither removes nor
+    replaces the agents it uses.
+    """
+    registry = (config or {}).get("configurable", {}).get("agent_registry")
+    return AGENT_REGISTRY if registry is None else registry
+
+
+async def entry_node(
+    state: ChatStateDict, config: RunnableConfig | None = None
+) -> dict[str, str]:
     """Route the input to the appropriate agent.
 
+    Routing decisions are cached, so repeated inputs skip the router LLM. Inputs
+    the local pre-router can classify confidently skip it as well. Streamed
+    requests are never speculated on: the speculative agent would run inside
+    this node, where its tokens are not streamed to the client.
+
     Args:
     ----
         state: The current chat state containing the input text
+        config: The run's config; its ``thread_id`` keys route predictions,
+            ``stream_tokens`` marks a streamed request and ``agent_registry``
+            holds the agents the request started with
 
     Returns:
     -------
         Dictionary containing the selected agent_id
 
     """
-    ollama = OllamaClient()
+    registry = _request_registry(config)
+    cache_key = routing_cache_key(state["input_text"])
+    agent_id = _route_locally(state["input_text"], cache_key, registry)
+    if agent_id is not None:
+        return {"agent_id": agent_id}
 
-    # Build agent descriptions string
-    agent_descriptions = "\n".join(
-        [
-            f"id: {agent_id}\ndescription: {data['description']}"
-            for agent_id, data in AGENT_REGISTRY.items()
-            if agent_id != "default"
-        ]
+    configurable = (config or {}).get("configurable", {})
+    thread_id = configurable.get("thread_id")
+    speculation = None
+    if CONFIG["speculation"]["enabled"] and not configurable.get("stream_tokens"):
+        predicted = predict_agent(state["input_text"], registry, thread_id)
+        if predicted is not None and can_speculate(predicted):
+            speculation = speculate(
+                predicted, run_agent(predicted, state["input_text"], registry)
+            )
+
+    try:
+        agent_id = await _route_with_llm(state["input_text"], cache_key, registry)
+    except BaseException:
+        if speculation is not None:
+            speculation.cancel()
+        raise
+
+    record_route(agent_id, thread_id)
+    if speculation is None:
+        return {"agent_id": agent_id}
+    return {"agent_id": agent_id, "speculation": resolve(speculation, agent_id)}
+
+
+def _route_locally(
+    input_text: str, cache_key: tuple, registry: dict[str, dict[str, Any]]
+) -> str | None:
+    """Route the input without the router LLM, if possible.
+
+    Args:
+    ----
+        input_text: The user's input text
+        cache_key: Routing cache key for the input
+        registry: The agents to route to
+
+    Returns:
+    -------
+        The agent id from the routing cache or the pre-router, or None if the
+        router LLM has to decide
+
+    """
+    cached_agent_id = ROUTING_CACHE.get(cache_key)
+    if cached_agent_id is not None and cached_agent_id in registry:
+        logger.info(f"Sending to agent (cached route): {cached_agent_id}")
+        return cached_agent_id
+
+    if CONFIG["prerouter"]["enabled"]:
+        match = preroute(input_text, registry)
+        if match is not None:
+            logger.info(
+                f"Sending to agent (pre-routed by {match.source}, "
+                f"confidence {match.confidence:.2f}): {match.agent_id}"
+            )
+            return match.agent_id
+    return None
+
+
+async def _route_with_llm(
+    input_text: str, cache_key: tuple, registry: dict[str, dict[str, Any]]
+) -> str:
+    """Ask the router LLM which agent should handle the input.
+
+    Args:
+    ----
+        input_text: The user's input text
+        cache_key: Routing cache key to store a successful decision under
+        registry: The agents to route to
+
+    Returns:
+    -------
+        The selected agent id, or "default" if routing failed
+
+    """
+    ollama = get_ollama_client()
+    response = await ollama.generate(
+        prompt=router_prompt(input_text),
+        format=AgentResponseFormatter,
+        system=router_system_prompt(),
     )
+    if not isinstance(response, LLMResult):
+        logger.warning("Response is not LLMResult, sending to default agent")
+        return "default"
+    return _parse_route(response.generations[0], cache_key, registry)
 
-    prompt = f"""Route this request to the right agent.
-Available agents:
-{agent_descriptions}
 
-Only return the id value of the agent that best matches the request.
-Do not include any other text in your response.
+def _parse_route(
+    generations: list, cache_key: tuple, registry: dict[str, dict[str, Any]]
+) -> str:
+    """Extract the agent id from the router LLM's generations for one input.
 
-Input: {state['input_text']}"""
+    Args:
+    ----
+        generations: The generations returned for the input's prompt
+        cache_key: Routing cache key to store a successful decision under
+        registry: The agents to route to
 
-    response = await ollama.generate(prompt=prompt, format=AgentResponseFormatter)
+    Returns:
+    -------
+        The selected agent id, or "default" if the call failed or the response
+        is unusable
 
+    """
+    if not generations:
+        logger.warning("Router call failed, sending to default agent")
+        return "default"
     try:
-        if not isinstance(response, LLMResult):
-            logger.warning("Response is not LLMResult, sending to default agent")
-            return {"agent_id": "default"}
-
         # Loop through generations to handle GenerationChunk responses
-        for generation in response.generations[0]:
+        for generation in generations:
             if hasattr(generation, "text"):
                 parsed_response = json.loads(generation.text)
                 agent_id = parsed_response["id"]
                 break
 
-        if agent_id not in AGENT_REGISTRY:
+        if agent_id not in registry:
             logger.warning(f"Unknown agent: {agent_id}, sending to default agent")
-            return {"agent_id": "default"}
+            return "default"
 
         logger.info(f"Sending to agent: {agent_id}")
-        return {"agent_id": agent_id}
+        ROUTING_CACHE.set(cache_key, agent_id)
+        return agent_id
 
     except Exception as e:
         logger.error(f"Exception during agent routing: {e}")
-        return {"agent_id": "default"}
+        return "default"
+
+
+async def route_batch(
+    texts: list[str], registry: dict[str, dict[str, Any]] | None = None
+) -> list[str]:
+    """Route many inputs at once.
+
+    Inputs answered by the routing cache or the pre-router never reach the
+    router LLM. The rest are deduplicated and routed with a single batched
+    call; an input whose router call fails is sent to the default agent
+    without affecting the others.
+
+    Args:
+    ----
+        texts: The user's input texts
+        registry: The agents to route to, defaults to AGENT_REGISTRY
+
+    Returns:
+    -------
+        The selected agent id for each input, in order
+
+    """
+    registry = AGENT_REGISTRY if registry is None else registry
+    agent_ids: list[str | None] = []
+    pending: dict[tuple, list[int]] = {}
+    for index, text in enumerate(texts):
+        cache_key = routing_cache_key(text)
+        agent_id = _route_locally(text, cache_key, registry)
+        agent_ids.append(agent_id)
+        if agent_id is None:
+            pending.setdefault(cache_key, []).append(index)
+
+    if pending:
+        cache_keys = list(pending)
+        response = await get_ollama_client().generate_batch(
+            prompts=[router_prompt(texts[pending[key][0]]) for key in cache_keys],
+            format=AgentResponseFormatter,
+            system=router_system_prompt(),
+        )
+        for cache_key, generations in zip(cache_keys, response.generations):
+            agent_id = _parse_route(generations, cache_key, registry)
+            for index in pending[cache_key]:
+                agent_ids[index] = agent_id
+    return agent_ids
+
+
+async def run_agent(
+    agent_id: str, input_text: str, registry: dict[str, dict[str, Any]] | None = None
+) -> str:
+    """Run an agent on the input.
+
+    Agents that opt into response caching are answered from the cache when the
+    same input was seen before, and agents that opt into the semantic cache
+    when a similar enough input was seen before. Agents may define
+    ``cacheable(response) -> bool`` to keep responses such as error messages out
+    of both caches. Each call's outcome feeds the
+    agent's circuit breaker; while the circuit is open the input is rerouted to
+    the fallback agent without calling the agent at all.
 
+    Args:
+    ----
+        agent_id: The agent to run
+        input_text: The user's input text
+        registry: The agents the request started with, defaults to
+            AGENT_REGISTRY
+
+    Returns:
+    -------
+        The agent's response as a string
 
-async def agent_node(state: ChatStateDict) -> dict[str, str]:
+    Raises:
+    ------
+        AgentOverloadedError: If the agent's bulkhead rejected the request
+        CircuitOpenError: If the agent's circuit is open and there is no
+            fallback agent to reroute to
+
+    """
+    registry = AGENT_REGISTRY if registry is None else registry
+    agent_data = registry[agent_id]
+    context: dict[str, Any] = {}
+    cache_ttl = agent_data.get("cache_ttl")
+    cache = get_response_cache() if cache_ttl is not None else None
+    if cache is not None:
+        cache_key = cache.key(
+            agent_id,
+            agent_model(get_agent_instance(agent_id, registry)),
+            normalize_input(input_text),
+            context,
+        )
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Answered from the response cache: {agent_id}")
+            return cached
+
+    semantic_cache = get_semantic_cache(agent_id)
+    if semantic_cache is not None:
+        cached = semantic_cache.lookup(input_text)
+        if cached is not None:
+            logger.info(f"Answered from the semantic cache: {agent_id}")
+            return cached
+
+    breaker = get_breaker(agent_id)
+    if breaker is not None and not breaker.allow():
+        fallback = fallback_for(agent_id)
+        if fallback is None or fallback not in registry:
+            raise CircuitOpenError(agent_id)
+        logger.warning(f"Circuit for {agent_id} is open, rerouting to {fallback}")
+        return await run_agent(fallback, input_text, registry)
+
+    response = await _call_agent(agent_id, input_text, context, breaker, registry)
+    if (cache is not None or semantic_cache is not None) and _cacheable(
+        agent_id, registry, response
+    ):
+        if cache is not None:
+            await cache.set(cache_key, response, cache_ttl)
+        if semantic_cache is not None:
+            semantic_cache.add(input_text, response)
+    return response
+
+
+def _cacheable(
+    agent_id: str, registry: dict[str, dict[str, Any]], response: str
+) -> bool:
+    """Check whether an agent allows its response to be cached."""
+    cacheable = getattr(get_agent_instance(agent_id, registry), "cacheable", None)
+    return cacheable is None or cacheable(response)
+
+
+async def _call_agent(
+    agent_id: str,
+    input_text: str,
+    context: dict[str, Any],
+    breaker: CircuitBreaker | None,
+    registry: dict[str, dict[str, Any]],
+) -> str:
+    """Call an agent inside its bulkhead, recording the outcome in its breaker.
+
+    Agents registered with a concurrency limit run inside their bulkhead.
+    """
+    agent_data = registry[agent_id]
+    started: float | None = None
+    try:
+        async with agent_data.get("bulkhead") or nullcontext():
+            started = time.monotonic()
+            instance = get_agent_instance(agent_id, registry)
+            response = await instance.run(input_text, context)
+    except Exception:
+        if breaker is not None:
+            if started is None:
+                # Rejected by the bulkhead, the agent itself was not called
+                breaker.release()
+            else:
+                breaker.record(False, time.monotonic() - started)
+        raise
+    except BaseException:
+        if breaker is not None:
+            breaker.release()
+        raise
+    if breaker is not None:
+        breaker.record(True, time.monotonic() - started)
+    # Ensure response is a string
+    if not isinstance(response, str):
+        response = str(response)
+    return response
+
+
+async def agent_node(
+    state: ChatStateDict, config: RunnableConfig | None = None
+) -> dict[str, str]:
     """Process the input using the selected agent.
 
+    If the agent was already started speculatively during routing, its
+    in-flight result is used instead of starting it again.
+
     Args:
     ----
         state: The current chat state containing the input text and agent_id
+        config: The run's config; its ``agent_registry`` holds the agents the
+            request started with
 
     Returns:
     -------
         Dictionary containing the agent's response
 
+    Raises:
+    ------
+        AgentOverloadedError: If the agent is at capacity, so callers can
+            reject the request instead of returning an error as a response
+
     """
     agent_id = state["agent_id"]
     if agent_id is None:
         agent_id = "default"
-    agent_data = AGENT_REGISTRY[agent_id]
-    agent = agent_data["instance"]
+    speculation = state.get("speculation")
     try:
-        response = await agent.run(state["input_text"], {})
-        # Ensure response is a string
-        if not isinstance(response, str):
-            response = str(response)
+        if speculation is not None and speculation.agent_id == agent_id:
+            response = await speculation.result()
+        else:
+            response = await run_agent(
+                agent_id, state["input_text"], _request_registry(config)
+            )
         return {"response": response}
+    except AgentOverloadedError:
+        raise
     except Exception as e:
         logger.error(f"Error in agent {agent_id}: {e}")
         return {"response": f"Error: {str(e)}"}
@@ -0,0 +1,215 @@
+"""Agent manifest module for discovering agents without importing them.
+
+Agent modules pull in provider packages such as ``langchain_openai`` when they
+are imported, which is slow. The manifest lists what the router and the graph
+need to know about each agent (its id, description and decorator options) by
+parsing the modules' source instead of running it, so an agent module is only
+imported when the agent is first used.
+
+The manifest is cached in ``agents/.manifest.json``. A module is parsed again
+only when its modification time or size changed and its content hash no longer
+matches.
+
+A module whose agents cannot be described statically, for example because a
+description is computed at import time, is marked as not static and imported
+at load time as before.
+"""
+
+import ast
+import hashlib
+import json
+import logging
+import operator
+import os
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+AGENTS_DIR = Path(__file__).resolve().parent.parent / "agents"
+MANIFEST_PATH = AGENTS_DIR / ".manifest.json"
+
+# Decorator options recorded in the manifest
+_OPTIONS = ("max_concurrency", "max_queue", "cache_ttl")
+
+_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Pow: operator.pow,
+    ast.USub: operator.neg,
+}
+
+
+class NotStaticError(Exception):
+    """Raised when an agent cannot be described without importing it."""
+
+
+def _literal(node: ast.expr) -> Any:
+    """Evaluate a literal, allowing arithmetic such as ``24 * 60 * 60``."""
+    if isinstance(node, ast.BinOp) and type(node.op) in _OPERATORS:
+        return _OPERATORS[type(node.op)](_literal(node.left), _literal(node.right))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _OPERATORS:
+        return _OPERATORS[type(node.op)](_literal(node.operand))
+    try:
+        return ast.literal_eval(node)
+    except ValueError as e:
+        raise NotStaticError(f"not a literal: {ast.unparse(node)}") from e
+
+
+def _agent_decorator(decorator: ast.expr) -> ast.Call | None:
+    """Return the ``@agent(...)`` call among a class's decorators, if it is one."""
+    if not isinstance(decorator, ast.Call):
+        return None
+    func = decorator.func
+    name = func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", None)
+    return decorator if name == "agent" else None
+
+
+def _class_attribute(cls: ast.ClassDef, name: str) -> ast.expr | None:
+    """Return the value assigned to a class-level attribute."""
+    for statement in cls.body:
+        if isinstance(statement, ast.Assign):
+            targets = statement.targets
+        elif isinstance(statement, ast.AnnAssign) and statement.value is not None:
+            targets = [statement.target]
+        else:
+            continue
+        if any(isinstance(t, ast.Name) and t.id == name for t in targets):
+            return statement.value
+    return None
+
+
+def scan_module(source: str) -> list[dict[str, Any]]:
+    """Describe the agents registered by a module from its source.
+
+    Args:
+    ----
+        source: The module's source code
+
+    Returns:
+    -------
+        One dictionary per ``@agent`` class, with its id, class name,
+        description and capabilities
+
+    Raises:
+    ------
+        NotStaticError: If an agent's id, description or options are not
+            literals
+
+    """
+    agents = []
+    for node in ast.parse(source).body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        for decorator in node.decorator_list:
+            call = _agent_decorator(decorator)
+            if call is None:
+                continue
+            if not call.args:
+                raise NotStaticError(f"{node.name}: agent id is not a literal")
+            description = _class_attribute(node, "description")
+            if description is None:
+                raise NotStaticError(f"{node.name}: no literal description")
+            options = dict(zip(_OPTIONS[: len(call.args) - 1], call.args[1:]))
+            options.update({kw.arg: kw.value for kw in call.keywords if kw.arg})
+            capabilities = {
+                option: _literal(options[option]) if option in options else None
+                for option in _OPTIONS
+            }
+            capabilities["matcher"] = any(
+                isinstance(item, ast.FunctionDef | ast.AsyncFunctionDef)
+                and item.name == "match"
+                for item in node.body
+            )
+            agents.append(
+                {
+                    "id": _literal(call.args[0]),
+                    "class": node.name,
+                    "description": _literal(description),
+                    "capabilities": capabilities,
+                }
+            )
+    return agents
+
+
+def _read_cache(path: Path) -> dict[str, Any]:
+    try:
+        cache = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    if cache.get("version") != MANIFEST_VERSION:
+        return {}
+    return cache.get("modules", {})
+
+
+def load_manifest(
+    agents_dir: Path = AGENTS_DIR, cache_path: Path | None = MANIFEST_PATH
+) -> dict[str, dict[str, Any]]:
+    """Build the manifest of the agent modules, reusing the cached entries.
+
+    Args:
+    ----
+        agents_dir: Directory of the agent modules
+        cache_path: Where the manifest is cached, None to not cache it
+
+    Returns:
+    -------
+        Entries by module file name, each with the module's ``path``,
+        ``mtime_ns``, ``size``, ``sha256``, whether it is ``static`` and the
+        ``agents`` it registers
+
+    """
+    cached = _read_cache(cache_path) if cache_path is not None else {}
+    modules: dict[str, dict[str, Any]] = {}
+    changed = False
+    for filename in sorted(os.listdir(agents_dir)):
+        if not filename.endswith(".py") or filename.startswith("__"):
+            continue
+        path = Path(agents_dir) / filename
+        stat = path.stat()
+        entry = cached.get(filename)
+        if (
+            entry is not None
+            and entry["mtime_ns"] == stat.st_mtime_ns
+            and entry["size"] == stat.st_size
+        ):
+            modules[filename] = {**entry, "path": str(path)}
+            continue
+        source = path.read_bytes()
+        digest = hashlib.sha256(source).hexdigest()
+        changed = True
+        if entry is not None and entry["sha256"] == digest:
+            entry = {**entry, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+        else:
+            entry = {
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "sha256": digest,
+                "static": True,
+                "agents": [],
+            }
+            try:
+                entry["agents"] = scan_module(source.decode())
+            except (NotStaticError, SyntaxError) as e:
+                logger.info(f"Agent module {filename} will be imported: {e}")
+                entry["static"] = False
+        modules[filename] = {**entry, "path": str(path)}
+
+    if cache_path is not None and (changed or set(cached) != set(modules)):
+        payload = {
+            "version": MANIFEST_VERSION,
+            "modules": {
+                filename: {k: v for k, v in entry.items() if k != "path"}
+                for filename, entry in modules.items()
+            },
+        }
+        try:
+            cache_path.write_text(json.dumps(payload, indent=2))
+        except OSError as e:
+            logger.warning(f"Could not write the agent manifest: {e}")
+    return modules
@@ -0,0 +1,44 @@
+"""Metrics module for collecting runtime statistics.
+
+Components register a stats provider under a name; the API exposes the
+collected values so cache hit rates, queue depths and similar counters can be
+inspected without attaching a debugger.
+"""
+
+import logging
+from collections.abc import Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+STATS_PROVIDERS: dict[str, Callable[[], dict[str, Any]]] = {}
+
+
+def register_stats(name: str, provider: Callable[[], dict[str, Any]]) -> None:
+    """Register a stats provider.
+
+    Args:
+    ----
+        name: The name the stats are reported under
+        provider: A callable returning a dictionary of stats
+
+    """
+    STATS_PROVIDERS[name] = provider
+
+
+def collect_stats() -> dict[str, dict[str, Any]]:
+    """Collect the stats from every registered provider.
+
+    Returns
+    -------
+        A dictionary mapping provider names to their stats
+
+    """
+    collected = {}
+    for name, provider in STATS_PROVIDERS.items():
+        try:
+            collected[name] = provider()
+        except Exception as e:
+            logger.error(f"Error collecting stats for {name}: {e}")
+            collected[name] = {"error": str(e)}
+    return collected
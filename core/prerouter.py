@@ -0,0 +1,248 @@
+"""Pre-router module for cheap, local agent routing.
+
+Before asking the router LLM, inputs are scored locally against each agent:
+
+- Agents may declare a ``match(input_text) -> float`` static method that
+  recognizes inputs they can certainly handle (e.g. pure arithmetic).
+- Otherwise the input is compared with each agent's ``description`` using
+  TF-IDF cosine similarity.
+
+Only a match at or above the configured confidence threshold is used; anything
+else falls back to the router LLM.
+"""
+
+import logging
+import math
+import re
+from collections import Counter
+from collections.abc import Iterable
+from typing import Any, NamedTuple
+
+from core.config import CONFIG
+from core.metrics import register_stats
+from core.registry import AGENT_REGISTRY, registry_fingerprint
+
+logger = logging.getLogger(__name__)
+
+PREROUTER_STATS: Counter[str] = Counter(matcher=0, lexical=0, fallback=0)
+register_stats("prerouter", lambda: dict(PREROUTER_STATS))
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = frozenset(
+    """a about an and are as at be by can could do does for from how i in is it
+    me my of on or please s that the this to using what when where which who why
+    will with would you your""".split()
+)
+
+
+class RouteMatch(NamedTuple):
+    """A pre-routing decision.
+
+    Attributes
+    ----------
+        agent_id: The agent the input should be routed to
+        confidence: Confidence score between 0 and 1
+        source: Which stage produced the match ("matcher" or "lexical")
+
+    """
+
+    agent_id: str
+    confidence: float
+    source: str
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase content tokens.
+
+    Args:
+    ----
+        text: The text to tokenize
+
+    Returns:
+    -------
+        The alphanumeric tokens of the text, without stop words and with simple
+        plurals reduced to their singular form
+
+    """
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        if token in STOP_WORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class LexicalIndex:
+    """TF-IDF index over agent descriptions."""
+
+    def __init__(self, documents: dict[str, str]) -> None:
+        """Build the index.
+
+        Args:
+        ----
+            documents: Mapping of agent id to description
+
+        """
+        doc_tokens = {agent_id: tokenize(text) for agent_id, text in documents.items()}
+        n_docs = len(doc_tokens)
+        doc_freq: Counter[str] = Counter()
+        for tokens in doc_tokens.values():
+            doc_freq.update(set(tokens))
+        self.idf = {
+            token: math.log((1 + n_docs) / (1 + df)) + 1
+            for token, df in doc_freq.items()
+        }
+        # Unknown query tokens get the weight of a term seen in no document
+        self.unknown_idf = math.log(1 + n_docs) + 1
+        self.vectors = {
+            agent_id: self._normalize(self._weigh(tokens))
+            for agent_id, tokens in doc_tokens.items()
+        }
+
+    def _weigh(self, tokens: Iterable[str]) -> dict[str, float]:
+        """Return the TF-IDF weights of the tokens."""
+        return {
+            token: count * self.idf.get(token, self.unknown_idf)
+            for token, count in Counter(tokens).items()
+        }
+
+    @staticmethod
+    def _normalize(vector: dict[str, float]) -> dict[str, float]:
+        """Scale a vector to unit length."""
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        return {t: w / norm for t, w in vector.items()} if norm else {}
+
+    def scores(self, text: str) -> dict[str, float]:
+        """Score the text against every document.
+
+        Args:
+        ----
+            text: The input text
+
+        Returns:
+        -------
+            Mapping of agent id to cosine similarity
+
+        """
+        query = self._normalize(self._weigh(tokenize(text)))
+        return {
+            agent_id: sum(w * vector.get(t, 0.0) for t, w in query.items())
+            for agent_id, vector in self.vectors.items()
+        }
+
+
+_index: LexicalIndex | None = None
+_index_fingerprint: tuple | None = None
+
+
+def _get_index(registry: dict[str, dict[str, Any]]) -> LexicalIndex:
+    """Get the lexical index for the registry, rebuilding it on change."""
+    global _index, _index_fingerprint
+    fingerprint = registry_fingerprint(registry)
+    if _index is None or fingerprint != _index_fingerprint:
+        _index = LexicalIndex(
+            {agent_id: description for agent_id, description in fingerprint}
+        )
+        _index_fingerprint = fingerprint
+    return _index
+
+
+def _candidates(registry: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """Return the registry entries eligible for pre-routing."""
+    return {k: v for k, v in registry.items() if k != "default"}
+
+
+def _best_matcher(
+    text: str, candidates: dict[str, dict[str, Any]]
+) -> RouteMatch | None:
+    """Return the most confident agent matcher result, if any agent has one."""
+    best: RouteMatch | None = None
+    for agent_id, data in candidates.items():
+        matcher = data.get("matcher")
+        if matcher is None:
+            continue
+        try:
+            confidence = float(matcher(text))
+        except Exception as e:
+            logger.warning(f"Matcher for agent {agent_id} failed: {e}")
+            continue
+        if best is None or confidence > best.confidence:
+            best = RouteMatch(agent_id, confidence, "matcher")
+    return best
+
+
+def _best_lexical(
+    text: str, candidates: dict[str, dict[str, Any]]
+) -> RouteMatch | None:
+    """Return the closest description match, or None if there is no clear one."""
+    scores = _get_index(candidates).scores(text)
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    if not ranked or ranked[0][1] <= 0:
+        return None
+    agent_id, confidence = ranked[0]
+    # A tie means the input is ambiguous between agents
+    if len(ranked) > 1 and ranked[1][1] == confidence:
+        return None
+    return RouteMatch(agent_id, confidence, "lexical")
+
+
+def preroute(
+    text: str,
+    registry: dict[str, dict[str, Any]] | None = None,
+    threshold: float | None = None,
+) -> RouteMatch | None:
+    """Try to route the input without calling the router LLM.
+
+    Args:
+    ----
+        text: The user's input text
+        registry: The agent registry, defaults to AGENT_REGISTRY
+        threshold: Minimum confidence, defaults to the configured threshold
+
+    Returns:
+    -------
+        A RouteMatch if an agent matched with enough confidence, otherwise None
+
+    """
+    registry = AGENT_REGISTRY if registry is None else registry
+    threshold = CONFIG["prerouter"]["threshold"] if threshold is None else threshold
+    candidates = _candidates(registry)
+
+    for source, find in (("matcher", _best_matcher), ("lexical", _best_lexical)):
+        match = find(text, candidates)
+        if match is not None and match.confidence >= threshold:
+            PREROUTER_STATS[source] += 1
+            return match
+    PREROUTER_STATS["fallback"] += 1
+    return None
+
+
+def best_guess(
+    text: str, registry: dict[str, dict[str, Any]] | None = None
+) -> RouteMatch | None:
+    """Return the most likely agent for the input, however low the confidence.
+
+    Unlike ``preroute`` this never applies a threshold, which makes it suitable
+    as a cheap predictor where a wrong guess is acceptable.
+
+    Args:
+    ----
+        text: The user's input text
+        registry: The agent registry, defaults to AGENT_REGISTRY
+
+    Returns:
+    -------
+        The best RouteMatch with a positive confidence, or None
+
+    """
+    registry = AGENT_REGISTRY if registry is None else registry
+    candidates = _candidates(registry)
+    matches = [
+        match
+        for match in (_best_matcher(text, candidates), _best_lexical(text, candidates))
+        if match is not None and match.confidence > 0
+    ]
+    return max(matches, key=lambda match: match.confidence, default=None)
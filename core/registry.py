@@ -2,29 +2,165 @@
 
 This module provides a decorator-based registration system for agents, allowing
 them to be discovered and instantiated dynamically throughout the application.
+Registering an agent records its class; the instance, and any model client it
+creates, is only built when the agent is first used.
 """
 
-from collections.abc import Callable
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
 from typing import Any, Protocol, TypeVar
 
+from core.bulkhead import Bulkhead
+from core.config import CONFIG
+from core.metrics import register_stats
+
 
 class AgentProtocol(Protocol):
-    """Protocol defining the required interface for agent classes."""
+    """Protocol defining the required interface for agent classes.
+
+    Agents may also define an optional static ``match(input_text) -> float``
+    method returning a confidence between 0 and 1 that they can handle the
+    input. The pre-router uses it to skip the router LLM for obvious inputs.
+    """
 
     description: str
 
 
 T = TypeVar("T", bound=AgentProtocol)
 
-AGENT_REGISTRY: dict[str, dict[str, Any]] = {}
 
+class AgentRegistry(dict):
+    """Dictionary of registered agents that tracks a mutation version.
+
+    The version is bumped whenever an agent entry is added, replaced or
+    removed, which lets the registry fingerprint be memoized. Entries should be
+    replaced rather than mutated in place for changes to be noticed.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Initialize the registry."""
+        super().__init__(*args, **kwargs)
+        self.version = 0
+        self._fingerprint: tuple[int, tuple] | None = None
+
+    def _bump(self) -> None:
+        self.version += 1
+
+    def __setitem__(self, key: str, value: dict[str, Any]) -> None:
+        """Add or replace an agent entry."""
+        super().__setitem__(key, value)
+        self._bump()
+
+    def __delitem__(self, key: str) -> None:
+        """Remove an agent entry."""
+        super().__delitem__(key)
+        self._bump()
+
+    def pop(self, *args: Any) -> Any:
+        """Remove an agent entry and return it."""
+        value = super().pop(*args)
+        self._bump()
+        return value
+
+    def popitem(self) -> tuple[str, dict[str, Any]]:
+        """Remove and return the last added agent entry."""
+        item = super().popitem()
+        self._bump()
+        return item
+
+    def clear(self) -> None:
+        """Remove all agent entries."""
+        super().clear()
+        self._bump()
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        """Add or replace several agent entries."""
+        super().update(*args, **kwargs)
+        self._bump()
+
+    def replace(self, entries: dict[str, dict[str, Any]]) -> None:
+        """Replace all agent entries at once, bumping the version once."""
+        super().clear()
+        super().update(entries)
+        self._bump()
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        """Add an agent entry if it is missing."""
+        value = super().setdefault(key, default)
+        self._bump()
+        return value
+
+
+AGENT_REGISTRY: AgentRegistry = AgentRegistry()
+
+
+def _compute_fingerprint(
+    registry: dict[str, dict[str, Any]],
+) -> tuple[tuple[str, str], ...]:
+    return tuple(
+        sorted(
+            (agent_id, str(data.get("description", "")))
+            for agent_id, data in registry.items()
+        )
+    )
 
-def agent(name: str) -> Callable[[type[T]], type[T]]:
+
+def registry_fingerprint(
+    registry: dict[str, dict[str, Any]] | None = None,
+) -> tuple[tuple[str, str], ...]:
+    """Return a hashable snapshot of the registered agent ids and descriptions.
+
+    Anything derived from the registry (compiled graphs, routing prompts, routing
+    caches) can compare fingerprints to decide whether it needs rebuilding.
+
+    Args:
+    ----
+        registry: The registry to fingerprint, defaults to AGENT_REGISTRY
+
+    Returns:
+    -------
+        A sorted tuple of ``(agent_id, description)`` pairs
+
+    """
+    registry = AGENT_REGISTRY if registry is None else registry
+    if not isinstance(registry, AgentRegistry):
+        return _compute_fingerprint(registry)
+    cached = registry._fingerprint
+    if cached is None or cached[0] != registry.version:
+        cached = (registry.version, _compute_fingerprint(registry))
+        registry._fingerprint = cached
+    return cached[1]
+
+
+def _bulkhead_stats() -> dict[str, Any]:
+    """Return the stats of every agent that has a bulkhead."""
+    return {
+        agent_id: data["bulkhead"].stats()
+        for agent_id, data in AGENT_REGISTRY.items()
+        if data.get("bulkhead") is not None
+    }
+
+
+register_stats("bulkheads", _bulkhead_stats)
+
+
+def agent(
+    name: str,
+    max_concurrency: int | None = None,
+    max_queue: int = 0,
+    cache_ttl: float | None = None,
+) -> Callable[[type[T]], type[T]]:
     """Register an agent class with the global registry.
 
     Args:
     ----
         name: The unique identifier for the agent in the registry
+        max_concurrency: Optional limit on how many requests the agent runs at
+            once; unlimited if None
+        max_queue: How many requests may wait for a free slot before new ones
+            are rejected, when max_concurrency is set
+        cache_ttl: Optional number of seconds the agent's responses may be
+            reused for repeated inputs; responses are not cached if None
 
     Returns:
     -------
@@ -32,7 +168,8 @@ def agent(name: str) -> Callable[[type[T]], type[T]]:
 
     Raises:
     ------
-        ValueError: If the agent class is missing a description attribute
+        ValueError: If the agent class is missing a description attribute or
+            the concurrency limits are out of range
 
     """
 
@@ -41,7 +178,129 @@ def agent(name: str) -> Callable[[type[T]], type[T]]:
             raise ValueError(
                 f"Agent class {cls.__name__} must have a 'description' class variable"
             )
-        AGENT_REGISTRY[name] = {"instance": cls(), "description": cls.description}
+        register_agent(
+            name,
+            factory=cls,
+            description=cls.description,
+            matcher=getattr(cls, "match", None),
+            max_concurrency=max_concurrency,
+            max_queue=max_queue,
+            cache_ttl=cache_ttl,
+            registry=_captured_registrations,
+        )
         return cls
 
     return decorator
+
+
+def register_agent(
+    name: str,
+    factory: Callable[[], AgentProtocol],
+    description: str,
+    matcher: Callable[[str], float] | None = None,
+    max_concurrency: int | None = None,
+    max_queue: int = 0,
+    cache_ttl: float | None = None,
+    registry: dict[str, dict[str, Any]] | None = None,
+) -> None:
+    """Add an agent entry to the registry.
+
+    Used by the ``agent`` decorator, and by the agent loader to register agents
+    from the manifest before their modules are imported.
+
+    Args:
+    ----
+        name: The unique identifier for the agent in the registry
+        factory: Function building the agent instance on first use
+        description: The agent's description, shown to the router
+        matcher: Optional function scoring how well the agent fits an input
+        max_concurrency: Optional limit on how many requests the agent runs at
+            once; unlimited if None
+        max_queue: How many requests may wait for a free slot before new ones
+            are rejected, when max_concurrency is set
+        cache_ttl: Optional number of seconds the agent's responses may be
+            reused for repeated inputs; responses are not cached if None
+        registry: The registry to add the entry to, defaults to AGENT_REGISTRY
+
+    """
+    registry = AGENT_REGISTRY if registry is None else registry
+    registry[name] = {
+        "factory": factory,
+        "instance": None,
+        "description": description,
+        "matcher": matcher,
+        "bulkhead": (
+            Bulkhead(name, max_concurrency, max_queue)
+            if max_concurrency is not None
+            else None
+        ),
+        "cache_ttl": cache_ttl,
+    }
+
+
+_captured_registrations: dict[str, dict[str, Any]] | None = None
+
+
+@contextmanager
+def capture_registrations() -> Iterator[dict[str, dict[str, Any]]]:
+    """Collect the ``@agent`` registrations of imported modules separately.
+
+    Registrations made inside the block go to the yielded dictionary instead
+    of AGENT_REGISTRY. Used to import an agent module without replacing the
+    registry entry it already has, or to stage entries that are then swapped
+    into the registry at once.
+    """
+    global _captured_registrations
+    previous = _captured_registrations
+    _captured_registrations = captured = {}
+    try:
+        yield captured
+    finally:
+        _captured_registrations = previous
+
+
+def get_agent_instance(
+    agent_id: str, registry: dict[str, dict[str, Any]] | None = None
+) -> AgentProtocol:
+    """Get an agent's instance, building it on first use.
+
+    Args:
+    ----
+        agent_id: The ID of a registered agent
+        registry: The registry to look the agent up in, defaults to
+            AGENT_REGISTRY
+
+    Returns:
+    -------
+        The agent instance
+
+    Raises:
+    ------
+        KeyError: If the agent is not registered
+
+    """
+    registry = AGENT_REGISTRY if registry is None else registry
+    agent_data = registry[agent_id]
+    instance = agent_data.get("instance")
+    if instance is None:
+        instance = agent_data["factory"]()
+        agent_data["instance"] = instance
+    return instance
+
+
+def is_agent_enabled(agent_id: str) -> bool:
+    """Check whether an agent is allowed by ``CONFIG["agents"]``.
+
+    The default agent is always enabled, since it is the routing fallback.
+
+    Args:
+    ----
+        agent_id: The agent to check
+
+    Returns:
+    -------
+        True if the agent is listed, or if no allowlist is configured
+
+    """
+    allowed = CONFIG["agents"]
+    return allowed is None or agent_id == "default" or agent_id in allowed
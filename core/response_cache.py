@@ -0,0 +1,300 @@
+"""Response cache module for reusing agent responses to repeated inputs.
+
+Agents opt in with ``@agent(name, cache_ttl=...)``. Their responses are cached
+under a key built from the agent id, the agent's model, the normalized input
+and the context the agent ran with, so a repeated request is answered without
+calling the agent again.
+
+Two backends are available, selected with ``CONFIG["response_cache"]``:
+
+- ``memory``: an in-process LRU cache, for a single worker
+- ``redis``: a Redis server shared by all workers, configured with
+  ``REDIS_URL``
+
+Cache failures are logged and treated as misses, so an unavailable Redis
+server slows requests down but never fails them.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+from collections import Counter
+from typing import Any, Protocol
+
+from core.cache import TTLCache
+from core.config import CONFIG
+from core.metrics import register_stats
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - redis is optional
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCacheBackend(Protocol):
+    """Storage used by the response cache."""
+
+    name: str
+
+    async def get(self, key: str) -> str | None:
+        """Return the cached response for a key, or None."""
+
+    async def set(self, key: str, value: str, ttl_seconds: float | None) -> None:
+        """Store a response for a key."""
+
+    async def aclose(self) -> None:
+        """Release any connections held by the backend."""
+
+
+class MemoryResponseBackend:
+    """In-process LRU backend for a single worker."""
+
+    name = "memory"
+
+    def __init__(self, max_size: int = 1024) -> None:
+        """Initialize the backend.
+
+        Args:
+        ----
+            max_size: Maximum number of responses kept
+
+        """
+        self.cache = TTLCache(max_size=max_size)
+
+    async def get(self, key: str) -> str | None:
+        """Return the cached response for a key, or None."""
+        return self.cache.get(key)
+
+    async def set(self, key: str, value: str, ttl_seconds: float | None) -> None:
+        """Store a response for a key."""
+        self.cache.set(key, value, ttl_seconds=ttl_seconds)
+
+    async def aclose(self) -> None:
+        """Nothing to release for the in-process backend."""
+
+
+class RedisResponseBackend:
+    """Redis backend shared by all workers.
+
+    Attributes
+    ----------
+        client: The asyncio Redis client
+        prefix: Prefix added to every key
+
+    """
+
+    name = "redis"
+
+    def __init__(
+        self,
+        client: Any = None,
+        url: str | None = None,
+        prefix: str = "christopher:response:",
+        socket_timeout: float = 1.0,
+    ) -> None:
+        """Initialize the backend.
+
+        Args:
+        ----
+            client: An asyncio Redis client, created from ``url`` if None
+            url: The Redis URL, used when no client is given
+            prefix: Prefix added to every key
+            socket_timeout: Seconds to wait for Redis before giving up
+
+        Raises:
+        ------
+            RuntimeError: If no client is given and redis is not installed
+
+        """
+        if client is None:
+            if aioredis is None:
+                raise RuntimeError(
+                    "The redis package is required for the redis backend"
+                )
+            client = aioredis.from_url(
+                url or "redis://localhost:6379/0",
+                decode_responses=True,
+                socket_timeout=socket_timeout,
+                socket_connect_timeout=socket_timeout,
+            )
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> str | None:
+        """Return the cached response for a key, or None."""
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, value: str, ttl_seconds: float | None) -> None:
+        """Store a response for a key."""
+        ex = math.ceil(ttl_seconds) if ttl_seconds is not None else None
+        await self.client.set(self.prefix + key, value, ex=ex)
+
+    async def aclose(self) -> None:
+        """Close the Redis connections."""
+        await self.client.aclose()
+
+
+class ResponseCache:
+    """Cache of agent responses in front of a storage backend.
+
+    Attributes
+    ----------
+        backend: The storage backend
+        stats_counter: Hit, miss and error counters
+
+    """
+
+    def __init__(self, backend: ResponseCacheBackend) -> None:
+        """Initialize the cache.
+
+        Args:
+        ----
+            backend: The storage backend
+
+        """
+        self.backend = backend
+        self.stats_counter: Counter[str] = Counter(hits=0, misses=0, errors=0)
+
+    @staticmethod
+    def key(
+        agent_id: str, model: str | None, normalized_input: str, context: dict[str, Any]
+    ) -> str:
+        """Build the cache key for an agent call.
+
+        Args:
+        ----
+            agent_id: The agent being called
+            model: The model the agent uses, if any
+            normalized_input: The user's input, normalized so trivially
+                different inputs share a key
+            context: The context passed to the agent
+
+        Returns:
+        -------
+            A hex digest identifying the call
+
+        """
+        payload = json.dumps(
+            [agent_id, model, normalized_input, context],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def get(self, key: str) -> str | None:
+        """Look up a cached response, treating backend errors as misses.
+
+        Args:
+        ----
+            key: The cache key
+
+        Returns:
+        -------
+            The cached response, or None
+
+        """
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Response cache lookup failed: {e}")
+            self.stats_counter["errors"] += 1
+            value = None
+        self.stats_counter["hits" if value is not None else "misses"] += 1
+        return value
+
+    async def set(self, key: str, value: str, ttl_seconds: float | None) -> None:
+        """Store a response, logging backend errors.
+
+        Args:
+        ----
+            key: The cache key
+            value: The agent's response
+            ttl_seconds: How long the response stays valid, None for no expiry
+
+        """
+        try:
+            await self.backend.set(key, value, ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Response cache store failed: {e}")
+            self.stats_counter["errors"] += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Return the cache counters.
+
+        Returns
+        -------
+            A dictionary with the backend name and hit/miss/error counters
+
+        """
+        lookups = self.stats_counter["hits"] + self.stats_counter["misses"]
+        return {
+            "backend": self.backend.name,
+            **self.stats_counter,
+            "hit_rate": self.stats_counter["hits"] / lookups if lookups else 0.0,
+        }
+
+
+_response_cache: ResponseCache | None = None
+
+
+def get_response_cache() -> ResponseCache | None:
+    """Get the process-wide response cache, creating it on first use.
+
+    Returns
+    -------
+        The shared ResponseCache, or None if response caching is disabled
+
+    Raises
+    ------
+        ValueError: If the configured backend is unknown
+
+    """
+    global _response_cache
+    settings = CONFIG["response_cache"]
+    if not settings["enabled"]:
+        return None
+    if _response_cache is None:
+        if settings["backend"] == "memory":
+            backend: ResponseCacheBackend = MemoryResponseBackend(settings["max_size"])
+        elif settings["backend"] == "redis":
+            backend = RedisResponseBackend(url=os.getenv("REDIS_URL"))
+        else:
+            raise ValueError(f"Unknown response cache backend: {settings['backend']}")
+        _response_cache = ResponseCache(backend)
+    return _response_cache
+
+
+async def close_response_cache() -> None:
+    """Close and discard the process-wide response cache, if one was created."""
+    global _response_cache
+    cache, _response_cache = _response_cache, None
+    if cache is not None:
+        await cache.backend.aclose()
+
+
+def _response_cache_stats() -> dict[str, Any]:
+    return _response_cache.stats() if _response_cache is not None else {}
+
+
+register_stats("response_cache", _response_cache_stats)
+
+
+def agent_model(instance: Any) -> str | None:
+    """Return the name of the model behind an agent, if it has one.
+
+    Args:
+    ----
+        instance: The agent instance
+
+    Returns:
+    -------
+        The model name of the agent's ``llm``, or None
+
+    """
+    llm = getattr(instance, "llm", None)
+    model = getattr(llm, "model_name", None) or getattr(llm, "model", None)
+    return model if isinstance(model, str) else None
@@ -0,0 +1,278 @@
+"""Semantic cache module for reusing responses to paraphrased inputs.
+
+The exact response cache only helps when an input repeats word for word. The
+semantic cache embeds each input locally and answers an input from the cached
+response of the most similar earlier input, if it is similar enough.
+
+Embeddings are hashed bags of words and character trigrams, mixed with a share
+of hashed word bigrams, so no model or network call is involved. "how do I
+reverse a list in python" and "python reverse list" share all their content
+words and one of their two bigrams, which keeps them well above the agents'
+thresholds. "convert celsius to fahrenheit" and "convert fahrenheit to celsius"
+share every word but no bigram, which puts them below. Each
+agent has its own index, a fixed-size NumPy matrix used as a ring buffer, so
+the oldest entries are overwritten once it is full and entries older than the
+TTL are ignored.
+
+The cache is opt-in per agent through ``CONFIG["semantic_cache"]["agents"]``,
+each with its own similarity threshold.
+"""
+
+import time
+import zlib
+from typing import Any
+
+import numpy as np
+
+from core.config import CONFIG
+from core.metrics import register_stats
+from core.prerouter import tokenize
+
+# Weight of a character trigram relative to a whole word
+_TRIGRAM_WEIGHT = 0.3
+
+# Share of the embedding given to pairs of consecutive words. The same words in
+# an order sharing none of their bigrams score 1 - share (0.82), and one sharing
+# half of them 1 - share / 2 (0.91).
+_BIGRAM_SHARE = 0.18
+
+# Hits this close to the threshold are counted as borderline
+_BORDERLINE_MARGIN = 0.05
+
+
+def _feature_index(feature: str, dim: int) -> tuple[int, float]:
+    """Hash a feature to a vector index and sign, stable across processes."""
+    digest = zlib.crc32(feature.encode())
+    return digest % dim, 1.0 if digest & 0x80000000 else -1.0
+
+
+def embed(text: str, dim: int = 512) -> np.ndarray:
+    """Embed text as hashed words and trigrams, mixed with hashed word bigrams.
+
+    Both parts are normalized before they are mixed, so the bigrams' share of
+    the similarity does not depend on how long the words are.
+
+    Args:
+    ----
+        text: The text to embed
+        dim: Dimension of the embedding
+
+    Returns:
+    -------
+        A unit-length float32 vector, or a zero vector if the text has no
+        content words
+
+    """
+    words = np.zeros(dim, dtype=np.float32)
+    bigrams = np.zeros(dim, dtype=np.float32)
+    tokens = tokenize(text)
+    for token in tokens:
+        index, sign = _feature_index(token, dim)
+        words[index] += sign
+        padded = f"<{token}>"
+        for start in range(len(padded) - 2):
+            index, sign = _feature_index(padded[start : start + 3], dim)
+            words[index] += sign * _TRIGRAM_WEIGHT
+    for first, second in zip(tokens, tokens[1:]):
+        index, sign = _feature_index(f"{first} > {second}", dim)
+        bigrams[index] += sign
+    vector = np.zeros(dim, dtype=np.float32)
+    for part, share in ((words, 1 - _BIGRAM_SHARE), (bigrams, _BIGRAM_SHARE)):
+        norm = np.linalg.norm(part)
+        if norm > 0:
+            vector += part * (np.sqrt(share) / norm)
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+class SemanticCache:
+    """Nearest-neighbour response cache for one agent.
+
+    Attributes
+    ----------
+        threshold: Minimum cosine similarity for a cached response to be used
+        ttl_seconds: Lifetime of an entry in seconds, or None for no expiry
+        vectors: Embeddings of the cached inputs, one row per slot
+        responses: Cached responses, by slot
+        created_at: Creation time of each slot's entry
+
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        dim: int = 512,
+        max_size: int = 2048,
+        ttl_seconds: float | None = None,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+        ----
+            threshold: Minimum cosine similarity for a cached response to be used
+            dim: Dimension of the embeddings
+            max_size: Maximum number of entries before the oldest is overwritten
+            ttl_seconds: Lifetime of an entry in seconds, or None for no expiry
+
+        Raises:
+        ------
+            ValueError: If max_size is not positive
+
+        """
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.threshold = threshold
+        self.dim = dim
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.vectors = np.zeros((max_size, dim), dtype=np.float32)
+        self.created_at = np.full(max_size, -np.inf)
+        self.responses: list[str | None] = [None] * max_size
+        self._size = 0
+        self._next = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.borderline_hits = 0
+        self.hit_similarity_total = 0.0
+        self.hit_similarity_min: float | None = None
+
+    def __len__(self) -> int:
+        """Return the number of stored entries, including expired ones."""
+        return self._size
+
+    def _search(self, vector: np.ndarray) -> tuple[int, float]:
+        """Find the most similar live entry.
+
+        Returns
+        -------
+            The slot and similarity of the best entry, or (-1, 0.0)
+
+        """
+        if self._size == 0 or not vector.any():
+            return -1, 0.0
+        similarities = self.vectors[: self._size] @ vector
+        if self.ttl_seconds is not None:
+            expired = self.created_at[: self._size] <= (
+                time.monotonic() - self.ttl_seconds
+            )
+            similarities[expired] = -1.0
+        slot = int(np.argmax(similarities))
+        return slot, float(similarities[slot])
+
+    def lookup(self, text: str) -> str | None:
+        """Return the cached response of the most similar earlier input.
+
+        Args:
+        ----
+            text: The user's input text
+
+        Returns:
+        -------
+            The cached response, or None if nothing is similar enough
+
+        """
+        slot, similarity = self._search(embed(text, self.dim))
+        if slot < 0 or similarity < self.threshold:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.hit_similarity_total += similarity
+        if self.hit_similarity_min is None or similarity < self.hit_similarity_min:
+            self.hit_similarity_min = similarity
+        if similarity < self.threshold + _BORDERLINE_MARGIN:
+            self.borderline_hits += 1
+        return self.responses[slot]
+
+    def add(self, text: str, response: str) -> None:
+        """Cache a response for an input.
+
+        An input that is practically identical to a cached one replaces it;
+        otherwise the entry takes the next slot, overwriting the oldest entry
+        when the cache is full.
+
+        Args:
+        ----
+            text: The user's input text
+            response: The agent's response
+
+        """
+        vector = embed(text, self.dim)
+        if not vector.any():
+            return
+        slot, similarity = self._search(vector)
+        if slot < 0 or similarity < 0.999:
+            slot = self._next
+            self._next = (self._next + 1) % self.max_size
+            if self._size < self.max_size:
+                self._size += 1
+            else:
+                self.evictions += 1
+        self.vectors[slot] = vector
+        self.responses[slot] = response
+        self.created_at[slot] = time.monotonic()
+
+    def stats(self) -> dict[str, Any]:
+        """Return the cache counters and hit quality.
+
+        Returns
+        -------
+            A dictionary with the size, hit/miss counters and the similarity
+            of the hits
+
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": self._size,
+            "max_size": self.max_size,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "hit_similarity_avg": (
+                self.hit_similarity_total / self.hits if self.hits else None
+            ),
+            "hit_similarity_min": self.hit_similarity_min,
+            "borderline_hits": self.borderline_hits,
+        }
+
+
+SEMANTIC_CACHES: dict[str, SemanticCache] = {}
+
+
+def get_semantic_cache(agent_id: str) -> SemanticCache | None:
+    """Get an agent's semantic cache, creating it on first use.
+
+    Args:
+    ----
+        agent_id: The agent to get the cache for
+
+    Returns:
+    -------
+        The agent's SemanticCache, or None if the semantic cache is disabled or
+        the agent has not opted in
+
+    """
+    settings = CONFIG["semantic_cache"]
+    agent_settings = settings["agents"].get(agent_id)
+    if not settings["enabled"] or agent_settings is None:
+        return None
+    cache = SEMANTIC_CACHES.get(agent_id)
+    if cache is None:
+        cache = SemanticCache(
+            threshold=agent_settings["threshold"],
+            dim=settings["dim"],
+            max_size=agent_settings.get("max_size", settings["max_size"]),
+            ttl_seconds=agent_settings.get("ttl_seconds", settings["ttl_seconds"]),
+        )
+        SEMANTIC_CACHES[agent_id] = cache
+    return cache
+
+
+register_stats(
+    "semantic_cache",
+    lambda: {agent_id: cache.stats() for agent_id, cache in SEMANTIC_CACHES.items()},
+)
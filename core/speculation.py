@@ -0,0 +1,188 @@
+"""Speculation module for running the likely agent while routing is in flight.
+
+When enabled, ``entry_node`` predicts the agent an input will be routed to and
+starts it concurrently with the router LLM call. If the router agrees, the
+agent's result is already on its way; otherwise the speculative work is
+cancelled. Without a confident guess, the agent a thread was last routed to is
+predicted, so one user's conversation never steers another's speculation.
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from collections.abc import Coroutine
+from typing import Any
+
+from core.cache import TTLCache
+from core.config import CONFIG
+from core.metrics import register_stats
+from core.prerouter import best_guess
+
+logger = logging.getLogger(__name__)
+
+SPECULATION_STATS: Counter[str] = Counter(started=0, hits=0, misses=0, cancelled=0)
+
+# The agent each thread was last routed to, keyed by thread id
+_last_routes = TTLCache(max_size=1024)
+
+
+def speculation_stats() -> dict[str, Any]:
+    """Return the speculation counters with the derived hit rate.
+
+    Returns
+    -------
+        A dictionary of counters; ``misses`` are wasted speculative calls
+
+    """
+    stats: dict[str, Any] = dict(SPECULATION_STATS)
+    decided = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / decided if decided else 0.0
+    return stats
+
+
+register_stats("speculation", speculation_stats)
+
+
+class Speculation:
+    """A speculatively started agent run.
+
+    Attributes
+    ----------
+        agent_id: The agent that was started
+        task: The task running the agent
+
+    """
+
+    def __init__(self, agent_id: str, task: asyncio.Task) -> None:
+        """Initialize the speculation.
+
+        Args:
+        ----
+            agent_id: The agent that was started
+            task: The task running the agent
+
+        """
+        self.agent_id = agent_id
+        self.task = task
+
+    def cancel(self) -> None:
+        """Cancel the speculative work if it is still running."""
+        if not self.task.done():
+            self.task.cancel()
+            SPECULATION_STATS["cancelled"] += 1
+
+    async def result(self) -> str:
+        """Wait for and return the speculative agent's response."""
+        return await self.task
+
+
+def _consume_result(task: asyncio.Task) -> None:
+    """Retrieve a finished task's exception so it is never reported unhandled."""
+    if not task.cancelled():
+        task.exception()
+
+
+def record_route(agent_id: str, thread_id: str | None = None) -> None:
+    """Remember a thread's latest routing decision for its next prediction.
+
+    Args:
+    ----
+        agent_id: The agent the last input was routed to
+        thread_id: The conversation thread, or None if the input has no thread
+
+    """
+    if thread_id is not None:
+        _last_routes.set(thread_id, agent_id)
+
+
+def predict_agent(
+    text: str, registry: dict[str, dict[str, Any]], thread_id: str | None = None
+) -> str | None:
+    """Predict which agent an input will be routed to.
+
+    Uses the pre-router's best guess, falling back to the agent the thread's
+    previous turn was routed to.
+
+    Args:
+    ----
+        text: The user's input text
+        registry: The agent registry
+        thread_id: The conversation thread, or None if the input has no thread
+
+    Returns:
+    -------
+        The predicted agent id, or None if there is no prediction
+
+    """
+    guess = best_guess(text, registry)
+    if guess is not None:
+        return guess.agent_id
+    if thread_id is None:
+        return None
+    last_agent_id = _last_routes.get(thread_id)
+    if last_agent_id is not None and last_agent_id in registry:
+        return last_agent_id
+    return None
+
+
+def can_speculate(agent_id: str) -> bool:
+    """Check whether an agent may be started speculatively.
+
+    Args:
+    ----
+        agent_id: The agent to check
+
+    Returns:
+    -------
+        True if speculation is enabled and allowed for the agent
+
+    """
+    settings = CONFIG["speculation"]
+    if not settings["enabled"]:
+        return False
+    allowed = settings.get("agents")
+    return allowed is None or agent_id in allowed
+
+
+def speculate(agent_id: str, coro: Coroutine[Any, Any, str]) -> Speculation:
+    """Start an agent run speculatively.
+
+    Args:
+    ----
+        agent_id: The predicted agent
+        coro: The agent run to start
+
+    Returns:
+    -------
+        The started Speculation
+
+    """
+    task = asyncio.ensure_future(coro)
+    task.add_done_callback(_consume_result)
+    SPECULATION_STATS["started"] += 1
+    logger.info(f"Speculatively started agent: {agent_id}")
+    return Speculation(agent_id, task)
+
+
+def resolve(speculation: Speculation, agent_id: str) -> Speculation | None:
+    """Settle a speculation once the routed agent is known.
+
+    Args:
+    ----
+        speculation: The speculation started for this input
+        agent_id: The agent the router chose
+
+    Returns:
+    -------
+        The speculation if it guessed right, otherwise None after cancelling it
+
+    """
+    if speculation.agent_id == agent_id:
+        SPECULATION_STATS["hits"] += 1
+        return speculation
+    SPECULATION_STATS["misses"] += 1
+    logger.info(
+        f"Speculation missed: started {speculation.agent_id}, routed to {agent_id}"
+    )
+    speculation.cancel()
+    return None
@@ -1,29 +1,61 @@
 """Client for interacting with Ollama LLM models."""
 
+import asyncio
+import logging
 import os
 from urllib.parse import urlparse
 
+import httpx
 from langchain.schema import LLMResult
 from langchain_ollama.llms import OllamaLLM
 from pydantic import BaseModel
 
+from llm.resilience import call_with_resilience
+
+logger = logging.getLogger(__name__)
+
+
+def _env_number(name: str, default: float) -> float:
+    """Read a positive number from an environment variable.
+
+    Raises
+    ------
+        ValueError: If the variable is set to something other than a positive
+            number.
+
+    """
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    try:
+        value = float(raw)
+    except ValueError:
+        raise ValueError(f"Invalid {name}: {raw!r} is not a number")
+    if value <= 0:
+        raise ValueError(f"Invalid {name}: must be positive")
+    return value
+
 
 class OllamaClient:
     """Client for interacting with Ollama LLM models.
 
     This client provides a wrapper around the Ollama LLM service, handling
     configuration and providing a simple interface for generating text.
+
+    The underlying HTTP clients keep a pool of keep-alive connections, so a
+    single instance should be shared; use ``get_ollama_client()`` rather than
+    constructing one per request.
     """
 
     def __init__(self) -> None:
         """Initialize the Ollama client.
 
-        Sets up the base URL and model name from environment variables,
-        with fallback defaults. Validates the URL format.
+        Sets up the base URL, model name, connection pool and timeouts from
+        environment variables, with fallback defaults. Validates the URL format.
 
         Raises
         ------
-            ValueError: If the base URL is invalid.
+            ValueError: If the base URL or a numeric setting is invalid.
 
         """
         self.base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
@@ -37,18 +69,46 @@ class OllamaClient:
         except Exception as e:
             raise ValueError(f"Invalid URL: {str(e)}")
 
-        self.llm = OllamaLLM(model=self.model, base_url=self.base_url)
+        self.pool_size = int(_env_number("OLLAMA_POOL_SIZE", 10))
+        self.timeout = _env_number("OLLAMA_TIMEOUT", 60.0)
+        self.connect_timeout = _env_number("OLLAMA_CONNECT_TIMEOUT", 5.0)
+        self.keepalive_expiry = _env_number("OLLAMA_KEEPALIVE_EXPIRY", 30.0)
+        # How long the server keeps the model (and its prompt cache) loaded
+        self.keep_alive = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+        limits = httpx.Limits(
+            max_connections=self.pool_size,
+            max_keepalive_connections=self.pool_size,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+        self.llm = OllamaLLM(
+            model=self.model,
+            base_url=self.base_url,
+            keep_alive=self.keep_alive,
+            client_kwargs={
+                "timeout": httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                "limits": limits,
+            },
+        )
 
     async def generate(
-        self, prompt: str, format: type[BaseModel] | BaseModel
+        self,
+        prompt: str,
+        format: type[BaseModel] | BaseModel,
+        system: str | None = None,
     ) -> LLMResult:
         """Generate text using the Ollama model.
 
+        The call is subject to the ``"ollama"`` timeout, retry and hedging
+        policy in ``CONFIG["llm_calls"]``.
+
         Args:
         ----
             prompt: The input prompt to generate text from.
             format: A Pydantic model class or instance defining the expected
             output format.
+            system: Optional system prompt. Keeping it identical across calls
+            lets the server reuse the already processed prefix.
 
         Returns:
         -------
@@ -57,6 +117,91 @@ class OllamaClient:
         Raises:
         ------
             ValueError: If the format contains non-serializable fields.
+            asyncio.TimeoutError: If the call did not finish within its deadline.
 
         """
-        return await self.llm.agenerate([prompt], format=format.model_json_schema())
+        kwargs = {"format": format.model_json_schema()}
+        if system is not None:
+            kwargs["system"] = system
+        return await call_with_resilience(
+            "ollama", lambda: self.llm.agenerate([prompt], **kwargs)
+        )
+
+    async def generate_batch(
+        self,
+        prompts: list[str],
+        format: type[BaseModel] | BaseModel,
+        system: str | None = None,
+    ) -> LLMResult:
+        """Generate text for many prompts at once.
+
+        ``OllamaLLM.agenerate`` sends a list of prompts one after another, so
+        the prompts are instead sent concurrently over the connection pool, at
+        most ``pool_size`` at a time, letting the server process them in
+        parallel.
+
+        Args:
+        ----
+            prompts: The input prompts to generate text from.
+            format: A Pydantic model class or instance defining the expected
+            output format.
+            system: Optional system prompt shared by all prompts.
+
+        Returns:
+        -------
+            LLMResult with one list of generations per prompt, in order. The
+            list is empty for a prompt whose call failed, so one failure does
+            not fail the others.
+
+        """
+        semaphore = asyncio.Semaphore(self.pool_size)
+
+        async def generate_one(prompt: str) -> LLMResult:
+            async with semaphore:
+                return await self.generate(prompt, format, system)
+
+        results = await asyncio.gather(
+            *(generate_one(p) for p in prompts), return_exceptions=True
+        )
+        generations = []
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.error(f"Error in batched generation: {result}")
+                generations.append([])
+            else:
+                generations.append(result.generations[0])
+        return LLMResult(generations=generations)
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP connections held by the client."""
+        async_client = getattr(self.llm, "_async_client", None)
+        if async_client is not None:
+            await async_client.close()
+        sync_client = getattr(self.llm, "_client", None)
+        if sync_client is not None:
+            sync_client.close()
+
+
+_shared_client: OllamaClient | None = None
+
+
+def get_ollama_client() -> OllamaClient:
+    """Get the process-wide Ollama client, creating it on first use.
+
+    Returns
+    -------
+        The shared OllamaClient instance
+
+    """
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = OllamaClient()
+    return _shared_client
+
+
+async def close_ollama_client() -> None:
+    """Close and discard the process-wide Ollama client, if one was created."""
+    global _shared_client
+    client, _shared_client = _shared_client, None
+    if client is not None:
+        await client.aclose()
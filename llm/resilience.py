@@ -0,0 +1,295 @@
+"""Timeouts, retries and hedging for LLM calls.
+
+Every provider call goes through ``call_with_resilience`` so a slow or failing
+provider cannot stall a request indefinitely. The policy for a call is looked
+up by name (an agent id, or ``"ollama"`` for the router) in
+``CONFIG["llm_calls"]``, falling back to the ``"default"`` entry:
+
+- ``timeout``: seconds allowed for a single attempt
+- ``deadline``: seconds allowed for the whole call, across attempts
+- ``attempts``: maximum number of attempts
+- ``backoff_base`` / ``backoff_max``: exponential backoff between attempts,
+  with full jitter
+- ``hedge``: send a second request if the first has not answered after
+  ``hedge_after`` seconds (or the observed p95 latency when unset) and use
+  whichever answers first
+
+Hedging duplicates provider work, so it is best kept to short calls such as
+routing. Agent calls made while a chat is streamed to the client
+(``stream_tokens`` set in the LangChain config) are neither retried nor hedged:
+a second attempt would send its tokens after, or interleaved with, those
+already streamed. The router's call in the graph's entry node is never
+streamed, so it keeps its policy.
+"""
+
+import asyncio
+import math
+import random
+import time
+from collections import Counter, deque
+from collections.abc import Awaitable, Callable
+from typing import Any, NamedTuple, TypeVar
+
+from langchain_core.runnables import ensure_config
+
+from core.config import CONFIG
+from core.metrics import register_stats
+
+T = TypeVar("T")
+
+# The only client errors worth retrying: timeouts, conflicts and rate limits
+_RETRYABLE_CLIENT_STATUSES = (408, 409, 429)
+
+
+class CallPolicy(NamedTuple):
+    """Timeout, retry and hedging settings for one kind of LLM call."""
+
+    timeout: float | None = 60.0
+    deadline: float | None = 120.0
+    attempts: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 8.0
+    hedge: bool = False
+    hedge_after: float | None = None
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies.
+
+    Attributes
+    ----------
+        samples: The most recent latencies in seconds
+        min_samples: Samples needed before a percentile is reported
+
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 20) -> None:
+        """Initialize the tracker.
+
+        Args:
+        ----
+            window: Number of recent latencies to keep
+            min_samples: Samples needed before a percentile is reported
+
+        """
+        self.samples: deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def record(self, latency: float) -> None:
+        """Record a successful call's latency in seconds."""
+        self.samples.append(latency)
+
+    def percentile(self, pct: float) -> float | None:
+        """Return a latency percentile, or None without enough samples.
+
+        Args:
+        ----
+            pct: The percentile, between 0 and 100
+
+        Returns:
+        -------
+            The latency in seconds, or None
+
+        """
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1)
+        return ordered[max(index, 0)]
+
+
+LATENCIES: dict[str, LatencyTracker] = {}
+CALL_STATS: dict[str, Counter[str]] = {}
+
+
+def _llm_call_stats() -> dict[str, dict[str, Any]]:
+    """Return the per-call counters with the observed p95 latency."""
+    stats = {}
+    for name, counters in CALL_STATS.items():
+        p95 = LATENCIES[name].percentile(95) if name in LATENCIES else None
+        stats[name] = {
+            **counters,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+    return stats
+
+
+register_stats("llm_calls", _llm_call_stats)
+
+
+def policy_for(name: str) -> CallPolicy:
+    """Build the call policy for a name from the configuration.
+
+    Args:
+    ----
+        name: The call name, usually an agent id
+
+    Returns:
+    -------
+        The default policy updated with the name's overrides
+
+    """
+    settings = CONFIG["llm_calls"]
+    return CallPolicy(**{**settings["default"], **settings.get(name, {})})
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Check whether a failed call is worth retrying.
+
+    Timeouts, connection problems, rate limits and server errors are retried.
+    Invalid requests and other client errors are not, since they would fail
+    the same way again.
+
+    Args:
+    ----
+        error: The exception raised by the call
+
+    Returns:
+    -------
+        True if the call should be retried
+
+    """
+    if isinstance(error, ValueError | TypeError):
+        return False
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int) and 400 <= status < 500:
+        return status in _RETRYABLE_CLIENT_STATUSES
+    return True
+
+
+def backoff_delay(policy: CallPolicy, attempt: int) -> float:
+    """Return a jittered delay before the next attempt.
+
+    Args:
+    ----
+        policy: The call policy
+        attempt: The attempt that just failed, starting at 1
+
+    Returns:
+    -------
+        A random delay up to the exponential backoff for the attempt
+
+    """
+    return random.uniform(
+        0, min(policy.backoff_max, policy.backoff_base * 2 ** (attempt - 1))
+    )
+
+
+async def _hedged(
+    name: str, make_call: Callable[[], Awaitable[T]], hedge_after: float
+) -> T:
+    """Run a call, sending a second request if the first is slow."""
+    first = asyncio.ensure_future(make_call())
+    tasks = {first}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if done:
+            return first.result()
+
+        CALL_STATS[name]["hedges"] += 1
+        second = asyncio.ensure_future(make_call())
+        tasks.add(second)
+        pending = set(tasks)
+        error: BaseException | None = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        CALL_STATS[name]["hedge_wins"] += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _streaming_tokens() -> bool:
+    """Check whether the current call's tokens are streamed to the client.
+
+    Only agent nodes are streamed, not the router's call in the entry node.
+    """
+    config = ensure_config()
+    return (
+        bool(config.get("configurable", {}).get("stream_tokens"))
+        and config.get("metadata", {}).get("langgraph_node") != "entry"
+    )
+
+
+async def call_with_resilience(
+    name: str,
+    make_call: Callable[[], Awaitable[T]],
+    policy: CallPolicy | None = None,
+) -> T:
+    """Run an LLM call with timeouts, retries and optional hedging.
+
+    Args:
+    ----
+        name: The call name used for the policy, latencies and stats
+        make_call: Function starting a new attempt of the call
+        policy: Policy to use instead of the configured one
+
+    Returns:
+    -------
+        The result of the first successful attempt
+
+    Raises:
+    ------
+        asyncio.TimeoutError: If an attempt or the whole call ran out of time
+            and no retries were left
+        Exception: The last attempt's error if it was not retryable or no
+            retries were left
+
+    """
+    policy = policy or policy_for(name)
+    if _streaming_tokens():
+        # Tokens already sent to the client cannot be taken back
+        policy = policy._replace(attempts=1, hedge=False)
+    latencies = LATENCIES.setdefault(name, LatencyTracker())
+    stats = CALL_STATS.setdefault(
+        name,
+        Counter(calls=0, retries=0, timeouts=0, failures=0, hedges=0, hedge_wins=0),
+    )
+    stats["calls"] += 1
+    start = time.monotonic()
+
+    attempt = 0
+    while True:
+        attempt += 1
+        timeout = policy.timeout
+        if policy.deadline is not None:
+            remaining = policy.deadline - (time.monotonic() - start)
+            timeout = remaining if timeout is None else min(timeout, remaining)
+
+        hedge_after = policy.hedge_after
+        if policy.hedge and hedge_after is None:
+            hedge_after = latencies.percentile(95)
+
+        attempt_start = time.monotonic()
+        try:
+            if policy.hedge and hedge_after is not None:
+                call = _hedged(name, make_call, hedge_after)
+            else:
+                call = make_call()
+            result = await asyncio.wait_for(call, timeout)
+        except Exception as e:
+            # Not the builtin TimeoutError before Python 3.11
+            if isinstance(e, asyncio.TimeoutError):
+                stats["timeouts"] += 1
+            retry_delay = backoff_delay(policy, attempt)
+            out_of_time = policy.deadline is not None and (
+                time.monotonic() - start + retry_delay >= policy.deadline
+            )
+            if attempt >= policy.attempts or out_of_time or not is_retryable(e):
+                stats["failures"] += 1
+                raise
+            stats["retries"] += 1
+            await asyncio.sleep(retry_delay)
+        else:
+            latencies.record(time.monotonic() - attempt_start)
+            return result
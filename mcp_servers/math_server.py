@@ -2,10 +2,108 @@
 
 This module implements a server that can safely evaluate mathematical expressions
 using Python's ast module, avoiding the security risks of eval().
+
+Expressions are compiled once into a flat postfix program that is evaluated with
+an explicit stack, so deeply nested input cannot hit Python's recursion limit.
+Compiled programs are kept in an LRU cache keyed by the stripped expression.
+
+Evaluation is bounded so a hostile expression cannot stall the event loop:
+inputs longer than ``max_length`` and programs with more than ``max_nodes``
+instructions are rejected, and results must be finite. Numbers are floats, so
+even ``9 ** 9 ** 9`` overflows at once instead of computing a huge integer.
+Inputs longer than ``offload_length`` are parsed in a process pool under a
+wall-clock timeout; ``is_expression`` only checks their characters, so the
+prerouter doesn't parse them on the event loop. The compiled program is cached
+and run in-process, where ``max_nodes`` bounds its cost.
+
+An expression with named variables can be evaluated over many bindings at
+once: the program runs a single time on NumPy arrays, one element per binding.
+Small batches, and bindings whose vectorized result is not finite, go through
+the scalar path so they get the same results and error messages as single
+requests.
 """  # noqa: E501
 
 import ast
+import asyncio
+import math
+import multiprocessing
 import operator
+import re
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Mapping
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+
+import numpy as np
+
+# Number of operands taken by each instruction of a compiled program; loads
+# push the value bound to a variable
+_PUSH = 0
+_UNARY = 1
+_BINARY = 2
+_LOAD = 3
+
+# Characters of an arithmetic expression: numbers, operators and parentheses
+_ARITHMETIC = re.compile(r"[\d.eE_+\-*/()\s]+")
+
+# Prefixes of the error messages send_request returns instead of a result
+ERROR_PREFIXES = ("Error evaluating expression:", "Unexpected error:")
+
+
+class CompiledExpression:
+    """An arithmetic expression compiled to a postfix program.
+
+    Attributes
+    ----------
+        code: The program as ``(arity, argument)`` instructions, where arity 0
+            pushes the constant argument, arity 1 or 2 applies the operator
+            argument to the top of the stack and a load pushes the value of
+            the variable named by the argument
+        numeric: Whether every constant in the expression is an int or float
+
+    """
+
+    __slots__ = ("code", "numeric")
+
+    def __init__(self, code: tuple[tuple[int, Any], ...], numeric: bool) -> None:
+        """Initialize the compiled expression.
+
+        Args:
+        ----
+            code: The postfix program
+            numeric: Whether every constant in the expression is an int or float
+
+        """
+        self.code = code
+        self.numeric = numeric
+
+    def evaluate(self, bindings: Mapping[str, Any] | None = None) -> Any:
+        """Run the program.
+
+        Args:
+        ----
+            bindings: Values of the expression's variables, floats or NumPy
+                arrays to evaluate the expression element-wise
+
+        Returns:
+        -------
+            The value of the expression, an array if any variable is bound
+            to one
+
+        """
+        stack: list[Any] = []
+        for arity, argument in self.code:
+            if arity == _PUSH:
+                stack.append(argument)
+            elif arity == _LOAD:
+                stack.append(bindings[argument])
+            elif arity == _UNARY:
+                stack[-1] = argument(stack[-1])
+            else:
+                right = stack.pop()
+                stack[-1] = argument(stack[-1], right)
+        return stack[0]
 
 
 class MathServer:
@@ -27,42 +125,424 @@ class MathServer:
         ast.USub: operator.neg,
     }
 
-    def _safe_eval(self, node: ast.AST) -> float:
-        """Safely evaluate an AST node.
+    def __init__(
+        self,
+        cache_size: int = 1024,
+        max_length: int = 10_000,
+        max_nodes: int = 2_000,
+        offload_length: int | None = 200,
+        timeout_seconds: float = 2.0,
+        workers: int = 2,
+        max_batch_size: int = 100_000,
+        min_vector_size: int = 8,
+        max_scalar_fallbacks: int = 1_000,
+    ) -> None:
+        """Initialize the server.
+
+        Args:
+        ----
+            cache_size: Maximum number of compiled expressions kept
+            max_length: Longest input accepted, in characters
+            max_nodes: Most numbers and operators an expression may contain
+            offload_length: Inputs longer than this are compiled in a process
+                pool, None to always compile in-process
+            timeout_seconds: How long an offloaded compilation may take
+            workers: Number of worker processes in the pool
+            max_batch_size: Most bindings a batch may evaluate
+            min_vector_size: Batches smaller than this are evaluated one
+                binding at a time
+            max_scalar_fallbacks: Most bindings of a batch re-evaluated one at
+                a time to explain a result that is not finite
+
+        """
+        self.max_length = max_length
+        self.max_nodes = max_nodes
+        self.offload_length = offload_length
+        self.timeout_seconds = timeout_seconds
+        self.workers = workers
+        self.max_batch_size = max_batch_size
+        self.min_vector_size = min_vector_size
+        self.max_scalar_fallbacks = max_scalar_fallbacks
+        self.cache_size = cache_size
+        self._pool: ProcessPoolExecutor | None = None
+        self._programs: OrderedDict[tuple[str, tuple[str, ...]], CompiledExpression]
+        self._programs = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _operator(self, op: ast.AST) -> Callable[..., float]:
+        op_type = type(op)
+        if op_type not in self._operators:
+            raise ValueError(f"Unsupported operation: {op_type.__name__}")
+        return self._operators[op_type]
+
+    def _compile(
+        self, expression: str, variables: tuple[str, ...] = ()
+    ) -> CompiledExpression:
+        """Parse, validate and compile an expression without caching it."""
+        try:
+            tree = ast.parse(expression, mode="eval")
+        except (RecursionError, MemoryError) as e:
+            raise ValueError("Expression is too deeply nested") from e
+        code: list[tuple[int, Any]] = []
+        numeric = True
+        # Post-order walk with an explicit stack; a node is pushed a second
+        # time, marked as visited, to emit its operator after its operands
+        pending: list[tuple[ast.AST, bool]] = [(tree.body, False)]
+        while pending:
+            node, visited = pending.pop()
+            if isinstance(node, ast.Constant):
+                if isinstance(node.value, complex):
+                    raise TypeError("Complex numbers are not supported")
+                numeric = numeric and type(node.value) in (int, float)
+                try:
+                    value = float(node.value)
+                except OverflowError as e:
+                    raise ValueError("Number is too large to represent") from e
+                code.append((_PUSH, value))
+            elif isinstance(node, ast.BinOp):
+                if visited:
+                    code.append((_BINARY, self._operator(node.op)))
+                else:
+                    pending.append((node, True))
+                    pending.append((node.right, False))
+                    pending.append((node.left, False))
+            elif isinstance(node, ast.UnaryOp):
+                if visited:
+                    code.append((_UNARY, self._operator(node.op)))
+                else:
+                    pending.append((node, True))
+                    pending.append((node.operand, False))
+            elif isinstance(node, ast.Name) and variables:
+                if node.id not in variables:
+                    raise ValueError(f"Unknown variable: {node.id}")
+                code.append((_LOAD, node.id))
+            else:
+                raise ValueError(f"Unsupported node type: {type(node).__name__}")
+            if len(code) > self.max_nodes:
+                raise ValueError(
+                    f"Expression is too complex, the limit is {self.max_nodes} "
+                    "numbers and operators"
+                )
+        return CompiledExpression(tuple(code), numeric)
+
+    def _normalize(self, input_text: str) -> str:
+        expression = input_text.strip()
+        if len(expression) > self.max_length:
+            raise ValueError(
+                f"Expression is too long, the limit is {self.max_length} characters"
+            )
+        return expression
+
+    def _cached(self, key: tuple[str, tuple[str, ...]]) -> CompiledExpression | None:
+        program = self._programs.get(key)
+        if program is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._programs.move_to_end(key)
+        return program
+
+    def _remember(
+        self, key: tuple[str, tuple[str, ...]], program: CompiledExpression
+    ) -> None:
+        self._programs[key] = program
+        if len(self._programs) > self.cache_size:
+            self._programs.popitem(last=False)
+
+    def compile(
+        self, input_text: str, variables: Iterable[str] = ()
+    ) -> CompiledExpression:
+        """Compile an expression, reusing the cached program if there is one.
+
+        Args:
+        ----
+            input_text: A string containing a mathematical expression
+            variables: Names the expression may use as variables
+
+        Returns:
+        -------
+            The compiled expression
+
+        Raises:
+        ------
+            SyntaxError: If the input is not a valid expression
+            ValueError: If the expression contains unsupported operations or
+                exceeds the size limits
+            TypeError: If the expression contains complex numbers
+
+        """
+        key = (self._normalize(input_text), tuple(sorted(variables)))
+        program = self._cached(key)
+        if program is None:
+            program = self._compile(*key)
+            self._remember(key, program)
+        return program
+
+    async def acompile(
+        self, input_text: str, variables: Iterable[str] = ()
+    ) -> CompiledExpression:
+        """Compile an expression, parsing long inputs in the process pool.
 
         Args:
         ----
-            node: The AST node to evaluate
+            input_text: A string containing a mathematical expression
+            variables: Names the expression may use as variables
 
         Returns:
         -------
-            The evaluated result as a float
+            The compiled expression
 
         Raises:
         ------
-            ValueError: If the expression contains unsupported operations
+            SyntaxError: If the input is not a valid expression
+            ValueError: If the expression contains unsupported operations,
+                exceeds the size limits or takes too long to compile
             TypeError: If the expression contains complex numbers
 
         """
-        if isinstance(node, ast.Constant):
-            if isinstance(node.value, complex):
-                raise TypeError("Complex numbers are not supported")
-            return float(node.value)
-        elif isinstance(node, ast.BinOp):
-            left = self._safe_eval(node.left)
-            right = self._safe_eval(node.right)
-            op_type = type(node.op)
-            if op_type not in self._operators:
-                raise ValueError(f"Unsupported operation: {op_type.__name__}")
-            return self._operators[op_type](left, right)
-        elif isinstance(node, ast.UnaryOp):
-            operand = self._safe_eval(node.operand)
-            op_type = type(node.op)
-            if op_type not in self._operators:
-                raise ValueError(f"Unsupported operation: {op_type.__name__}")
-            return self._operators[op_type](operand)
+        key = (self._normalize(input_text), tuple(sorted(variables)))
+        if self.offload_length is None or len(key[0]) <= self.offload_length:
+            return self.compile(*key)
+        program = self._cached(key)
+        if program is None:
+            program = await self._compile_offloaded(*key)
+            self._remember(key, program)
+        return program
+
+    def evaluate(self, input_text: str) -> float:
+        """Compile and evaluate an expression in this process.
+
+        Args:
+        ----
+            input_text: A string containing a mathematical expression
+
+        Returns:
+        -------
+            The value of the expression
+
+        Raises:
+        ------
+            SyntaxError: If the input is not a valid expression
+            ValueError: If the expression is not supported, exceeds the size
+                limits or its result is not finite
+            TypeError: If the expression contains complex numbers
+
+        """
+        return self._run(self.compile(input_text))
+
+    @staticmethod
+    def _run(
+        program: CompiledExpression, bindings: Mapping[str, float] | None = None
+    ) -> float:
+        try:
+            result = program.evaluate(bindings)
+        except OverflowError as e:
+            raise ValueError("Result is too large to represent") from e
+        except ZeroDivisionError as e:
+            raise ValueError("Division by zero") from e
+        if not math.isfinite(result):
+            raise ValueError("Result is too large to represent")
+        return result
+
+    def _columns(self, bindings: Mapping[str, Any]) -> tuple[dict[str, Any], int]:
+        """Convert bindings to float columns and return them with the batch size."""
+        columns = {}
+        for name, values in bindings.items():
+            if not name.isidentifier():
+                raise ValueError(f"Invalid variable name: {name}")
+            column = np.asarray(values, dtype=np.float64)
+            if column.ndim > 1:
+                raise ValueError(f"{name} must be a number or a list of numbers")
+            columns[name] = column
+        sizes = {column.size for column in columns.values() if column.ndim == 1}
+        if len(sizes) > 1:
+            raise ValueError("All variables must have the same number of values")
+        size = sizes.pop() if sizes else 1
+        if size > self.max_batch_size:
+            raise ValueError(
+                f"Batch is too large, the limit is {self.max_batch_size} bindings"
+            )
+        return columns, size
+
+    def _run_batch(
+        self, program: CompiledExpression, columns: dict[str, Any], size: int
+    ) -> tuple[list[float | None], dict[int, str]]:
+        """Evaluate a compiled expression over every binding of a batch."""
+        values: list[float | None]
+        if size < self.min_vector_size:
+            values = [None] * size
+            failed: Iterable[int] = range(size)
         else:
-            raise ValueError(f"Unsupported node type: {type(node).__name__}")
+            with np.errstate(all="ignore"):
+                result = np.asarray(program.evaluate(columns), dtype=np.float64)
+            result = np.broadcast_to(result, (size,))
+            values = result.tolist()
+            failed = np.flatnonzero(~np.isfinite(result)).tolist()
+
+        errors: dict[int, str] = {}
+        for count, index in enumerate(failed):
+            values[index] = None
+            if count >= self.max_scalar_fallbacks:
+                errors[index] = "Result is not a finite number"
+                continue
+            # Python floats raise on division by zero and overflow where
+            # NumPy returns inf or nan, which explains the failure
+            row = {
+                name: float(column[index] if column.ndim else column)
+                for name, column in columns.items()
+            }
+            try:
+                values[index] = self._run(program, row)
+            except Exception as e:
+                errors[index] = str(e)
+        return values, errors
+
+    def evaluate_batch(
+        self, input_text: str, bindings: Mapping[str, Any]
+    ) -> tuple[list[float | None], dict[int, str]]:
+        """Evaluate an expression over many bindings of its variables.
+
+        Args:
+        ----
+            input_text: A string containing a mathematical expression
+            bindings: The values of each variable, either a number shared by
+                every binding or a list with one number per binding
+
+        Returns:
+        -------
+            The value for each binding, None where it failed, and the error
+            messages of the failed bindings by index
+
+        Raises:
+        ------
+            SyntaxError: If the input is not a valid expression
+            ValueError: If the expression is not supported, uses an unbound
+                variable, exceeds the size limits or the bindings are invalid
+            TypeError: If the expression contains complex numbers
+
+        """
+        columns, size = self._columns(bindings)
+        return self._run_batch(self.compile(input_text, columns), columns, size)
+
+    async def send_batch(
+        self, input_text: str, bindings: Mapping[str, Any]
+    ) -> dict[str, Any]:
+        """Evaluate an expression over many bindings without blocking the loop.
+
+        Args:
+        ----
+            input_text: A string containing a mathematical expression
+            bindings: The values of each variable, either a number shared by
+                every binding or a list with one number per binding
+
+        Returns:
+        -------
+            A dictionary with the ``results``, None where a binding failed,
+            and the ``errors`` as ``{"index", "error"}`` dictionaries
+
+        Raises:
+        ------
+            SyntaxError: If the input is not a valid expression
+            ValueError: If the expression is not supported, uses an unbound
+                variable, exceeds the size limits or the bindings are invalid
+            TypeError: If the expression contains complex numbers
+
+        """
+        columns, size = self._columns(bindings)
+        program = await self.acompile(input_text, columns)
+        values, errors = await asyncio.to_thread(
+            self._run_batch, program, columns, size
+        )
+        return {
+            "results": values,
+            "errors": [
+                {"index": index, "error": error}
+                for index, error in sorted(errors.items())
+            ],
+        }
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned workers don't inherit the server's threads and locks
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def _discard_pool(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            # Busy workers exit once their current task is done
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _compile_offloaded(
+        self, expression: str, variables: tuple[str, ...]
+    ) -> CompiledExpression:
+        """Compile an expression in the process pool, under the timeout."""
+        future = asyncio.get_running_loop().run_in_executor(
+            self._executor(), _compile_in_worker, expression, variables, self.max_nodes
+        )
+        try:
+            return await asyncio.wait_for(future, self.timeout_seconds)
+        # Not the builtin TimeoutError before Python 3.11
+        except asyncio.TimeoutError as e:
+            # Don't queue later requests behind a stuck worker
+            self._discard_pool()
+            raise ValueError(
+                f"Parsing took longer than {self.timeout_seconds:g} seconds"
+            ) from e
+        except BrokenProcessPool:
+            self._discard_pool()
+            raise
+
+    def close(self) -> None:
+        """Shut down the worker processes, if any were started."""
+        self._discard_pool()
+
+    def cache_info(self) -> dict[str, int | None]:
+        """Return the compiled expression cache counters.
+
+        Returns
+        -------
+            A dictionary with the hits, misses, size and maximum size
+
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._programs),
+            "max_size": self.cache_size,
+        }
+
+    def is_expression(self, input_text: str) -> bool:
+        """Check whether the input is an arithmetic expression this server handles.
+
+        The input is parsed and validated but not evaluated. Inputs longer
+        than ``offload_length`` are only checked for characters that can't
+        appear in arithmetic, so they are parsed by ``acompile`` in the process
+        pool rather than here, on the event loop.
+
+        Args:
+        ----
+            input_text: The text to check
+
+        Returns:
+        -------
+            True if the input only uses supported numbers and operators
+
+        """
+        expression = input_text.strip()
+        if self.offload_length is not None and len(expression) > self.offload_length:
+            return (
+                len(expression) <= self.max_length
+                and _ARITHMETIC.fullmatch(expression) is not None
+            )
+        try:
+            return self.compile(expression).numeric
+        except (SyntaxError, ValueError, TypeError, RecursionError, MemoryError):
+            return False
 
     async def send_request(self, input_text: str) -> str:
         """Process a mathematical expression and return the result.
@@ -77,12 +557,40 @@ class MathServer:
 
         """
         try:
-            # Parse the input into an AST
-            tree = ast.parse(input_text, mode="eval")
-            # Evaluate the expression safely
-            result = self._safe_eval(tree.body)
+            result = self._run(await self.acompile(input_text))
             return f"Result: {result}"
         except (ValueError, SyntaxError, TypeError) as e:
-            return f"Error evaluating expression: {str(e)}"
+            return f"{ERROR_PREFIXES[0]} {str(e)}"
         except Exception as e:
-            return f"Unexpected error: {str(e)}"
+            return f"{ERROR_PREFIXES[1]} {str(e)}"
+
+
+def _compile_in_worker(
+    expression: str, variables: tuple[str, ...], max_nodes: int
+) -> CompiledExpression:
+    """Compile an expression in a worker process of the pool."""
+    return MathServer(max_nodes=max_nodes)._compile(expression, variables)
+
+
+_math_server: MathServer | None = None
+
+
+def get_math_server() -> MathServer:
+    """Get the process-wide math server, creating it on first use.
+
+    Returns
+    -------
+        The shared MathServer, whose compiled expression cache is shared by
+        all callers
+
+    """
+    global _math_server
+    if _math_server is None:
+        _math_server = MathServer()
+    return _math_server
+
+
+def close_math_server() -> None:
+    """Shut down the process-wide math server's worker processes."""
+    if _math_server is not None:
+        _math_server.close()
@@ -41,6 +41,7 @@ async def test_default_agent_initialization():
     assert agent.id == "default"
     assert agent.description == "A default agent that handles general queries and tasks"
     assert isinstance(agent.llm, ChatOpenAI)
+    assert agent.llm.max_retries == 0
 
 
 @pytest.mark.asyncio
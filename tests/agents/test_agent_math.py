@@ -10,7 +10,7 @@ from agents.agent_math import MathAgent
 @pytest.fixture
 def mock_math_server():
     """Mock the MathServer to simulate math calculations."""
-    with patch("agents.agent_math.MathServer") as mock:
+    with patch("agents.agent_math.get_math_server") as mock:
         mock_instance = AsyncMock()
         mock.return_value = mock_instance
         yield mock_instance
@@ -68,3 +68,27 @@ async def test_math_agent_complex_expression(math_agent, mock_math_server):
     # Verify
     assert result == "3.14159"
     mock_math_server.send_request.assert_called_once_with(input_text)
+
+
+def test_math_agent_match():
+    """Test that the math agent claims pure arithmetic only."""
+    assert MathAgent.match("2+3*4") == 1.0
+    assert MathAgent.match("what's the weather") == 0.0
+
+
+def test_math_agent_cacheable():
+    """Test that only results, not error messages, may be cached."""
+    assert MathAgent.cacheable("Result: 4.0")
+    assert not MathAgent.cacheable("Error evaluating expression: division by zero")
+    assert not MathAgent.cacheable("Unexpected error: worker died")
+
+
+@pytest.mark.asyncio
+async def test_math_agent_run_batch(math_agent, mock_math_server):
+    """Test that batches are evaluated by the math server."""
+    mock_math_server.send_batch.return_value = {"results": [1.0, 2.0], "errors": []}
+
+    result = await math_agent.run_batch("x + 1", {"x": [0, 1]})
+
+    assert result["results"] == [1.0, 2.0]
+    mock_math_server.send_batch.assert_called_once_with("x + 1", {"x": [0, 1]})
@@ -11,6 +11,7 @@ from unittest.mock import AsyncMock, patch
 import pytest
 
 from agents.agent_programming import ProgrammingAgent
+from llm.resilience import policy_for
 
 
 @pytest.fixture
@@ -35,6 +36,9 @@ async def test_programming_agent_initialization() -> None:
     assert agent.id == "programming"
     assert isinstance(agent.description, str)
     assert agent.llm is not None
+    # The call policy owns retries and timeouts, not the client
+    assert agent.llm.max_retries == 0
+    assert agent.llm.default_request_timeout is None
 
 
 @pytest.mark.asyncio
@@ -84,15 +88,17 @@ async def test_programming_agent_run_error_handling(
     programming_agent: ProgrammingAgent,
     mock_chat_anthropic: AsyncMock,
 ) -> None:
-    """Test that the agent handles errors gracefully."""
+    """Test that the agent retries failed calls before raising the error."""
     # Setup
     test_input = "Invalid request"
     test_context: dict[str, Any] = {}
     mock_chat_anthropic.ainvoke.side_effect = Exception("API Error")
 
     # Execute and verify
-    with pytest.raises(Exception) as exc_info:
-        await programming_agent.run(test_input, test_context)
+    with patch("llm.resilience.backoff_delay", return_value=0):
+        with pytest.raises(Exception) as exc_info:
+            await programming_agent.run(test_input, test_context)
 
     assert str(exc_info.value) == "API Error"
-    mock_chat_anthropic.ainvoke.assert_called_once_with(test_input)
+    assert mock_chat_anthropic.ainvoke.call_count == policy_for("programming").attempts
+    mock_chat_anthropic.ainvoke.assert_called_with(test_input)
@@ -0,0 +1,377 @@
+"""Tests for the API server."""
+
+import asyncio
+import json
+from collections.abc import Generator
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from agents.agent_math import MathAgent
+from api.server import app
+from conversations import thread_store
+from core.bulkhead import AgentOverloadedError
+from core.config import CONFIG
+
+
+@pytest.fixture
+def client() -> Generator[TestClient, None, None]:
+    """Create a test client that runs the application lifespan.
+
+    Returns
+    -------
+        Generator yielding a TestClient with agent loading mocked out.
+
+    """
+    with (
+        patch("api.server.load_agents") as mock_load,
+        patch("api.server.close_ollama_client", new_callable=AsyncMock) as mock_close,
+        patch(
+            "api.server.close_response_cache", new_callable=AsyncMock
+        ) as mock_close_cache,
+        patch("api.server.close_thread_store") as mock_close_threads,
+        patch("api.server.close_math_server") as mock_close_math,
+    ):
+        with TestClient(app) as test_client:
+            test_client.mock_load = mock_load
+            test_client.mock_close = mock_close
+            yield test_client
+        mock_close.assert_awaited_once()
+        mock_close_cache.assert_awaited_once()
+        mock_close_threads.assert_called_once()
+        mock_close_math.assert_called_once()
+
+
+@pytest.fixture
+def mock_run() -> Generator[AsyncMock, None, None]:
+    """Mock run_with_langgraph so no LLM is called."""
+    with patch("api.server.run_with_langgraph", new_callable=AsyncMock) as mock:
+        mock.return_value = "Test response"
+        yield mock
+
+
+@pytest.fixture
+def mock_render() -> Generator[MagicMock, None, None]:
+    """Mock render_graph so no diagram is rendered."""
+    with patch("api.server.render_graph") as mock:
+        yield mock
+
+
+def test_lifespan_loads_agents(client: TestClient) -> None:
+    """Test that agents are loaded once when the application starts."""
+    assert client.mock_load.call_count == 1
+
+
+@pytest.mark.parametrize(
+    ("flag", "enabled", "watching"),
+    [(None, False, False), (None, True, True), ("1", False, True), ("0", True, False)],
+)
+def test_lifespan_watches_agents(
+    flag: str | None, enabled: bool, watching: bool, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that the agents directory is watched while hot reload is on."""
+    if flag is None:
+        monkeypatch.delenv("WATCH_AGENTS", raising=False)
+    else:
+        monkeypatch.setenv("WATCH_AGENTS", flag)
+    state = {"started": False, "cancelled": False}
+
+    async def watch(interval: float) -> None:
+        state["started"] = True
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+
+    with (
+        patch.dict(CONFIG["hot_reload"], {"enabled": enabled}),
+        patch("api.server.load_agents"),
+        patch("api.server.watch_agents", side_effect=watch),
+        patch("api.server.close_ollama_client", new_callable=AsyncMock),
+        patch("api.server.close_response_cache", new_callable=AsyncMock),
+        patch("api.server.close_thread_store"),
+        patch("api.server.close_math_server"),
+    ):
+        with TestClient(app) as test_client:
+            test_client.get("/metrics")
+
+    assert state == {"started": watching, "cancelled": watching}
+
+
+def test_chat(client: TestClient, mock_run: AsyncMock) -> None:
+    """Test that the chat endpoint returns the graph response."""
+    response = client.post("/chat", json={"message": "Hello"})
+
+    assert response.status_code == 200
+    assert response.json() == {"response": "Test response"}
+    mock_run.assert_called_once_with("Hello")
+
+
+def test_chat_agent_overloaded(client: TestClient, mock_run: AsyncMock) -> None:
+    """Test that an overloaded agent is reported as 503 with Retry-After."""
+    mock_run.side_effect = AgentOverloadedError("programming", 1.5)
+
+    response = client.post("/chat", json={"message": "Hello"})
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "2"
+    assert "programming" in response.json()["detail"]
+
+
+@pytest.fixture
+def math_registry() -> Generator[None, None, None]:
+    """Register only the math agent."""
+    registry = {"math": {"factory": MathAgent, "instance": None}}
+    with patch.dict("api.server.AGENT_REGISTRY", registry, clear=True):
+        yield
+
+
+def test_math_batch(client: TestClient, math_registry: None) -> None:
+    """Test evaluating an expression over many variable bindings."""
+    response = client.post(
+        "/math/batch",
+        json={"expression": "a * x + 1", "variables": {"x": [1, 0, 2], "a": 3}},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"results": [4.0, 1.0, 7.0], "errors": []}
+
+
+def test_math_batch_invalid(client: TestClient, math_registry: None) -> None:
+    """Test that an invalid batch is rejected with 400."""
+    response = client.post(
+        "/math/batch", json={"expression": "x + y", "variables": {"x": [1]}}
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown variable: y"
+
+
+@pytest.mark.parametrize(
+    ("expression", "detail"),
+    [
+        ("x + 1" + "0" * 400, "Number is too large to represent"),
+        ("-" * 3000 + "x", "Expression is too deeply nested"),
+    ],
+)
+def test_math_batch_unparseable(
+    client: TestClient, math_registry: None, expression: str, detail: str
+) -> None:
+    """Test that literals and nesting Python can't handle are rejected with 400."""
+    response = client.post(
+        "/math/batch", json={"expression": expression, "variables": {"x": [1]}}
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == detail
+
+
+def test_math_batch_agent_disabled(client: TestClient) -> None:
+    """Test that the batch endpoint needs the math agent."""
+    with patch.dict("api.server.AGENT_REGISTRY", {}, clear=True):
+        response = client.post(
+            "/math/batch", json={"expression": "x", "variables": {"x": [1]}}
+        )
+
+    assert response.status_code == 404
+
+
+def test_graph_png(client: TestClient, mock_render: MagicMock) -> None:
+    """Test that the graph endpoint serves a PNG by default."""
+    mock_render.return_value = b"\x89PNG"
+
+    response = client.get("/graph")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    assert response.content == b"\x89PNG"
+    mock_render.assert_called_once_with("png")
+
+
+def test_graph_mermaid(client: TestClient, mock_render: MagicMock) -> None:
+    """Test that the graph endpoint can serve Mermaid source."""
+    mock_render.return_value = "graph TD;"
+
+    response = client.get("/graph", params={"format": "mermaid"})
+
+    assert response.status_code == 200
+    assert response.text == "graph TD;"
+    mock_render.assert_called_once_with("mermaid")
+
+
+def test_graph_invalid_format(client: TestClient, mock_render: MagicMock) -> None:
+    """Test that an unsupported format is rejected."""
+    response = client.get("/graph", params={"format": "svg"})
+
+    assert response.status_code == 400
+    mock_render.assert_not_called()
+
+
+def test_threads(client: TestClient) -> None:
+    """Test listing threads and fetching a thread."""
+    with patch("api.server.list_threads", return_value=["t1"]):
+        assert client.get("/threads").json() == {"threads": ["t1"]}
+    with patch("api.server.get_thread", return_value=[{"content": "hi"}]):
+        assert client.get("/thread/t1").json() == {
+            "messages": [{"content": "hi"}],
+            "next_before": None,
+        }
+
+
+def test_thread_pagination(client: TestClient) -> None:
+    """Test reading a thread a page at a time, newest page first."""
+    store = thread_store.MemoryThreadStore()
+    store.save_messages("t1", [("user", str(n)) for n in range(5)])
+
+    with patch.object(thread_store, "_thread_store", store):
+        first = client.get("/thread/t1", params={"limit": 2}).json()
+        second = client.get(
+            "/thread/t1", params={"limit": 2, "before": first["next_before"]}
+        ).json()
+        last = client.get(
+            "/thread/t1", params={"limit": 2, "before": second["next_before"]}
+        ).json()
+
+    assert [m["content"] for m in first["messages"]] == ["3", "4"]
+    assert [m["content"] for m in second["messages"]] == ["1", "2"]
+    assert [m["content"] for m in last["messages"]] == ["0"]
+    assert last["next_before"] is None
+
+
+def test_thread_rejects_invalid_limit(client: TestClient) -> None:
+    """Test that a page size outside the allowed range is rejected."""
+    assert client.get("/thread/t1", params={"limit": 0}).status_code == 422
+
+
+def test_metrics(client: TestClient) -> None:
+    """Test that the metrics endpoint returns the collected stats."""
+    with patch("api.server.collect_stats", return_value={"cache": {"hits": 1}}):
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.json() == {"cache": {"hits": 1}}
+
+
+@pytest.fixture
+def mock_stream() -> Generator[MagicMock, None, None]:
+    """Mock stream_with_langgraph to yield a fixed sequence of events."""
+    events = [
+        {"type": "route", "agent_id": "writing"},
+        {"type": "token", "content": "Hel"},
+        {"type": "token", "content": "lo"},
+        {"type": "done", "agent_id": "writing", "response": "Hello"},
+    ]
+
+    async def stream(message: str):
+        for event in events:
+            yield event
+
+    with patch("api.server.stream_with_langgraph", side_effect=stream) as mock:
+        mock.events = events
+        yield mock
+
+
+def test_chat_stream_sse(client: TestClient, mock_stream: MagicMock) -> None:
+    """Test streaming a chat response as Server-Sent Events."""
+    response = client.post("/chat/stream", json={"message": "Hello"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    frames = [f for f in response.text.split("\n\n") if f]
+    assert len(frames) == len(mock_stream.events)
+    assert frames[1] == 'event: token\ndata: {"type": "token", "content": "Hel"}'
+    mock_stream.assert_called_once_with("Hello")
+
+
+def test_chat_stream_ndjson(client: TestClient, mock_stream: MagicMock) -> None:
+    """Test streaming a chat response as newline-delimited JSON."""
+    response = client.post(
+        "/chat/stream", params={"format": "ndjson"}, json={"message": "Hello"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == mock_stream.events
+
+
+def test_chat_stream_error(client: TestClient) -> None:
+    """Test that a failure mid-stream is reported as an error event."""
+
+    async def failing(message: str):
+        yield {"type": "route", "agent_id": "writing"}
+        raise RuntimeError("Provider down")
+
+    with patch("api.server.stream_with_langgraph", side_effect=failing):
+        response = client.post(
+            "/chat/stream", params={"format": "ndjson"}, json={"message": "Hello"}
+        )
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[-1] == {"type": "error", "message": "Provider down"}
+
+
+def test_chat_stream_invalid_format(client: TestClient) -> None:
+    """Test that an unsupported stream format is rejected."""
+    response = client.post(
+        "/chat/stream", params={"format": "xml"}, json={"message": "Hello"}
+    )
+
+    assert response.status_code == 400
+
+
+def test_chat_batch(client: TestClient) -> None:
+    """Test that batch results are returned in input order."""
+    results = [
+        {"type": "result", "index": 0, "agent_id": "math", "response": "4"},
+        {"type": "result", "index": 1, "agent_id": "writing", "response": "Hi"},
+    ]
+    with patch(
+        "api.server.run_batch", new_callable=AsyncMock, return_value=results
+    ) as mock:
+        response = client.post("/chat/batch", json={"messages": ["2+2", "Hello"]})
+
+    assert response.status_code == 200
+    assert response.json() == {"results": results}
+    mock.assert_called_once_with(["2+2", "Hello"])
+
+
+def test_chat_batch_stream(client: TestClient) -> None:
+    """Test that batch results can be streamed as they complete."""
+    results = [
+        {"type": "result", "index": 1, "agent_id": "writing", "response": "Hi"},
+        {"type": "result", "index": 0, "agent_id": "math", "response": "4"},
+    ]
+
+    async def stream(messages: list[str]):
+        for result in results:
+            yield result
+
+    with patch("api.server.stream_batch", side_effect=stream):
+        response = client.post(
+            "/chat/batch",
+            params={"format": "ndjson"},
+            json={"messages": ["2+2", "Hello"]},
+        )
+
+    assert response.status_code == 200
+    assert [json.loads(line) for line in response.text.splitlines()] == results
+
+
+def test_chat_batch_rejects_large_batches(client: TestClient) -> None:
+    """Test that batches over the configured size are rejected."""
+    with patch.dict(CONFIG["batch"], {"max_size": 1}):
+        response = client.post("/chat/batch", json={"messages": ["a", "b"]})
+
+    assert response.status_code == 400
+
+
+def test_chat_batch_invalid_format(client: TestClient) -> None:
+    """Test that an unsupported batch stream format is rejected."""
+    response = client.post(
+        "/chat/batch", params={"format": "xml"}, json={"messages": ["a"]}
+    )
+
+    assert response.status_code == 400
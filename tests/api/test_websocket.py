@@ -0,0 +1,220 @@
+"""Tests for the WebSocket chat endpoint."""
+
+import asyncio
+from collections.abc import Generator
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.server import app
+from api.websocket import ChatConnection
+from conversations import thread_store
+from core.config import CONFIG
+
+
+@pytest.fixture
+def client() -> Generator[TestClient, None, None]:
+    """Create a test client with agent loading mocked out."""
+    with (
+        patch("api.server.load_agents"),
+        patch("api.server.close_ollama_client", new_callable=AsyncMock),
+    ):
+        with TestClient(app) as test_client:
+            yield test_client
+
+
+@pytest.fixture
+def mock_stream() -> Generator[MagicMock, None, None]:
+    """Mock stream_with_langgraph to echo the message back as one chat."""
+
+    async def stream(message: str, thread_id: str | None = None):
+        yield {"type": "route", "agent_id": "writing"}
+        yield {"type": "token", "content": message}
+        yield {"type": "done", "agent_id": "writing", "response": message}
+
+    with patch("api.websocket.stream_with_langgraph", side_effect=stream) as mock:
+        yield mock
+
+
+@pytest.fixture
+def clean_threads() -> Generator[None, None, None]:
+    """Use an empty in-memory thread store for a test."""
+    with patch.object(thread_store, "_thread_store", thread_store.MemoryThreadStore()):
+        yield
+
+
+def _receive_until_done(ws, count: int) -> list[dict]:
+    """Receive events until ``count`` chats have finished."""
+    events = []
+    finished = 0
+    while finished < count:
+        event = ws.receive_json()
+        events.append(event)
+        if event["type"] in ("done", "error", "cancelled"):
+            finished += 1
+    return events
+
+
+def test_websocket_chat(client: TestClient, mock_stream: MagicMock) -> None:
+    """Test that a chat's events are streamed back tagged with its id."""
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"type": "chat", "id": "m1", "message": "Hello"})
+        events = _receive_until_done(ws, 1)
+
+    assert [e["type"] for e in events] == ["route", "token", "done"]
+    assert all(e["id"] == "m1" and e["thread_id"] is None for e in events)
+    assert events[-1]["response"] == "Hello"
+
+
+def test_websocket_multiplexes_chats(
+    client: TestClient, mock_stream: MagicMock
+) -> None:
+    """Test that several chats can be in flight on one connection."""
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"type": "chat", "id": "a", "message": "first"})
+        ws.send_json({"type": "chat", "id": "b", "message": "second"})
+        events = _receive_until_done(ws, 2)
+
+    done = {e["id"]: e["response"] for e in events if e["type"] == "done"}
+    assert done == {"a": "first", "b": "second"}
+
+
+def test_websocket_saves_thread(
+    client: TestClient, mock_stream: MagicMock, clean_threads: None
+) -> None:
+    """Test that a chat with a thread id is stored in the thread."""
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"type": "chat", "id": "m1", "thread_id": "t1", "message": "Hi"})
+        events = _receive_until_done(ws, 1)
+
+    assert events[-1]["thread_id"] == "t1"
+    messages = thread_store.get_thread("t1")
+    assert [(m["sender"], m["content"]) for m in messages] == [
+        ("user", "Hi"),
+        ("writing", "Hi"),
+    ]
+    mock_stream.assert_called_once_with("Hi", "t1")
+
+
+def test_websocket_cancel(client: TestClient) -> None:
+    """Test that an in-flight chat can be cancelled."""
+
+    async def stalled(message: str, thread_id: str | None):
+        yield {"type": "route", "agent_id": "writing"}
+        await asyncio.Event().wait()
+
+    with patch("api.websocket.stream_with_langgraph", side_effect=stalled):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "chat", "id": "m1", "message": "Hello"})
+            assert ws.receive_json()["type"] == "route"
+            ws.send_json({"type": "cancel", "id": "m1"})
+            event = ws.receive_json()
+
+    assert event == {"type": "cancelled", "id": "m1", "thread_id": None}
+
+
+def test_websocket_chat_error(client: TestClient) -> None:
+    """Test that a failing chat reports an error event."""
+
+    async def failing(message: str, thread_id: str | None):
+        raise RuntimeError("Provider down")
+        yield
+
+    with patch("api.websocket.stream_with_langgraph", side_effect=failing):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "chat", "id": "m1", "message": "Hello"})
+            event = ws.receive_json()
+
+    assert event == {
+        "type": "error",
+        "id": "m1",
+        "thread_id": None,
+        "message": "Provider down",
+    }
+
+
+@pytest.mark.parametrize(
+    ("message", "error"),
+    [
+        ("not json", "Invalid JSON"),
+        ("[]", "Expected an object"),
+        ('{"type": "chat"}', "Missing message id"),
+        ('{"type": "chat", "id": "m1"}', "Missing message text"),
+        (
+            '{"type": "chat", "id": "m1", "thread_id": {}, "message": "Hi"}',
+            "thread_id must be a string",
+        ),
+        ('{"type": "cancel", "id": "m1"}', "Unknown message id"),
+        ('{"type": "ping", "id": "m1"}', "Unsupported type: ping"),
+    ],
+)
+def test_websocket_invalid_messages(
+    client: TestClient, message: str, error: str
+) -> None:
+    """Test that malformed client messages are answered with errors."""
+    with client.websocket_connect("/ws") as ws:
+        ws.send_text(message)
+        event = ws.receive_json()
+
+    assert event["type"] == "error"
+    assert event["message"] == error
+
+
+def test_websocket_in_flight_limit(client: TestClient) -> None:
+    """Test that chats beyond the per-connection limit are rejected."""
+
+    async def stalled(message: str, thread_id: str | None):
+        yield {"type": "route", "agent_id": "writing"}
+        await asyncio.Event().wait()
+
+    with (
+        patch.dict(CONFIG["websocket"], {"max_in_flight": 1}),
+        patch("api.websocket.stream_with_langgraph", side_effect=stalled),
+    ):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "chat", "id": "a", "message": "first"})
+            assert ws.receive_json()["type"] == "route"
+            ws.send_json({"type": "chat", "id": "a", "message": "again"})
+            duplicate = ws.receive_json()
+            ws.send_json({"type": "chat", "id": "b", "message": "second"})
+            rejected = ws.receive_json()
+
+    assert duplicate["message"] == "Message id already in flight"
+    assert rejected["message"] == "Too many in-flight messages"
+
+
+@pytest.mark.asyncio
+async def test_errors_do_not_wait_for_slow_client() -> None:
+    """Test that error replies are dropped, not waited on, when the queue is full."""
+    stalled = asyncio.create_task(asyncio.Event().wait())
+    with patch.dict(CONFIG["websocket"], {"send_queue_size": 1}):
+        connection = ChatConnection(MagicMock())
+    connection.tasks["m1"] = stalled
+    connection.outbox.put_nowait({"type": "token", "content": "queued"})
+
+    await asyncio.wait_for(connection.handle({"type": "ping", "id": "m2"}), 1)
+    await asyncio.wait_for(connection.handle({"type": "cancel", "id": "m1"}), 1)
+
+    with pytest.raises(asyncio.CancelledError):
+        await stalled
+    assert connection.outbox.get_nowait()["content"] == "queued"
+
+
+@pytest.mark.asyncio
+async def test_chat_waits_for_slow_client(mock_stream: MagicMock) -> None:
+    """Test that a full send queue makes the chat wait instead of buffering."""
+    websocket = MagicMock()
+    with patch.dict(CONFIG["websocket"], {"send_queue_size": 1}):
+        connection = ChatConnection(websocket)
+
+    task = asyncio.create_task(connection.chat("m1", None, "Hello"))
+    await asyncio.sleep(0.01)
+
+    assert not task.done()
+    assert connection.outbox.qsize() == 1
+
+    while not task.done():
+        await connection.outbox.get()
+        await asyncio.sleep(0)
+    await task
@@ -8,7 +8,7 @@ from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 
-from cli.cli import main
+from cli.cli import main, parse_args, write_graph
 
 
 @pytest.fixture
@@ -37,6 +37,9 @@ def mock_core_functions():
     with (
         patch("cli.cli.load_agents") as mock_load,
         patch("cli.cli.run_with_langgraph", new_callable=AsyncMock) as mock_run,
+        patch("cli.cli.close_ollama_client", new_callable=AsyncMock),
+        patch("cli.cli.close_thread_store"),
+        patch("cli.cli.close_math_server"),
     ):
         yield mock_load, mock_run
 
@@ -94,6 +97,17 @@ async def test_cli_exit_immediately(mock_inquirer, mock_core_functions):
     assert mock_run.call_count == 0
 
 
+@pytest.mark.asyncio
+async def test_cli_shuts_down_math_server(mock_inquirer, mock_core_functions):
+    """Test that the math server's worker pool is shut down on exit."""
+    mock_inquirer.text.return_value = "exit"
+
+    with patch("cli.cli.close_math_server") as mock_close_math:
+        await main()
+
+    mock_close_math.assert_called_once()
+
+
 @pytest.mark.asyncio
 async def test_cli_quit_command(mock_inquirer, mock_core_functions):
     """Test that the CLI exits when 'quit' is entered.
@@ -141,3 +155,83 @@ async def test_cli_error_handling(mock_inquirer, mock_core_functions):
     # Verify the interactions
     assert mock_load.call_count == 1
     assert mock_run.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_cli_closes_ollama_client(mock_inquirer, mock_core_functions):
+    """Test that the shared Ollama client is closed when the CLI exits.
+
+    Args:
+    ----
+        mock_inquirer: Mocked inquirer module for simulating user input.
+        mock_core_functions: Tuple of mocked core functions
+        (load_agents, run_with_langgraph).
+
+    """
+    mock_inquirer.text.return_value = "exit"
+
+    with (
+        patch("cli.cli.close_ollama_client", new_callable=AsyncMock) as mock_close,
+        patch("cli.cli.close_thread_store") as mock_close_threads,
+    ):
+        await main()
+
+    mock_close.assert_awaited_once()
+    mock_close_threads.assert_called_once()
+
+
+def test_parse_args_graph_command():
+    """Test parsing the graph subcommand and its options."""
+    args = parse_args(["graph", "--output", "out.mmd", "--format", "mermaid"])
+
+    assert args.command == "graph"
+    assert args.output == "out.mmd"
+    assert args.format == "mermaid"
+
+
+def test_parse_args_chat_watch():
+    """Test parsing the chat subcommand with agent watching."""
+    assert parse_args(["chat", "--watch"]).watch is True
+    assert parse_args(["chat"]).watch is False
+
+
+@pytest.mark.asyncio
+async def test_cli_watch_reloads_agents(mock_inquirer, mock_core_functions):
+    """Test that watch mode checks for changed agents before each message."""
+    mock_inquirer.text.side_effect = ["Hello", "exit"]
+    _, mock_run = mock_core_functions
+    mock_run.return_value = "Hi"
+
+    with patch("cli.cli.reload_agents") as mock_reload:
+        await main(watch=True)
+
+    mock_reload.assert_called_once()
+
+
+def test_parse_args_defaults_to_chat():
+    """Test that no subcommand leaves the command unset so chat runs."""
+    args = parse_args([])
+
+    assert args.command is None
+
+
+def test_write_graph(tmp_path, mock_core_functions):
+    """Test that the graph subcommand renders the graph to a file.
+
+    Args:
+    ----
+        tmp_path: Temporary directory provided by pytest.
+        mock_core_functions: Tuple of mocked core functions
+        (load_agents, run_with_langgraph).
+
+    """
+    mock_load, mock_run = mock_core_functions
+    output = tmp_path / "graph.png"
+
+    with patch("cli.cli.render_graph", return_value=b"png-bytes") as mock_render:
+        write_graph(str(output), "png")
+
+    assert mock_load.call_count == 1
+    mock_render.assert_called_once_with("png")
+    assert output.read_bytes() == b"png-bytes"
+    assert mock_run.call_count == 0
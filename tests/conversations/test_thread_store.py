@@ -0,0 +1,471 @@
+"""Tests for the thread store module."""
+
+import sqlite3
+import time
+from collections.abc import Generator
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from conversations import thread_store
+from conversations.thread_store import (
+    MemoryThreadStore,
+    SQLiteThreadStore,
+    ThreadStore,
+    WriteBehindThreadStore,
+)
+from core.config import CONFIG
+from core.metrics import collect_stats
+
+
+@pytest.fixture(params=["memory", "sqlite", "write_behind"])
+def store(request, tmp_path: Path) -> Generator[ThreadStore, None, None]:
+    """Create an empty store of each backend."""
+    if request.param == "memory":
+        store: ThreadStore = MemoryThreadStore()
+    elif request.param == "sqlite":
+        store = SQLiteThreadStore(tmp_path / "threads.db")
+    else:
+        store = WriteBehindThreadStore(SQLiteThreadStore(tmp_path / "threads.db"))
+    yield store
+    store.close()
+
+
+def test_save_and_get_thread(store: ThreadStore) -> None:
+    """Test that messages are returned in the order they were saved."""
+    store.save_messages("t1", [("user", "Hi")])
+    store.save_messages("t1", [("writing", "Hello")])
+
+    messages = store.get_thread("t1")
+    assert [(m["sender"], m["content"]) for m in messages] == [
+        ("user", "Hi"),
+        ("writing", "Hello"),
+    ]
+    assert messages[0]["id"] < messages[1]["id"]
+    assert "timestamp" in messages[0]
+    assert store.get_thread("missing") == []
+
+
+def test_list_threads(store: ThreadStore) -> None:
+    """Test that threads are listed in the order they were created."""
+    store.save_messages("b", [("user", "1")])
+    store.save_messages("a", [("user", "2")])
+    store.save_messages("b", [("user", "3")])
+
+    assert store.list_threads() == ["b", "a"]
+
+
+def test_get_thread_pages(store: ThreadStore) -> None:
+    """Test paging backwards through a thread with limit and before."""
+    store.save_messages("t1", [("user", str(n)) for n in range(5)])
+    store.save_messages("t2", [("user", "other")])
+
+    page = store.get_thread("t1", limit=2)
+    assert [m["content"] for m in page] == ["3", "4"]
+    page = store.get_thread("t1", limit=2, before=page[0]["id"])
+    assert [m["content"] for m in page] == ["1", "2"]
+    page = store.get_thread("t1", limit=2, before=page[0]["id"])
+    assert [m["content"] for m in page] == ["0"]
+    assert store.get_thread("t1", before=page[0]["id"]) == []
+
+
+def test_memory_store_is_columnar() -> None:
+    """Test that messages are stored as columns and rebuilt on read."""
+    store = MemoryThreadStore()
+    with patch("conversations.thread_store.time.time_ns", return_value=1_500_000):
+        store.save_messages("t1", [("user", "Hi"), ("writing", "Hello")])
+        store.save_messages("t2", [("user", "Hey")])
+
+    assert store.senders == ["user", "writing"]
+    assert list(store.threads["t1"].senders) == [0, 1]
+    assert store.get_thread("t1")[0] == {
+        "id": 0,
+        "sender": "user",
+        "content": "Hi",
+        "timestamp": "1970-01-01T00:00:00.001500",
+    }
+
+
+def test_memory_store_caps_thread_length() -> None:
+    """Test that the oldest messages of a long thread are dropped."""
+    store = MemoryThreadStore(max_thread_messages=3)
+    store.save_messages("t1", [("user", str(n)) for n in range(5)])
+
+    messages = store.get_thread("t1")
+    assert [(m["id"], m["content"]) for m in messages] == [(2, "2"), (3, "3"), (4, "4")]
+    assert [m["content"] for m in store.get_thread("t1", limit=1, before=4)] == ["3"]
+    assert store.get_thread("t1", before=1) == []
+    assert store.stats()["messages"] == 3
+    assert store.stats()["trimmed_messages"] == 2
+
+
+def test_memory_store_evicts_least_recently_used() -> None:
+    """Test that the least recently used thread goes when over budget."""
+    store = MemoryThreadStore(max_messages=4)
+    store.save_messages("a", [("user", "1"), ("user", "2")])
+    store.save_messages("b", [("user", "3"), ("user", "4")])
+    store.get_thread("a")
+    store.save_messages("c", [("user", "5")])
+
+    assert store.list_threads() == ["a", "c"]
+    assert store.get_thread("b") == []
+    assert store.stats()["evicted_lru"] == 1
+
+
+def test_memory_store_byte_budget() -> None:
+    """Test that the byte footprint is tracked and bounded."""
+    store = MemoryThreadStore(max_bytes=500)
+    store.save_messages("a", [("user", "x" * 200)])
+    assert 200 < store.stats()["bytes"] < 500
+
+    store.save_messages("b", [("user", "y" * 400)])
+
+    assert store.list_threads() == ["b"]
+    assert store.stats()["bytes"] < 500 + 400
+
+
+def test_memory_store_evicts_idle_threads() -> None:
+    """Test that threads unused for the idle TTL are evicted."""
+    store = MemoryThreadStore(idle_ttl_seconds=60)
+    with patch("conversations.thread_store.time.monotonic", return_value=1000.0):
+        store.save_messages("a", [("user", "1")])
+    with patch("conversations.thread_store.time.monotonic", return_value=1030.0):
+        store.save_messages("b", [("user", "2")])
+    with patch("conversations.thread_store.time.monotonic", return_value=1070.0):
+        assert store.list_threads() == ["b"]
+
+    assert store.stats()["evicted_idle"] == 1
+
+
+def test_memory_store_spills_and_reloads(tmp_path: Path) -> None:
+    """Test that evicted threads are written to disk and read back on use."""
+    store = MemoryThreadStore(max_messages=2, spill_dir=tmp_path)
+    store.save_messages("a", [("user", "1"), ("writing", "2")])
+    store.save_messages("b", [("user", "3")])
+
+    assert store.stats()["spilled_threads"] == 1
+    assert store.list_threads() == ["a", "b"]
+    assert len(list(tmp_path.iterdir())) == 1
+
+    messages = store.get_thread("a")
+    assert [(m["sender"], m["content"]) for m in messages] == [
+        ("user", "1"),
+        ("writing", "2"),
+    ]
+    assert store.stats()["reloaded"] == 1
+    assert store.get_thread("b")[0]["content"] == "3"
+
+    store.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_memory_store_reload_stays_within_budget(tmp_path: Path) -> None:
+    """Test that reading a spilled thread back evicts others to make room."""
+    store = MemoryThreadStore(max_messages=2, spill_dir=tmp_path)
+    store.save_messages("a", [("user", "1"), ("writing", "2")])
+    store.save_messages("b", [("user", "3"), ("writing", "4")])
+
+    for thread_id in ["a", "b", "a"]:
+        assert len(store.get_thread(thread_id)) == 2
+        stats = store.stats()
+        assert stats["messages"] <= 2
+        assert stats["threads"] == 1
+
+    assert store.stats()["reloaded"] == 3
+    store.close()
+
+
+def test_memory_store_treats_missing_spill_file_as_lost(tmp_path: Path) -> None:
+    """Test that a thread whose spill file is gone reads back as empty."""
+    store = MemoryThreadStore(max_messages=1, spill_dir=tmp_path)
+    store.save_messages("a", [("user", "1")])
+    store.save_messages("b", [("user", "2")])
+    for path in tmp_path.iterdir():
+        path.unlink()
+
+    assert store.get_thread("a") == []
+    assert store.list_threads() == ["b"]
+    assert store.stats()["lost"] == 1
+
+    store.save_messages("a", [("user", "3")])
+    assert [m["content"] for m in store.get_thread("a")] == ["3"]
+    store.close()
+
+
+def test_memory_store_keeps_thread_when_spill_fails(tmp_path: Path) -> None:
+    """Test that a thread is kept in memory if it cannot be written to disk."""
+    store = MemoryThreadStore(max_messages=1, spill_dir=tmp_path)
+    store.save_messages("a", [("user", "1")])
+
+    with patch.object(Path, "write_text", side_effect=OSError("disk full")):
+        store.save_messages("b", [("user", "2")])
+
+    stats = store.stats()
+    assert stats["spill_errors"] == 1
+    assert stats["spilled"] == 0
+    assert stats["messages"] == 2
+    assert [m["content"] for m in store.get_thread("a")] == ["1"]
+    store.close()
+
+
+def test_thread_store_stats_registered() -> None:
+    """Test that the store's footprint is exposed through the metrics registry."""
+    store = MemoryThreadStore()
+    store.save_messages("t1", [("user", "Hi")])
+
+    with patch.object(thread_store, "_thread_store", store):
+        stats = collect_stats()["thread_store"]
+    assert stats["backend"] == "memory"
+    assert stats["messages"] == 1
+
+
+def test_sqlite_persists_across_stores(tmp_path: Path) -> None:
+    """Test that messages survive closing and reopening the database."""
+    path = tmp_path / "threads.db"
+    store = SQLiteThreadStore(path, batch_size=100, commit_interval=60)
+    store.save_messages("t1", [("user", "Hi"), ("writing", "Hello")])
+    store.close()
+
+    reopened = SQLiteThreadStore(path)
+    assert [m["content"] for m in reopened.get_thread("t1")] == ["Hi", "Hello"]
+    reopened.close()
+
+
+def test_sqlite_commits_in_batches(tmp_path: Path) -> None:
+    """Test that messages are committed once a batch is full."""
+    path = tmp_path / "threads.db"
+    writer = SQLiteThreadStore(path, batch_size=3, commit_interval=60)
+    reader = SQLiteThreadStore(path)
+
+    writer.save_messages("t1", [("user", "1"), ("user", "2")])
+    assert reader.get_thread("t1") == []
+    assert writer.stats()["pending"] == 2
+
+    writer.save_messages("t1", [("user", "3")])
+    assert len(reader.get_thread("t1")) == 3
+    assert writer.stats()["pending"] == 0
+
+    writer.save_messages("t1", [("user", "4")])
+    assert len(writer.get_thread("t1")) == 4
+    assert len(reader.get_thread("t1")) == 4
+    writer.close()
+    reader.close()
+
+
+def test_sqlite_commits_partial_batches_on_a_timer(tmp_path: Path) -> None:
+    """Test that an idle store commits its last messages by itself."""
+    path = tmp_path / "threads.db"
+    writer = SQLiteThreadStore(path, batch_size=100, commit_interval=0.05)
+    reader = SQLiteThreadStore(path)
+
+    writer.save_messages("t1", [("user", "Hi")])
+    deadline = time.monotonic() + 5
+    while not reader.get_thread("t1") and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert [m["content"] for m in reader.get_thread("t1")] == ["Hi"]
+    writer.close()
+    reader.close()
+
+
+def test_sqlite_stores_share_a_database(tmp_path: Path) -> None:
+    """Test that pending messages don't lock other workers out."""
+    path = tmp_path / "threads.db"
+    first = SQLiteThreadStore(path, batch_size=100, commit_interval=60)
+    second = SQLiteThreadStore(path, batch_size=100, commit_interval=60)
+    second.connection.execute("PRAGMA busy_timeout=100")
+
+    first.save_messages("t1", [("user", "Hi")])
+    second.save_messages("t2", [("user", "Hey")])
+    second.flush()
+
+    assert [m["content"] for m in first.get_thread("t2")] == ["Hey"]
+    assert [m["content"] for m in second.get_thread("t1")] == ["Hi"]
+    first.close()
+    second.close()
+
+
+def test_write_behind_groups_commits(tmp_path: Path) -> None:
+    """Test that queued messages of several threads are committed together."""
+    path = tmp_path / "threads.db"
+    store = WriteBehindThreadStore(
+        SQLiteThreadStore(path, batch_size=1000, commit_interval=60),
+        batch_size=1000,
+        flush_interval=60,
+    )
+    reader = SQLiteThreadStore(path)
+
+    store.save_messages("t1", [("user", "Hi")])
+    store.save_messages("t2", [("user", "Hey")])
+    assert store.stats()["queue_depth"] == 2
+    assert reader.list_threads() == []
+
+    assert store.list_threads() == ["t1", "t2"]
+    assert reader.list_threads() == ["t1", "t2"]
+    stats = store.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["commits"] == 1
+    assert stats["committed"] == 2
+    assert stats["commit_p95_ms"] is not None
+    store.close()
+    reader.close()
+
+
+def test_write_behind_flushes_when_batch_is_full(tmp_path: Path) -> None:
+    """Test that a full batch wakes the writer thread."""
+    path = tmp_path / "threads.db"
+    store = WriteBehindThreadStore(SQLiteThreadStore(path), batch_size=2)
+    reader = SQLiteThreadStore(path)
+
+    store.save_messages("t1", [("user", "1"), ("writing", "2")])
+    for _ in range(100):
+        if reader.get_thread("t1"):
+            break
+        time.sleep(0.01)
+
+    assert len(reader.get_thread("t1")) == 2
+    store.close()
+    reader.close()
+
+
+def test_write_behind_flushes_on_close(tmp_path: Path) -> None:
+    """Test that closing the store writes every queued message."""
+    path = tmp_path / "threads.db"
+    store = WriteBehindThreadStore(SQLiteThreadStore(path), flush_interval=60)
+    store.save_messages("t1", [("user", "Hi")])
+    store.close()
+
+    reopened = SQLiteThreadStore(path)
+    assert [m["content"] for m in reopened.get_thread("t1")] == ["Hi"]
+    reopened.close()
+
+
+def test_write_behind_keeps_messages_after_failure(tmp_path: Path) -> None:
+    """Test that messages stay queued when a write fails."""
+    store = WriteBehindThreadStore(
+        SQLiteThreadStore(tmp_path / "threads.db"), flush_interval=60
+    )
+    store.save_messages("t1", [("user", "Hi")])
+
+    with (
+        patch.object(store.store, "save_batch", side_effect=sqlite3.OperationalError),
+        pytest.raises(sqlite3.OperationalError),
+    ):
+        store.flush()
+
+    assert store.stats()["errors"] == 1
+    assert store.stats()["queue_depth"] == 1
+    assert store.get_thread("t1")[0]["content"] == "Hi"
+    store.close()
+
+
+def test_write_behind_retries_failed_commit_once(tmp_path: Path) -> None:
+    """Test that a batch whose commit failed is written exactly once."""
+
+    class LockedOnce:
+        """Connection proxy whose first insert fails as if the database is locked."""
+
+        def __init__(self, connection: sqlite3.Connection) -> None:
+            self.connection = connection
+            self.failed = False
+
+        def __getattr__(self, name: str):
+            return getattr(self.connection, name)
+
+        def executemany(self, *args):
+            if not self.failed:
+                self.failed = True
+                raise sqlite3.OperationalError("database is locked")
+            return self.connection.executemany(*args)
+
+    store = WriteBehindThreadStore(
+        SQLiteThreadStore(tmp_path / "threads.db"), flush_interval=60
+    )
+    store.store.connection = LockedOnce(store.store.connection)
+    store.save_messages("t1", [("user", "hello")])
+
+    with pytest.raises(sqlite3.OperationalError):
+        store.flush()
+    store.flush()
+
+    assert [m["content"] for m in store.get_thread("t1")] == ["hello"]
+    store.store.connection = store.store.connection.connection
+    store.close()
+
+
+@pytest.mark.parametrize(
+    ("durability", "expected"),
+    [("sync", 1), ("group", 32), ("async", None)],
+)
+def test_durability_modes(
+    tmp_path: Path, durability: str, expected: int | None
+) -> None:
+    """Test that the durability mode selects how SQLite writes are committed."""
+    settings = {
+        "backend": "sqlite",
+        "path": str(tmp_path / "threads.db"),
+        "durability": durability,
+        "batch_size": 32,
+    }
+    with (
+        patch.dict(CONFIG["thread_store"], settings),
+        patch.object(thread_store, "_thread_store", None),
+    ):
+        store = thread_store.get_thread_store()
+        if expected is None:
+            assert isinstance(store, WriteBehindThreadStore)
+        else:
+            assert store.batch_size == expected
+        thread_store.close_thread_store()
+
+
+def test_unknown_durability(tmp_path: Path) -> None:
+    """Test that an unknown durability mode is rejected."""
+    settings = {"backend": "sqlite", "durability": "eventual"}
+    with (
+        patch.dict(CONFIG["thread_store"], settings),
+        patch.object(thread_store, "_thread_store", None),
+        pytest.raises(ValueError, match="Unknown thread store durability"),
+    ):
+        thread_store.get_thread_store()
+
+
+def test_sqlite_uses_wal(tmp_path: Path) -> None:
+    """Test that the database runs in WAL mode."""
+    store = SQLiteThreadStore(tmp_path / "threads.db")
+    mode = store.connection.execute("PRAGMA journal_mode").fetchone()[0]
+    store.close()
+
+    assert mode == "wal"
+
+
+def test_module_functions_use_configured_backend(tmp_path: Path) -> None:
+    """Test that the module functions go through the configured store."""
+    settings = {
+        "backend": "sqlite",
+        "path": str(tmp_path / "db" / "threads.db"),
+        "durability": "group",
+    }
+    with (
+        patch.dict(CONFIG["thread_store"], settings),
+        patch.object(thread_store, "_thread_store", None),
+    ):
+        thread_store.save_message("t1", "user", "Hi")
+        thread_store.save_messages("t1", [("writing", "Hello")])
+        assert thread_store.get_thread_store().stats()["pending"] == 2
+        assert isinstance(thread_store.get_thread_store(), SQLiteThreadStore)
+        assert thread_store.list_threads() == ["t1"]
+        assert len(thread_store.get_thread("t1", limit=1)) == 1
+        thread_store.close_thread_store()
+        assert thread_store._thread_store is None
+
+
+def test_unknown_backend() -> None:
+    """Test that an unknown backend is rejected."""
+    with (
+        patch.dict(CONFIG["thread_store"], {"backend": "postgres"}),
+        patch.object(thread_store, "_thread_store", None),
+        pytest.raises(ValueError, match="Unknown thread store backend"),
+    ):
+        thread_store.get_thread_store()
@@ -0,0 +1,98 @@
+"""Tests for the bulkhead module."""
+
+import asyncio
+
+import pytest
+
+from core.bulkhead import AgentOverloadedError, Bulkhead
+
+
+async def _hold(bulkhead: Bulkhead, release: asyncio.Event) -> None:
+    """Occupy a slot of the bulkhead until released."""
+    async with bulkhead:
+        await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_bulkhead_limits_concurrency() -> None:
+    """Test that calls beyond the limit wait in the queue for a slot."""
+    bulkhead = Bulkhead("test", max_concurrency=1, max_queue=1)
+    release = asyncio.Event()
+
+    first = asyncio.create_task(_hold(bulkhead, release))
+    second = asyncio.create_task(_hold(bulkhead, release))
+    await asyncio.sleep(0)
+
+    assert bulkhead.active == 1
+    assert bulkhead.waiting == 1
+
+    release.set()
+    await asyncio.gather(first, second)
+
+    stats = bulkhead.stats()
+    assert stats["active"] == stats["waiting"] == 0
+    assert stats["admitted"] == 2
+    assert stats["queue_ms_max"] > 0
+
+
+@pytest.mark.asyncio
+async def test_bulkhead_rejects_when_queue_full() -> None:
+    """Test that a call is rejected immediately once the queue is full."""
+    bulkhead = Bulkhead("test", max_concurrency=1, max_queue=0)
+    release = asyncio.Event()
+    holder = asyncio.create_task(_hold(bulkhead, release))
+    await asyncio.sleep(0)
+
+    with pytest.raises(AgentOverloadedError) as exc_info:
+        async with bulkhead:
+            pass
+
+    assert exc_info.value.agent_id == "test"
+    assert exc_info.value.retry_after > 0
+    assert bulkhead.rejected == 1
+
+    release.set()
+    await holder
+    async with bulkhead:
+        assert bulkhead.active == 1
+
+
+@pytest.mark.asyncio
+async def test_bulkhead_releases_on_error() -> None:
+    """Test that a failing call gives its slot back."""
+    bulkhead = Bulkhead("test", max_concurrency=1)
+
+    with pytest.raises(RuntimeError):
+        async with bulkhead:
+            raise RuntimeError("Agent failed")
+
+    assert bulkhead.active == 0
+    async with bulkhead:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_bulkhead_cancelled_while_waiting() -> None:
+    """Test that a call cancelled in the queue leaves the queue."""
+    bulkhead = Bulkhead("test", max_concurrency=1, max_queue=1)
+    release = asyncio.Event()
+    holder = asyncio.create_task(_hold(bulkhead, release))
+    waiter = asyncio.create_task(_hold(bulkhead, release))
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert bulkhead.waiting == 0
+    release.set()
+    await holder
+    assert bulkhead.admitted == 1
+
+
+def test_bulkhead_invalid_limits() -> None:
+    """Test that out of range limits are rejected."""
+    with pytest.raises(ValueError, match="max_concurrency"):
+        Bulkhead("test", max_concurrency=0)
+    with pytest.raises(ValueError, match="max_queue"):
+        Bulkhead("test", max_concurrency=1, max_queue=-1)
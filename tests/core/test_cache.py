@@ -0,0 +1,92 @@
+"""Tests for the cache module."""
+
+from unittest.mock import patch
+
+import pytest
+
+from core.cache import TTLCache
+
+
+def test_cache_get_and_set():
+    """Test storing and retrieving values with hit/miss counters."""
+    cache = TTLCache(max_size=2)
+
+    assert cache.get("a") is None
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_cache_evicts_least_recently_used():
+    """Test that the least recently used entry is evicted when full."""
+    cache = TTLCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now the least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_cache_entries_expire():
+    """Test that entries expire once their TTL has elapsed."""
+    cache = TTLCache(max_size=2, ttl_seconds=10)
+    with patch("core.cache.time.monotonic", return_value=100.0):
+        cache.set("a", 1)
+    with patch("core.cache.time.monotonic", return_value=105.0):
+        assert cache.get("a") == 1
+    with patch("core.cache.time.monotonic", return_value=111.0):
+        assert cache.get("a", "missing") == "missing"
+
+    assert cache.expirations == 1
+    assert len(cache) == 0
+
+
+def test_cache_per_entry_ttl():
+    """Test that a per-entry TTL overrides the cache default."""
+    cache = TTLCache(max_size=2, ttl_seconds=10)
+    with patch("core.cache.time.monotonic", return_value=100.0):
+        cache.set("a", 1, ttl_seconds=1)
+    with patch("core.cache.time.monotonic", return_value=102.0):
+        assert cache.get("a") is None
+
+
+def test_cache_delete_and_clear():
+    """Test deleting a key and clearing the cache."""
+    cache = TTLCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.delete("a")
+    assert cache.get("a") is None
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats()["misses"] == 0
+
+
+def test_cache_stats():
+    """Test the reported cache stats."""
+    cache = TTLCache(max_size=4)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+
+    stats = cache.stats()
+
+    assert stats["size"] == 1
+    assert stats["max_size"] == 4
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_cache_invalid_size():
+    """Test that a non-positive size is rejected."""
+    with pytest.raises(ValueError, match="max_size must be positive"):
+        TTLCache(max_size=0)
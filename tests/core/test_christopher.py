@@ -4,45 +4,92 @@ This module contains test cases for the core christopher functionality including
 agent loading, retrieval, and LangGraph conversation execution.
 """
 
+import asyncio
+import os
 from collections.abc import Generator
+from pathlib import Path
+from typing import Any
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-
-from core.christopher import get_agent, load_agents, run_with_langgraph
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import Generation, LLMResult
+
+from core import christopher
+from core.bulkhead import AgentOverloadedError
+from core.christopher import (
+    _chunk_text,
+    get_agent,
+    get_compiled_graph,
+    invalidate_compiled_graph,
+    load_agents,
+    reload_agents,
+    render_graph,
+    run_batch,
+    run_with_langgraph,
+    stream_batch,
+    stream_with_langgraph,
+    watch_agents,
+)
+from core.config import CONFIG
+from core.langgraph_runner import create_graph
 from core.registry import AGENT_REGISTRY
+from llm.resilience import _streaming_tokens, call_with_resilience
 
+FAKE_AGENT = """
+from core.registry import agent
 
-@pytest.fixture
-def mock_importlib() -> Generator[MagicMock, None, None]:
-    """Mock the importlib module for testing module loading.
 
-    Returns
-    -------
-        Generator yielding a mocked importlib.util module.
+@agent("fake", max_concurrency=2)
+class FakeAgent:
+    description = "A fake agent"
 
-    """
-    with patch("core.christopher.importlib.util") as mock:
-        mock.spec_from_file_location.return_value = MagicMock(
-            loader=MagicMock(exec_module=MagicMock())
-        )
-        yield mock
+    @staticmethod
+    def match(input_text):
+        return 1.0 if input_text == "fake" else 0.0
+
+    async def run(self, input_text, context):
+        return "fake"
+"""
+
+DYNAMIC_AGENT = """
+from core.registry import agent
+
+
+@agent("dynamic")
+class DynamicAgent:
+    description = "Built at import " + str(1)
+
+    async def run(self, input_text, context):
+        return "dynamic"
+"""
 
 
 @pytest.fixture
-def mock_os() -> Generator[MagicMock, None, None]:
-    """Mock the os module for testing file operations.
+def agents_dir(tmp_path: Path) -> Generator[Path, None, None]:
+    """Create an agents directory with one static and one dynamic agent.
 
     Returns
     -------
-        Generator yielding a mocked os module with predefined path operations.
+        Generator yielding the directory, with the registry and the imported
+        agent modules restored afterwards.
 
     """
-    with patch("core.christopher.os") as mock:
-        mock.path.join.return_value = "/fake/path/agent.py"
-        mock.listdir.return_value = ["test_agent.py"]
-        mock.path.dirname.return_value = "/fake/path"
-        yield mock
+    directory = tmp_path / "agents"
+    directory.mkdir()
+    (directory / "agent_fake.py").write_text(FAKE_AGENT)
+    (directory / "agent_dynamic.py").write_text(DYNAMIC_AGENT)
+    with (
+        patch("core.christopher.AGENTS_DIR", directory),
+        patch("core.christopher.MANIFEST_PATH", directory / ".manifest.json"),
+        patch.dict("core.christopher._agent_modules", {}, clear=True),
+        patch.dict("core.christopher._module_agents", {}, clear=True),
+        patch("core.christopher._loaded_hashes", {}),
+        patch.dict(AGENT_REGISTRY, {}, clear=True),
+        patch.dict(CONFIG, {"agents": None}),
+    ):
+        yield directory
 
 
 @pytest.fixture
@@ -54,41 +101,157 @@ def mock_graph() -> Generator[MagicMock, None, None]:
         Generator yielding a mocked graph instance with predefined behavior.
 
     """
+    invalidate_compiled_graph()
     with patch("core.christopher.create_graph") as mock:
         graph_instance = MagicMock()
-        graph_instance.get_graph.return_value = MagicMock(draw_mermaid_png=MagicMock())
+        graph_instance.get_graph.return_value = MagicMock(
+            draw_mermaid_png=MagicMock(return_value=b"png"),
+            draw_mermaid=MagicMock(return_value="graph TD;"),
+        )
         graph_instance.ainvoke = AsyncMock(return_value={"response": "Test response"})
         mock.return_value = graph_instance
         yield mock
+    invalidate_compiled_graph()
+
+
+def test_load_agents_registers_from_manifest(
+    agents_dir: Path, mock_graph: MagicMock
+) -> None:
+    """Test that static agents are registered without importing their modules."""
+    load_agents()
+
+    assert sorted(AGENT_REGISTRY) == ["dynamic", "fake"]
+    assert AGENT_REGISTRY["fake"]["description"] == "A fake agent"
+    assert AGENT_REGISTRY["fake"]["bulkhead"].max_concurrency == 2
+    assert list(christopher._agent_modules) == [str(agents_dir / "agent_dynamic.py")]
+    assert (agents_dir / ".manifest.json").exists()
+    # The graph is compiled once agents are loaded
+    mock_graph.assert_called_once()
 
 
 @pytest.mark.asyncio
-async def test_load_agents(
-    mock_importlib: MagicMock,
-    mock_os: MagicMock,
+async def test_load_agents_imports_on_first_use(
+    agents_dir: Path, mock_graph: MagicMock
 ) -> None:
-    """Test that load_agents successfully loads agent modules.
+    """Test that a manifest agent's module is imported when it is first used."""
+    load_agents()
+    entry = AGENT_REGISTRY["fake"]
+    version = AGENT_REGISTRY.version
 
-    Args:
-    ----
-        mock_importlib: Mocked importlib module
-        mock_os: Mocked os module
+    assert entry["matcher"]("fake") == 1.0
+    assert await get_agent("fake").run("hi", {}) == "fake"
 
-    """
-    # Call the function
+    assert AGENT_REGISTRY["fake"] is entry
+    assert AGENT_REGISTRY.version == version
+    assert str(agents_dir / "agent_fake.py") in christopher._agent_modules
+
+
+def test_load_agents_applies_allowlist(agents_dir: Path, mock_graph: MagicMock) -> None:
+    """Test that agents missing from CONFIG["agents"] are not kept."""
+    with patch.dict(CONFIG, {"agents": ["fake"]}):
+        load_agents()
+
+    assert sorted(AGENT_REGISTRY) == ["fake"]
+
+
+def _edit(path: Path, source: str) -> None:
+    """Rewrite a module with a later modification time."""
+    mtime_ns = path.stat().st_mtime_ns + 1_000_000_000
+    path.write_text(source)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_reload_agents_without_changes(agents_dir: Path, mock_graph: MagicMock) -> None:
+    """Test that nothing is swapped when no agent module changed."""
     load_agents()
+    version = AGENT_REGISTRY.version
+
+    assert reload_agents() is False
+    assert AGENT_REGISTRY.version == version
 
-    # Verify the interactions
-    # First call is for agents directory, second call is for filepath
-    assert mock_os.path.join.call_count == 2
-    mock_os.path.join.assert_any_call("/fake/path", "..", "agents")
-    mock_os.path.join.assert_any_call(mock_os.path.join.return_value, "test_agent.py")
 
-    mock_importlib.spec_from_file_location.assert_called_once_with(
-        "test_agent", "/fake/path/agent.py"
+@pytest.mark.asyncio
+async def test_reload_agents_picks_up_changes(
+    agents_dir: Path, mock_graph: MagicMock
+) -> None:
+    """Test that changed, added and removed modules are applied at once."""
+    load_agents()
+    old_fake = get_agent("fake")
+    dynamic_entry = AGENT_REGISTRY["dynamic"]
+    version = AGENT_REGISTRY.version
+
+    _edit(
+        agents_dir / "agent_fake.py",
+        FAKE_AGENT.replace('"A fake agent"', '"An edited agent"').replace(
+            'return "fake"', 'return "edited"'
+        ),
+    )
+    (agents_dir / "agent_extra.py").write_text(
+        FAKE_AGENT.replace('"fake"', '"extra"').replace("FakeAgent", "ExtraAgent")
     )
-    mock_importlib.module_from_spec.assert_called_once()
-    mock_importlib.spec_from_file_location.return_value.loader.exec_module.assert_called_once()
+    assert reload_agents() is True
+
+    assert AGENT_REGISTRY.version == version + 1
+    assert sorted(AGENT_REGISTRY) == ["dynamic", "extra", "fake"]
+    assert AGENT_REGISTRY["fake"]["description"] == "An edited agent"
+    assert AGENT_REGISTRY["dynamic"] is dynamic_entry
+    assert await get_agent("fake").run("hi", {}) == "edited"
+    # Requests that already hold the old agent keep using it
+    assert await old_fake.run("hi", {}) == "fake"
+    assert mock_graph.call_count == 2
+    assert christopher.RELOAD_STATS["reloads"] >= 1
+
+    (agents_dir / "agent_extra.py").unlink()
+    (agents_dir / "agent_dynamic.py").unlink()
+    assert reload_agents() is True
+    assert sorted(AGENT_REGISTRY) == ["fake"]
+
+
+@pytest.mark.asyncio
+async def test_reload_agents_keeps_registry_when_import_fails(
+    agents_dir: Path, mock_graph: MagicMock
+) -> None:
+    """Test that a changed module that fails to import changes nothing."""
+    load_agents()
+    fake = get_agent("fake")
+    registry = dict(AGENT_REGISTRY)
+    version = AGENT_REGISTRY.version
+    fake_path = agents_dir / "agent_fake.py"
+    module = christopher._agent_modules[str(fake_path)]
+
+    _edit(fake_path, "import does_not_exist_xyz\n" + FAKE_AGENT)
+    with pytest.raises(ModuleNotFoundError):
+        reload_agents()
+
+    assert AGENT_REGISTRY.version == version
+    assert dict(AGENT_REGISTRY) == registry
+    assert christopher._agent_modules[str(fake_path)] is module
+    assert get_agent("fake") is fake
+
+    _edit(fake_path, FAKE_AGENT.replace('return "fake"', 'return "fixed"'))
+    assert reload_agents() is True
+    assert await get_agent("fake").run("hi", {}) == "fixed"
+
+
+@pytest.mark.asyncio
+async def test_watch_agents_reloads_until_cancelled() -> None:
+    """Test that the watcher keeps reloading and survives failed reloads."""
+    errors = christopher.RELOAD_STATS["errors"]
+
+    def reload() -> bool:
+        if mock_reload.call_count == 2:
+            raise SyntaxError("bad")
+        return False
+
+    with patch("core.christopher.reload_agents", side_effect=reload) as mock_reload:
+        task = asyncio.create_task(watch_agents(0))
+        while mock_reload.call_count < 3:
+            await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    assert christopher.RELOAD_STATS["errors"] == errors + 1
 
 
 def test_get_agent_existing() -> None:
@@ -140,10 +303,7 @@ async def test_run_with_langgraph(mock_graph: MagicMock) -> None:
     result = await run_with_langgraph("Hello")
 
     # Verify the interactions and result
-    mock_graph.return_value.get_graph.assert_called_once()
-    mock_graph.return_value.get_graph.return_value.draw_mermaid_png.assert_called_once_with(
-        output_file_path="graph.png"
-    )
+    mock_graph.return_value.get_graph.assert_not_called()
 
     # Create a ChatState instance to match the implementation
     expected_state = {
@@ -151,7 +311,12 @@ async def test_run_with_langgraph(mock_graph: MagicMock) -> None:
         "agent_id": None,
         "response": "",
     }
-    mock_graph.return_value.ainvoke.assert_called_once_with(expected_state)
+    mock_graph.return_value.ainvoke.assert_called_once_with(
+        expected_state,
+        config={
+            "configurable": {"thread_id": None, "agent_registry": dict(AGENT_REGISTRY)}
+        },
+    )
     assert result == "Test response"
 
 
@@ -174,3 +339,322 @@ async def test_run_with_langgraph_error(mock_graph: MagicMock) -> None:
     with pytest.raises(Exception) as exc_info:
         await run_with_langgraph("Hello")
     assert str(exc_info.value) == "Test error"
+
+
+@pytest.mark.asyncio
+async def test_run_with_langgraph_reuses_compiled_graph(mock_graph: MagicMock) -> None:
+    """Test that repeated requests reuse the same compiled graph.
+
+    Args:
+    ----
+        mock_graph: Mocked create_graph function
+
+    """
+    await run_with_langgraph("Hello")
+    await run_with_langgraph("How are you?")
+
+    assert mock_graph.call_count == 1
+    assert mock_graph.return_value.ainvoke.call_count == 2
+
+
+def test_get_compiled_graph_rebuilds_on_registry_change(mock_graph: MagicMock) -> None:
+    """Test that the compiled graph is rebuilt only when the registry changes.
+
+    Args:
+    ----
+        mock_graph: Mocked create_graph function
+
+    """
+    first = get_compiled_graph()
+    assert get_compiled_graph() is first
+    assert mock_graph.call_count == 1
+
+    AGENT_REGISTRY["test_agent"] = {"instance": MagicMock(), "description": "Test"}
+    try:
+        get_compiled_graph()
+        assert mock_graph.call_count == 2
+    finally:
+        AGENT_REGISTRY.pop("test_agent")
+
+
+def test_render_graph_is_cached(mock_graph: MagicMock) -> None:
+    """Test that the graph diagram is rendered once per graph version.
+
+    Args:
+    ----
+        mock_graph: Mocked create_graph function
+
+    """
+    drawable = mock_graph.return_value.get_graph.return_value
+
+    assert render_graph("png") == b"png"
+    assert render_graph("png") == b"png"
+    assert render_graph("mermaid") == "graph TD;"
+
+    drawable.draw_mermaid_png.assert_called_once_with()
+    drawable.draw_mermaid.assert_called_once_with()
+
+
+def test_render_graph_rerenders_on_registry_change(mock_graph: MagicMock) -> None:
+    """Test that a registry change invalidates the rendered diagram.
+
+    Args:
+    ----
+        mock_graph: Mocked create_graph function
+
+    """
+    drawable = mock_graph.return_value.get_graph.return_value
+    render_graph("png")
+
+    AGENT_REGISTRY["test_agent"] = {"instance": MagicMock(), "description": "Test"}
+    try:
+        render_graph("png")
+    finally:
+        AGENT_REGISTRY.pop("test_agent")
+
+    assert drawable.draw_mermaid_png.call_count == 2
+
+
+def test_render_graph_invalid_format(mock_graph: MagicMock) -> None:
+    """Test that an unsupported format raises ValueError.
+
+    Args:
+    ----
+        mock_graph: Mocked create_graph function
+
+    """
+    with pytest.raises(ValueError, match="Unsupported graph format"):
+        render_graph("svg")
+
+
+class StreamingTestAgent:
+    """Agent backed by a fake chat model that streams its response."""
+
+    description = "Streaming test agent"
+
+    def __init__(self, response: str) -> None:
+        """Initialize the agent with the response its model will stream."""
+        self.llm = GenericFakeChatModel(messages=iter([AIMessage(content=response)]))
+
+    async def run(self, input_text: str, context: dict) -> str:
+        """Run the fake model on the input."""
+        response = await self.llm.ainvoke(input_text)
+        return response.content
+
+
+class StaticTestAgent:
+    """Agent that returns a fixed response without a chat model."""
+
+    description = "Static test agent"
+
+    async def run(self, input_text: str, context: dict) -> str:
+        """Return a fixed response."""
+        return "Static response"
+
+
+async def _collect_stream(agent_id: str, agent: Any) -> list[dict[str, Any]]:
+    """Stream a chat through a real graph routed to the given agent."""
+    registry = {agent_id: {"instance": agent, "description": "Test"}}
+
+    async def route(state: dict) -> dict:
+        return {"agent_id": agent_id}
+
+    with (
+        patch("core.langgraph_runner.AGENT_REGISTRY", registry),
+        patch("core.christopher.AGENT_REGISTRY", registry),
+        patch("core.langgraph_runner.entry_node", route),
+    ):
+        graph = create_graph()
+        with patch("core.christopher.get_compiled_graph", return_value=graph):
+            return [event async for event in stream_with_langgraph("Hello")]
+
+
+@pytest.mark.asyncio
+async def test_stream_with_langgraph_streams_tokens() -> None:
+    """Test that a streaming agent's tokens are yielded as they are emitted."""
+    events = await _collect_stream("stream", StreamingTestAgent("hello there"))
+
+    assert events[0] == {"type": "route", "agent_id": "stream"}
+    tokens = [e["content"] for e in events if e["type"] == "token"]
+    assert tokens == ["hello", " ", "there"]
+    done = events[-1]
+    assert done["type"] == "done"
+    assert done["agent_id"] == "stream"
+    assert done["response"] == "hello there"
+    assert done["first_token_ms"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_stream_with_langgraph_non_streaming_agent() -> None:
+    """Test that an agent without a chat model yields a single chunk."""
+    events = await _collect_stream("static", StaticTestAgent())
+
+    assert [e["type"] for e in events] == ["route", "token", "done"]
+    assert events[1]["content"] == "Static response"
+    assert events[2]["response"] == "Static response"
+
+
+@pytest.mark.asyncio
+async def test_stream_with_langgraph_disables_retries() -> None:
+    """Test that agents know their tokens are streamed, so calls aren't retried."""
+    seen = []
+
+    class CheckingAgent(StaticTestAgent):
+        async def run(self, input_text: str, context: dict) -> str:
+            seen.append(_streaming_tokens())
+            return "Static response"
+
+    await _collect_stream("static", CheckingAgent())
+
+    assert seen == [True]
+
+
+@pytest.mark.asyncio
+async def test_stream_with_langgraph_retries_router_call() -> None:
+    """Test that a streamed request's router call keeps its retries."""
+    calls = 0
+
+    async def route_call() -> LLMResult:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise ConnectionError("reset")
+        return LLMResult(generations=[[Generation(text='{"id": "static"}')]])
+
+    ollama = MagicMock()
+    ollama.generate = lambda **kwargs: call_with_resilience("ollama", route_call)
+    registry = {"static": {"instance": StaticTestAgent(), "description": "Test"}}
+
+    with (
+        patch("core.langgraph_runner.AGENT_REGISTRY", registry),
+        patch("core.christopher.AGENT_REGISTRY", registry),
+        patch("core.langgraph_runner.get_ollama_client", return_value=ollama),
+        patch("llm.resilience.backoff_delay", return_value=0),
+        patch.dict(CONFIG["prerouter"], {"enabled": False}),
+    ):
+        graph = create_graph()
+        with patch("core.christopher.get_compiled_graph", return_value=graph):
+            events = [e async for e in stream_with_langgraph("Route me twice")]
+
+    assert calls == 2
+    assert events[-1]["response"] == "Static response"
+
+
+@pytest.mark.asyncio
+async def test_reload_during_request_keeps_started_agents() -> None:
+    """Test that a request finishes with the agents it started with."""
+
+    class ReplacementAgent(StaticTestAgent):
+        async def run(self, input_text: str, context: dict) -> str:
+            return "Replacement response"
+
+    registry = {"static": {"instance": StaticTestAgent(), "description": "Test"}}
+
+    async def route_then_reload(state: dict) -> dict:
+        # A reload lands while the request is between routing and its agent
+        registry.clear()
+        registry["other"] = {"instance": ReplacementAgent(), "description": "New"}
+        return {"agent_id": "static"}
+
+    with (
+        patch("core.langgraph_runner.AGENT_REGISTRY", registry),
+        patch("core.christopher.AGENT_REGISTRY", registry),
+        patch("core.langgraph_runner.entry_node", route_then_reload),
+    ):
+        graph = create_graph()
+        with patch("core.christopher.get_compiled_graph", return_value=graph):
+            response = await run_with_langgraph("Hello")
+
+    assert response == "Static response"
+
+
+def test_chunk_text() -> None:
+    """Test extracting text from string and content-block chunks."""
+    assert _chunk_text("hello") == "hello"
+    assert (
+        _chunk_text([{"type": "text", "text": "hi"}, {"type": "tool_use"}, " there"])
+        == "hi there"
+    )
+    assert _chunk_text(None) == "None"
+
+
+class SlowTestAgent:
+    """Agent that echoes its input after a delay, tracking concurrent runs."""
+
+    description = "Slow test agent"
+
+    def __init__(self) -> None:
+        """Initialize the concurrency counters."""
+        self.running = 0
+        self.peak = 0
+
+    async def run(self, input_text: str, context: dict) -> str:
+        """Echo the input, failing on "fail"."""
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(0.05 if input_text == "slow" else 0.01)
+            if input_text == "fail":
+                raise RuntimeError("Agent failed")
+            if input_text == "busy":
+                raise AgentOverloadedError("slow", 1)
+            return input_text
+        finally:
+            self.running -= 1
+
+
+@pytest.fixture
+def slow_agent() -> Generator[SlowTestAgent, None, None]:
+    """Register a slow agent and route every batch input to it."""
+    agent = SlowTestAgent()
+    registry = {"slow": {"instance": agent, "description": "Slow"}}
+
+    async def route(messages: list[str], registry: dict) -> list[str]:
+        return ["slow"] * len(messages)
+
+    with (
+        patch("core.langgraph_runner.AGENT_REGISTRY", registry),
+        patch("core.christopher.AGENT_REGISTRY", registry),
+        patch("core.christopher.route_batch", side_effect=route) as mock_route,
+        patch.dict(CONFIG["batch"], {"max_concurrency": 2}),
+        patch.dict(CONFIG["circuit_breaker"], {"enabled": False}),
+    ):
+        agent.mock_route = mock_route
+        yield agent
+
+
+@pytest.mark.asyncio
+async def test_stream_batch_yields_in_completion_order(
+    slow_agent: SlowTestAgent,
+) -> None:
+    """Test that batch results are yielded as soon as each completes."""
+    results = [result async for result in stream_batch(["slow", "a", "b"])]
+
+    assert [r["index"] for r in results][-1] == 0
+    assert results[-1] == {
+        "type": "result",
+        "index": 0,
+        "agent_id": "slow",
+        "response": "slow",
+    }
+    slow_agent.mock_route.assert_called_once_with(
+        ["slow", "a", "b"], christopher.AGENT_REGISTRY
+    )
+
+
+@pytest.mark.asyncio
+async def test_run_batch_bounds_concurrency(slow_agent: SlowTestAgent) -> None:
+    """Test that batch results come back in order with bounded concurrency."""
+    messages = ["slow", "a", "fail", "busy", "c"]
+
+    results = await run_batch(messages)
+
+    assert [r["index"] for r in results] == list(range(len(messages)))
+    assert [r["response"] for r in results] == [
+        "slow",
+        "a",
+        "Error: Agent failed",
+        "Error: Agent slow is overloaded, retry later",
+        "c",
+    ]
+    assert slow_agent.peak == 2
@@ -0,0 +1,131 @@
+"""Tests for the circuit breaker module."""
+
+from collections.abc import Generator
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.circuit_breaker import (
+    BREAKERS,
+    CircuitBreaker,
+    fallback_for,
+    get_breaker,
+)
+from core.config import CONFIG
+from core.metrics import collect_stats
+
+
+@pytest.fixture
+def clock() -> Generator[MagicMock, None, None]:
+    """Control the time seen by the circuit breaker."""
+    with patch("core.circuit_breaker.time.monotonic") as mock:
+        mock.return_value = 100.0
+        yield mock
+
+
+@pytest.fixture
+def clean_breakers() -> Generator[None, None, None]:
+    """Keep the breaker registry empty around a test."""
+    BREAKERS.clear()
+    yield
+    BREAKERS.clear()
+
+
+def _fail(breaker: CircuitBreaker, times: int) -> None:
+    for _ in range(times):
+        assert breaker.allow()
+        breaker.record(False)
+
+
+def test_breaker_opens_on_failure_rate(clock: MagicMock) -> None:
+    """Test that the breaker opens once enough recent calls fail."""
+    breaker = CircuitBreaker("test", min_calls=4, failure_rate=0.5)
+    breaker.record(True)
+    _fail(breaker, 2)
+    assert breaker.state == "closed"
+
+    _fail(breaker, 1)
+
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.stats()["rejected"] == 1
+    assert breaker.stats()["times_opened"] == 1
+
+
+def test_breaker_opens_on_slow_calls(clock: MagicMock) -> None:
+    """Test that the breaker opens when calls succeed but are too slow."""
+    breaker = CircuitBreaker(
+        "test", min_calls=4, slow_call_seconds=5.0, slow_call_rate=0.5
+    )
+    for duration in (6.0, 1.0, 1.0):
+        breaker.record(True, duration)
+    assert breaker.state == "closed"
+
+    breaker.record(True, 7.0)
+
+    assert breaker.state == "open"
+    assert breaker.stats()["failure_rate"] == 0.0
+    assert breaker.stats()["slow_rate"] == 0.5
+
+
+def test_breaker_half_opens_and_closes(clock: MagicMock) -> None:
+    """Test that a successful probe after the cool-off closes the breaker."""
+    breaker = CircuitBreaker("test", min_calls=1, open_seconds=30, half_open_probes=1)
+    _fail(breaker, 1)
+    assert breaker.state == "open"
+
+    clock.return_value = 131.0
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()  # Only one probe at a time
+
+    breaker.record(True)
+
+    assert breaker.state == "closed"
+    assert breaker.stats()["calls"] == 0
+
+
+def test_breaker_reopens_on_failed_probe(clock: MagicMock) -> None:
+    """Test that a failed probe reopens the breaker for another cool-off."""
+    breaker = CircuitBreaker("test", min_calls=1, open_seconds=30)
+    _fail(breaker, 1)
+    clock.return_value = 131.0
+    assert breaker.allow()
+
+    breaker.record(False)
+
+    assert breaker.state == "open"
+    assert breaker.times_opened == 2
+    clock.return_value = 150.0
+    assert not breaker.allow()
+
+
+def test_breaker_release_returns_probe(clock: MagicMock) -> None:
+    """Test that a probe ending without an outcome can be retried."""
+    breaker = CircuitBreaker("test", min_calls=1, open_seconds=30)
+    _fail(breaker, 1)
+    clock.return_value = 131.0
+    assert breaker.allow()
+
+    breaker.release()
+
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+
+def test_get_breaker(clean_breakers: None) -> None:
+    """Test that breakers are created per agent from the config and reported."""
+    breaker = get_breaker("writing")
+
+    assert get_breaker("writing") is breaker
+    assert breaker.min_calls == CONFIG["circuit_breaker"]["min_calls"]
+    assert collect_stats()["circuit_breakers"]["writing"]["state"] == "closed"
+    with patch.dict(CONFIG["circuit_breaker"], {"enabled": False}):
+        assert get_breaker("writing") is None
+
+
+def test_fallback_for() -> None:
+    """Test that the fallback agent never falls back to itself."""
+    with patch.dict(CONFIG["circuit_breaker"], {"fallback": "default"}):
+        assert fallback_for("writing") == "default"
+        assert fallback_for("default") is None
@@ -1,25 +1,54 @@
 """Tests for the langgraph_runner module."""
 
-from unittest.mock import AsyncMock, patch
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from langchain_core.messages import AIMessage
 from langchain_core.outputs import ChatGeneration, LLMResult
 
+from agents.agent_math import MathAgent
+from core.bulkhead import AgentOverloadedError, Bulkhead
+from core.circuit_breaker import BREAKERS, get_breaker
 from core.langgraph_runner import (
+    ROUTING_CACHE,
     AgentResponseFormatter,
     ChatState,
     ChatStateDict,
     agent_node,
     create_graph,
     entry_node,
+    normalize_input,
+    route_batch,
+    router_prompt,
+    router_system_prompt,
+    routing_cache_key,
 )
+from core.response_cache import MemoryResponseBackend, ResponseCache
+from core.semantic_cache import SemanticCache
+from core.speculation import speculate
+
+
+@pytest.fixture(autouse=True)
+def clear_routing_cache():
+    """Clear the routing cache before and after each test."""
+    ROUTING_CACHE.clear()
+    yield
+    ROUTING_CACHE.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_breakers():
+    """Start each test with closed circuit breakers."""
+    BREAKERS.clear()
+    yield
+    BREAKERS.clear()
 
 
 @pytest.fixture
 def mock_ollama():
     """Mock the Ollama client for testing."""
-    with patch("core.langgraph_runner.OllamaClient") as mock:
+    with patch("core.langgraph_runner.get_ollama_client") as mock:
         mock_instance = AsyncMock()
         mock.return_value = mock_instance
         yield mock_instance
@@ -30,6 +59,7 @@ def mock_agent():
     """Mock an agent for testing."""
     agent = AsyncMock()
     agent.run.return_value = "Test response"
+    agent.cacheable = MagicMock(return_value=True)
     return agent
 
 
@@ -112,6 +142,280 @@ async def test_entry_node_handles_unknown_agent(mock_ollama, mock_agent_registry
     mock_ollama.generate.assert_called_once()
 
 
+def _routing_result(agent_id: str) -> LLMResult:
+    """Build an LLMResult that routes to the given agent id."""
+    message = AIMessage(content=f'{{"id": "{agent_id}"}}')
+    return LLMResult(generations=[[ChatGeneration(message=message)]])
+
+
+def test_router_system_prompt_lists_agents(mock_agent_registry):
+    """Test that the fixed prompt lists every agent except the default."""
+    with patch("core.langgraph_runner.AGENT_REGISTRY", mock_agent_registry):
+        prompt = router_system_prompt()
+
+    assert "id: test\ndescription: Test agent" in prompt
+    assert "Default agent" not in prompt
+
+
+def test_router_system_prompt_is_cached(mock_agent_registry):
+    """Test that the fixed prompt is built once per registry version."""
+    with patch("core.langgraph_runner.AGENT_REGISTRY", mock_agent_registry):
+        first = router_system_prompt()
+        assert router_system_prompt() is first
+
+        mock_agent_registry["new"] = {"description": "New agent"}
+        updated = router_system_prompt()
+
+    assert updated is not first
+    assert "id: new" in updated
+
+
+@pytest.mark.asyncio
+async def test_entry_node_sends_stable_prefix(mock_ollama, mock_agent_registry):
+    """Test that routing sends the fixed prefix and a short input suffix."""
+    mock_ollama.generate.return_value = _routing_result("test")
+
+    await entry_node({"input_text": "Hello", "agent_id": None, "response": ""})
+
+    mock_ollama.generate.assert_called_once_with(
+        prompt=router_prompt("Hello"),
+        format=AgentResponseFormatter,
+        system=router_system_prompt(),
+    )
+    assert router_prompt("Hello") == "Input: Hello"
+
+
+def test_normalize_input():
+    """Test that inputs are lowercased and whitespace is collapsed."""
+    assert normalize_input("  What's   the\tWEATHER?\n") == "what's the weather?"
+
+
+@pytest.mark.asyncio
+async def test_entry_node_caches_routing_decision(mock_ollama, mock_agent_registry):
+    """Test that repeated, normalized-equal inputs skip the router LLM."""
+    mock_ollama.generate.return_value = _routing_result("test")
+
+    first = await entry_node({"input_text": "Hello", "agent_id": None, "response": ""})
+    second = await entry_node(
+        {"input_text": "  hello ", "agent_id": None, "response": ""}
+    )
+
+    assert first == second == {"agent_id": "test"}
+    mock_ollama.generate.assert_called_once()
+    assert ROUTING_CACHE.hits == 1
+    assert ROUTING_CACHE.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_entry_node_does_not_cache_fallback(mock_ollama, mock_agent_registry):
+    """Test that failed routing is not cached and is retried next time."""
+    mock_ollama.generate.return_value = None
+
+    state: ChatStateDict = {"input_text": "Hello", "agent_id": None, "response": ""}
+    await entry_node(state)
+    await entry_node(state)
+
+    assert mock_ollama.generate.call_count == 2
+    assert len(ROUTING_CACHE) == 0
+
+
+@pytest.mark.asyncio
+async def test_entry_node_cache_keyed_on_registry(mock_ollama, mock_agent_registry):
+    """Test that a registry change invalidates cached routing decisions."""
+    mock_ollama.generate.return_value = _routing_result("test")
+    state: ChatStateDict = {"input_text": "Hello", "agent_id": None, "response": ""}
+
+    await entry_node(state)
+    with patch(
+        "core.langgraph_runner.registry_fingerprint", return_value=(("new", "New"),)
+    ):
+        await entry_node(state)
+
+    assert mock_ollama.generate.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_entry_node_prerouter_skips_llm(mock_ollama, mock_agent_registry):
+    """Test that a confident pre-router match skips the router LLM."""
+    mock_agent_registry["test"]["matcher"] = lambda text: 1.0
+    with patch("core.langgraph_runner.AGENT_REGISTRY", mock_agent_registry):
+        result = await entry_node(
+            {"input_text": "2+2", "agent_id": None, "response": ""}
+        )
+
+    assert result == {"agent_id": "test"}
+    mock_ollama.generate.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_entry_node_prerouter_disabled(mock_ollama, mock_agent_registry):
+    """Test that the pre-router is skipped when disabled in the config."""
+    mock_agent_registry["test"]["matcher"] = lambda text: 1.0
+    mock_ollama.generate.return_value = _routing_result("test")
+    with (
+        patch("core.langgraph_runner.AGENT_REGISTRY", mock_agent_registry),
+        patch.dict("core.langgraph_runner.CONFIG", {"prerouter": {"enabled": False}}),
+    ):
+        await entry_node({"input_text": "2+2", "agent_id": None, "response": ""})
+
+    mock_ollama.generate.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_route_batch_dedupes_inputs(mock_ollama, mock_agent_registry):
+    """Test that distinct inputs are routed with one batched call, in order."""
+    mock_ollama.generate_batch.return_value = LLMResult(
+        generations=[
+            _routing_result("test").generations[0],
+            _routing_result("unknown").generations[0],
+        ]
+    )
+    with patch("core.langgraph_runner.AGENT_REGISTRY", mock_agent_registry):
+        agent_ids = await route_batch(["Hello", "Bye", "  hello"])
+        mock_ollama.generate_batch.assert_called_once_with(
+            prompts=[router_prompt("Hello"), router_prompt("Bye")],
+            format=AgentResponseFormatter,
+            system=router_system_prompt(),
+        )
+
+    assert agent_ids == ["test", "default", "test"]
+    assert len(ROUTING_CACHE) == 1
+
+
+@pytest.mark.asyncio
+async def test_route_batch_sends_failed_calls_to_default(
+    mock_ollama, mock_agent_registry
+):
+    """Test that a failed router call only sends its own input to default."""
+    mock_ollama.generate_batch.return_value = LLMResult(
+        generations=[_routing_result("test").generations[0], []]
+    )
+    with patch("core.langgraph_runner.AGENT_REGISTRY", mock_agent_registry):
+        assert await route_batch(["Hello", "Bye"]) == ["test", "default"]
+
+    assert ROUTING_CACHE.get(routing_cache_key("Bye")) is None
+
+
+@pytest.mark.asyncio
+async def test_route_batch_routes_locally_first(mock_ollama, mock_agent_registry):
+    """Test that cached and pre-routed inputs are left out of the batched call."""
+    mock_agent_registry["test"]["matcher"] = lambda text: 1.0 if text == "2+2" else 0
+    ROUTING_CACHE.set(routing_cache_key("Hello"), "default")
+    with patch("core.langgraph_runner.AGENT_REGISTRY", mock_agent_registry):
+        assert await route_batch(["2+2", "Hello"]) == ["test", "default"]
+
+    mock_ollama.generate_batch.assert_not_called()
+
+
+@pytest.fixture
+def started_speculations():
+    """Record the speculations started by entry_node so tests can inspect them."""
+    started = []
+
+    def record(agent_id, coro):
+        speculation = speculate(agent_id, coro)
+        started.append(speculation)
+        return speculation
+
+    with patch("core.langgraph_runner.speculate", side_effect=record):
+        yield started
+
+
+@pytest.mark.asyncio
+async def test_entry_node_speculation_hit(mock_ollama, mock_agent_registry):
+    """Test that a correctly predicted agent runs once, during routing."""
+    mock_ollama.generate.return_value = _routing_result("test")
+    speculation_config = {"speculation": {"enabled": True, "agents": None}}
+    with (
+        patch("core.langgraph_runner.AGENT_REGISTRY", mock_agent_registry),
+        patch.dict("core.langgraph_runner.CONFIG", speculation_config),
+        patch("core.langgraph_runner.predict_agent", return_value="test"),
+    ):
+        state: ChatStateDict = {"input_text": "Hi", "agent_id": None, "response": ""}
+        routed = await entry_node(state)
+        result = await agent_node({**state, **routed})
+
+    assert routed["agent_id"] == "test"
+    assert routed["speculation"].agent_id == "test"
+    assert result == {"response": "Test response"}
+    mock_agent_registry["test"]["instance"].run.assert_called_once_with("Hi", {})
+
+
+@pytest.mark.asyncio
+async def test_entry_node_does_not_speculate_when_streaming(
+    mock_ollama, mock_agent_registry, started_speculations
+):
+    """Test that streamed requests are routed without speculation."""
+    mock_ollama.generate.return_value = _routing_result("test")
+    speculation_config = {"speculation": {"enabled": True, "agents": None}}
+    with (
+        patch("core.langgraph_runner.AGENT_REGISTRY", mock_agent_registry),
+        patch.dict("core.langgraph_runner.CONFIG", speculation_config),
+        patch("core.langgraph_runner.predict_agent", return_value="test"),
+    ):
+        state: ChatStateDict = {"input_text": "Hi", "agent_id": None, "response": ""}
+        routed = await entry_node(
+            state, {"configurable": {"stream_tokens": True, "thread_id": "t1"}}
+        )
+
+    assert routed == {"agent_id": "test"}
+    assert started_speculations == []
+
+
+@pytest.mark.asyncio
+async def test_entry_node_speculation_miss(
+    mock_ollama, mock_agent_registry, started_speculations
+):
+    """Test that a wrong prediction is cancelled and the routed agent runs."""
+    started = asyncio.Event()
+
+    async def slow_run(input_text: str, context: dict) -> str:
+        started.set()
+        await asyncio.sleep(10)
+        return "Speculative response"
+
+    async def slow_generate(**kwargs):
+        await started.wait()
+        return _routing_result("test")
+
+    mock_agent_registry["default"] = {"instance": AsyncMock(), "description": "D"}
+    mock_agent_registry["default"]["instance"].run.side_effect = slow_run
+    mock_ollama.generate.side_effect = slow_generate
+    speculation_config = {"speculation": {"enabled": True, "agents": None}}
+    with (
+        patch("core.langgraph_runner.AGENT_REGISTRY", mock_agent_registry),
+        patch.dict("core.langgraph_runner.CONFIG", speculation_config),
+        patch("core.langgraph_runner.predict_agent", return_value="default"),
+    ):
+        state: ChatStateDict = {"input_text": "Hi", "agent_id": None, "response": ""}
+        routed = await entry_node(state)
+        result = await agent_node({**state, **routed})
+
+    assert routed == {"agent_id": "test", "speculation": None}
+    assert result == {"response": "Test response"}
+    await asyncio.sleep(0)
+    assert started_speculations[-1].task.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_entry_node_speculation_cancelled_on_routing_error(
+    mock_ollama, mock_agent_registry, started_speculations
+):
+    """Test that speculative work is cancelled if routing itself fails."""
+    mock_ollama.generate.side_effect = ConnectionError("Ollama down")
+    speculation_config = {"speculation": {"enabled": True, "agents": None}}
+    with (
+        patch("core.langgraph_runner.AGENT_REGISTRY", mock_agent_registry),
+        patch.dict("core.langgraph_runner.CONFIG", speculation_config),
+        patch("core.langgraph_runner.predict_agent", return_value="test"),
+    ):
+        with pytest.raises(ConnectionError):
+            await entry_node({"input_text": "Hi", "agent_id": None, "response": ""})
+
+    await asyncio.sleep(0)
+    assert started_speculations[-1].task.cancelled()
+
+
 @pytest.mark.asyncio
 async def test_agent_node_processes_input(mock_agent_registry):
     """Test that agent_node processes input and returns response."""
@@ -148,6 +452,178 @@ async def test_agent_node_handles_none_agent_id(mock_agent_registry):
     mock_agent_registry["default"]["instance"].run.assert_called_once_with("Hello", {})
 
 
+@pytest.mark.asyncio
+async def test_agent_node_runs_inside_bulkhead(mock_agent_registry):
+    """Test that an agent with a bulkhead runs while holding a slot."""
+    bulkhead = Bulkhead("test", max_concurrency=1)
+    mock_agent_registry["test"]["bulkhead"] = bulkhead
+    active = []
+    mock_agent_registry["test"]["instance"].run.side_effect = (
+        lambda *args: active.append(bulkhead.active) or "Test response"
+    )
+
+    result = await agent_node({"input_text": "Hi", "agent_id": "test", "response": ""})
+
+    assert result == {"response": "Test response"}
+    assert active == [1]
+    assert bulkhead.admitted == 1
+
+
+@pytest.mark.asyncio
+async def test_agent_node_reraises_overload(mock_agent_registry):
+    """Test that an overloaded agent is reported to the caller, not as a reply."""
+    mock_agent_registry["test"]["instance"].run.side_effect = AgentOverloadedError(
+        "test", 1
+    )
+
+    with pytest.raises(AgentOverloadedError):
+        await agent_node({"input_text": "Hi", "agent_id": "test", "response": ""})
+
+
+@pytest.mark.asyncio
+async def test_agent_node_records_outcomes(mock_agent_registry):
+    """Test that agent calls feed the agent's circuit breaker."""
+    mock_agent_registry["test"]["instance"].run.side_effect = [
+        "Test response",
+        RuntimeError("Provider down"),
+    ]
+    state: ChatStateDict = {"input_text": "Hi", "agent_id": "test", "response": ""}
+
+    await agent_node(state)
+    await agent_node(state)
+
+    assert list(BREAKERS["test"].outcomes) == [(False, False), (True, False)]
+
+
+@pytest.mark.asyncio
+async def test_agent_node_reroutes_when_circuit_open(mock_agent_registry):
+    """Test that an open circuit reroutes to the fallback agent."""
+    fallback = AsyncMock()
+    fallback.run.return_value = "Fallback response"
+    mock_agent_registry["default"]["instance"] = fallback
+    get_breaker("test")._transition("open")
+
+    result = await agent_node({"input_text": "Hi", "agent_id": "test", "response": ""})
+
+    assert result == {"response": "Fallback response"}
+    mock_agent_registry["test"]["instance"].run.assert_not_called()
+    fallback.run.assert_called_once_with("Hi", {})
+
+
+@pytest.mark.asyncio
+async def test_agent_node_fails_fast_without_fallback(mock_agent_registry):
+    """Test that an open circuit on the fallback agent fails fast."""
+    get_breaker("default")._transition("open")
+
+    result = await agent_node(
+        {"input_text": "Hi", "agent_id": "default", "response": ""}
+    )
+
+    assert result["response"].startswith("Error: Agent default is unavailable")
+    mock_agent_registry["default"]["instance"].run.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_bulkhead_rejection_releases_probe(mock_agent_registry):
+    """Test that a probe rejected by the bulkhead does not count as an outcome."""
+    bulkhead = Bulkhead("test", max_concurrency=1)
+    mock_agent_registry["test"]["bulkhead"] = bulkhead
+    breaker = get_breaker("test")
+    breaker._transition("half_open")
+
+    async with bulkhead:
+        with pytest.raises(AgentOverloadedError):
+            await agent_node({"input_text": "Hi", "agent_id": "test", "response": ""})
+
+    assert breaker.state == "half_open"
+    assert breaker.probes_in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_agent_node_uses_response_cache(mock_agent_registry):
+    """Test that agents opting into caching are called once per input."""
+    mock_agent_registry["test"]["cache_ttl"] = 60
+    cache = ResponseCache(MemoryResponseBackend())
+
+    with patch("core.langgraph_runner.get_response_cache", return_value=cache):
+        first = await agent_node(
+            {"input_text": "Hello", "agent_id": "test", "response": ""}
+        )
+        second = await agent_node(
+            {"input_text": "  hello ", "agent_id": "test", "response": ""}
+        )
+
+    assert first == second == {"response": "Test response"}
+    mock_agent_registry["test"]["instance"].run.assert_called_once()
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_agent_node_does_not_cache_errors(mock_agent_registry):
+    """Test that failed agent calls are not cached."""
+    mock_agent_registry["test"]["cache_ttl"] = 60
+    mock_agent_registry["test"]["instance"].run.side_effect = [
+        RuntimeError("Provider down"),
+        "Test response",
+    ]
+    cache = ResponseCache(MemoryResponseBackend())
+    state: ChatStateDict = {"input_text": "Hi", "agent_id": "test", "response": ""}
+
+    with patch("core.langgraph_runner.get_response_cache", return_value=cache):
+        assert (await agent_node(state))["response"].startswith("Error:")
+        assert await agent_node(state) == {"response": "Test response"}
+
+
+@pytest.mark.asyncio
+async def test_agent_node_does_not_cache_uncacheable_responses(mock_agent_registry):
+    """Test that responses an agent marks uncacheable skip both caches."""
+    mock_agent_registry["test"] = {
+        "instance": MathAgent(),
+        "description": "Math agent",
+        "cache_ttl": 60,
+    }
+    cache = ResponseCache(MemoryResponseBackend())
+    semantic_cache = SemanticCache(threshold=0.85, dim=256)
+    state: ChatStateDict = {"input_text": "2 + * 3", "agent_id": "test", "response": ""}
+
+    with (
+        patch("core.langgraph_runner.get_response_cache", return_value=cache),
+        patch("core.langgraph_runner.get_semantic_cache", return_value=semantic_cache),
+    ):
+        error = await agent_node(state)
+        assert error["response"].startswith("Error evaluating expression:")
+        assert await agent_node(state) == error
+        await agent_node({**state, "input_text": "2 + 2"})
+        assert await agent_node({**state, "input_text": "2 + 2"}) == {
+            "response": "Result: 4.0"
+        }
+
+    assert cache.stats()["hits"] == 1
+    assert len(semantic_cache) == 1
+
+
+@pytest.mark.asyncio
+async def test_agent_node_uses_semantic_cache(mock_agent_registry):
+    """Test that a paraphrase of an earlier input is answered from the cache."""
+    cache = SemanticCache(threshold=0.85, dim=256)
+
+    with patch("core.langgraph_runner.get_semantic_cache", return_value=cache):
+        first = await agent_node(
+            {
+                "input_text": "How do I reverse a list in Python?",
+                "agent_id": "test",
+                "response": "",
+            }
+        )
+        second = await agent_node(
+            {"input_text": "python reverse list", "agent_id": "test", "response": ""}
+        )
+
+    assert first == second == {"response": "Test response"}
+    mock_agent_registry["test"]["instance"].run.assert_called_once()
+    assert cache.stats()["hits"] == 1
+
+
 def test_create_graph_creates_valid_graph(mock_agent_registry):
     """Test that create_graph creates a valid graph."""
     # Execute
@@ -0,0 +1,172 @@
+"""Tests for the agent manifest module."""
+
+import json
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from core.manifest import (
+    AGENTS_DIR,
+    MANIFEST_VERSION,
+    NotStaticError,
+    load_manifest,
+    scan_module,
+)
+
+AGENT_SOURCE = """
+from core.registry import agent
+
+
+@agent("sample", max_concurrency=4, cache_ttl=24 * 60 * 60)
+class SampleAgent:
+    description: str = (
+        "A sample agent "
+        "for tests"
+    )
+
+    @staticmethod
+    def match(input_text):
+        return 0.0
+"""
+
+
+def _write(path: Path, source: str, mtime_ns: int | None = None) -> None:
+    path.write_text(source)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_scan_module_describes_agent() -> None:
+    """Test that ids, descriptions and decorator options are read statically."""
+    assert scan_module(AGENT_SOURCE) == [
+        {
+            "id": "sample",
+            "class": "SampleAgent",
+            "description": "A sample agent for tests",
+            "capabilities": {
+                "max_concurrency": 4,
+                "max_queue": None,
+                "cache_ttl": 86400,
+                "matcher": True,
+            },
+        }
+    ]
+
+
+def test_scan_module_reads_positional_options() -> None:
+    """Test that options passed positionally are recorded."""
+    source = '@registry.agent("p", 2, 8)\nclass P:\n    description = "P"\n'
+
+    capabilities = scan_module(source)[0]["capabilities"]
+
+    assert capabilities["max_concurrency"] == 2
+    assert capabilities["max_queue"] == 8
+    assert capabilities["matcher"] is False
+
+
+def test_scan_module_ignores_other_classes() -> None:
+    """Test that undecorated classes and other decorators are skipped."""
+    source = "@dataclass\nclass A:\n    pass\n\nclass B:\n    description = 'B'\n"
+
+    assert scan_module(source) == []
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        '@agent(NAME)\nclass A:\n    description = "A"\n',
+        "@agent()\nclass A:\n    description = 'A'\n",
+        '@agent("a")\nclass A:\n    description = build()\n',
+        '@agent("a")\nclass A:\n    pass\n',
+    ],
+)
+def test_scan_module_rejects_dynamic_agents(source: str) -> None:
+    """Test that agents that need importing to be described are reported."""
+    with pytest.raises(NotStaticError):
+        scan_module(source)
+
+
+def test_load_manifest_for_repository_agents() -> None:
+    """Test that every bundled agent can be described without importing it."""
+    manifest = load_manifest(AGENTS_DIR, cache_path=None)
+
+    ids = {spec["id"] for entry in manifest.values() for spec in entry["agents"]}
+    assert all(entry["static"] for entry in manifest.values())
+    assert {"default", "math", "programming", "writing", "weather"} <= ids
+
+
+def test_load_manifest_reuses_cache(tmp_path: Path) -> None:
+    """Test that unchanged modules are not parsed again."""
+    _write(tmp_path / "agent_sample.py", AGENT_SOURCE)
+    (tmp_path / "__init__.py").write_text("")
+    cache = tmp_path / ".manifest.json"
+    first = load_manifest(tmp_path, cache)
+
+    with patch("core.manifest.scan_module") as mock_scan:
+        second = load_manifest(tmp_path, cache)
+
+    mock_scan.assert_not_called()
+    assert second == first
+    assert list(first) == ["agent_sample.py"]
+    assert json.loads(cache.read_text())["version"] == MANIFEST_VERSION
+
+
+def test_load_manifest_checks_hash_when_touched(tmp_path: Path) -> None:
+    """Test that a touched but unchanged module is not parsed again."""
+    path = tmp_path / "agent_sample.py"
+    _write(path, AGENT_SOURCE, mtime_ns=1_000_000_000)
+    cache = tmp_path / ".manifest.json"
+    load_manifest(tmp_path, cache)
+    os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+
+    with patch("core.manifest.scan_module") as mock_scan:
+        manifest = load_manifest(tmp_path, cache)
+
+    mock_scan.assert_not_called()
+    assert manifest["agent_sample.py"]["mtime_ns"] == 2_000_000_000
+
+
+def test_load_manifest_rescans_changed_module(tmp_path: Path) -> None:
+    """Test that an edited module is described again."""
+    path = tmp_path / "agent_sample.py"
+    _write(path, AGENT_SOURCE, mtime_ns=1_000_000_000)
+    cache = tmp_path / ".manifest.json"
+    load_manifest(tmp_path, cache)
+    _write(path, AGENT_SOURCE.replace("for tests", "edited"), mtime_ns=2_000_000_000)
+
+    manifest = load_manifest(tmp_path, cache)
+
+    assert manifest["agent_sample.py"]["agents"][0]["description"] == (
+        "A sample agent edited"
+    )
+
+
+def test_load_manifest_marks_dynamic_module(tmp_path: Path) -> None:
+    """Test that modules that cannot be parsed statically are flagged."""
+    _write(tmp_path / "agent_broken.py", "def broken(:\n")
+
+    manifest = load_manifest(tmp_path, cache_path=None)
+
+    assert manifest["agent_broken.py"]["static"] is False
+
+
+def test_load_manifest_ignores_bad_cache(tmp_path: Path) -> None:
+    """Test that an unreadable or outdated cache is rebuilt."""
+    _write(tmp_path / "agent_sample.py", AGENT_SOURCE)
+    cache = tmp_path / ".manifest.json"
+    cache.write_text("not json")
+    assert load_manifest(tmp_path, cache)["agent_sample.py"]["static"]
+
+    cache.write_text(json.dumps({"version": 0, "modules": {}}))
+    assert load_manifest(tmp_path, cache)["agent_sample.py"]["static"]
+
+
+def test_load_manifest_survives_unwritable_cache(tmp_path: Path) -> None:
+    """Test that a cache that cannot be written is only logged."""
+    _write(tmp_path / "agent_sample.py", AGENT_SOURCE)
+
+    manifest = load_manifest(tmp_path, tmp_path / "missing" / ".manifest.json")
+
+    assert "agent_sample.py" in manifest
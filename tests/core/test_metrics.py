@@ -0,0 +1,32 @@
+"""Tests for the metrics module."""
+
+import pytest
+
+from core.metrics import STATS_PROVIDERS, collect_stats, register_stats
+
+
+@pytest.fixture(autouse=True)
+def restore_providers():
+    """Restore the registered stats providers after each test."""
+    saved = dict(STATS_PROVIDERS)
+    yield
+    STATS_PROVIDERS.clear()
+    STATS_PROVIDERS.update(saved)
+
+
+def test_collect_registered_stats():
+    """Test that registered providers are collected by name."""
+    register_stats("test", lambda: {"count": 3})
+
+    assert collect_stats()["test"] == {"count": 3}
+
+
+def test_collect_stats_provider_error():
+    """Test that a failing provider reports its error instead of raising."""
+
+    def broken() -> dict:
+        raise RuntimeError("boom")
+
+    register_stats("broken", broken)
+
+    assert collect_stats()["broken"] == {"error": "boom"}
@@ -0,0 +1,88 @@
+"""Tests for the pre-router module."""
+
+import pytest
+
+from core.prerouter import PREROUTER_STATS, LexicalIndex, preroute, tokenize
+
+
+@pytest.fixture
+def registry():
+    """Build a registry resembling the real agents."""
+    return {
+        "default": {"description": "A default agent that handles general queries"},
+        "weather": {
+            "description": (
+                "A weather agent that provides current weather information "
+                "and forecasts"
+            ),
+        },
+        "math": {
+            "description": "A math agent that can perform calculations",
+            "matcher": lambda text: 1.0 if text == "2+3*4" else 0.0,
+        },
+        "programming": {
+            "description": (
+                "A programming assistant that helps with coding tasks, "
+                "debugging, and software development"
+            ),
+        },
+    }
+
+
+def test_tokenize_drops_stop_words_and_plurals():
+    """Test that tokenization lowercases, drops stop words and plurals."""
+    assert tokenize("What's the Weather forecasts?") == ["weather", "forecast"]
+
+
+def test_lexical_index_scores_matching_document_highest():
+    """Test that the closest description gets the highest score."""
+    index = LexicalIndex({"a": "weather forecasts", "b": "coding and debugging"})
+
+    scores = index.scores("weather")
+
+    assert scores["a"] > scores["b"]
+    assert scores["b"] == 0.0
+
+
+def test_preroute_uses_agent_matcher(registry):
+    """Test that an agent matcher routes with full confidence."""
+    match = preroute("2+3*4", registry, threshold=0.5)
+
+    assert match is not None
+    assert match.agent_id == "math"
+    assert match.confidence == 1.0
+    assert match.source == "matcher"
+
+
+def test_preroute_uses_lexical_similarity(registry):
+    """Test that a confident description match routes without the LLM."""
+    match = preroute("what's the weather", registry, threshold=0.5)
+
+    assert match is not None
+    assert match.agent_id == "weather"
+    assert match.source == "lexical"
+
+
+def test_preroute_falls_back_below_threshold(registry):
+    """Test that unclear inputs are left for the router LLM."""
+    before = PREROUTER_STATS["fallback"]
+
+    assert preroute("write me a poem about the weather", registry, 0.5) is None
+    assert preroute("hello there", registry, 0.5) is None
+    assert PREROUTER_STATS["fallback"] == before + 2
+
+
+def test_preroute_never_selects_default(registry):
+    """Test that the default agent is not a pre-routing candidate."""
+    assert preroute("general queries", registry, threshold=0.1) is None
+
+
+def test_preroute_ignores_failing_matcher(registry):
+    """Test that a matcher raising an exception is skipped."""
+
+    def broken(text: str) -> float:
+        raise RuntimeError("boom")
+
+    registry["math"]["matcher"] = broken
+
+    assert preroute("2+3*4", registry, threshold=0.5) is None
@@ -1,8 +1,19 @@
 """Tests for the agent registry module."""
 
+from unittest.mock import patch
+
 import pytest
 
-from core.registry import AGENT_REGISTRY, agent
+from core.config import CONFIG
+from core.metrics import collect_stats
+from core.registry import (
+    AGENT_REGISTRY,
+    AgentRegistry,
+    agent,
+    get_agent_instance,
+    is_agent_enabled,
+    registry_fingerprint,
+)
 
 
 class TestAgent:
@@ -26,7 +37,7 @@ def test_agent_registration():
 
     # Verify the agent was registered correctly
     assert "test_agent" in AGENT_REGISTRY
-    assert isinstance(AGENT_REGISTRY["test_agent"]["instance"], TestAgent)
+    assert isinstance(get_agent_instance("test_agent"), TestAgent)
     assert (
         AGENT_REGISTRY["test_agent"]["description"] == "A test agent for unit testing"
     )
@@ -35,6 +46,43 @@ def test_agent_registration():
     assert decorated_agent is TestAgent
 
 
+def test_agent_registration_records_matcher():
+    """Test that an agent's optional match method is recorded."""
+
+    class MatchingAgent:
+        description = "An agent with a matcher"
+
+        @staticmethod
+        def match(input_text: str) -> float:
+            return 1.0
+
+    agent("matching")(MatchingAgent)
+    agent("plain")(TestAgent)
+
+    assert AGENT_REGISTRY["matching"]["matcher"]("anything") == 1.0
+    assert AGENT_REGISTRY["plain"]["matcher"] is None
+
+
+def test_agent_registration_bulkhead():
+    """Test that a concurrency limit gives the agent a bulkhead."""
+    agent("limited", max_concurrency=2, max_queue=4)(TestAgent)
+    agent("unlimited")(TestAgent)
+
+    bulkhead = AGENT_REGISTRY["limited"]["bulkhead"]
+    assert (bulkhead.max_concurrency, bulkhead.max_queue) == (2, 4)
+    assert AGENT_REGISTRY["unlimited"]["bulkhead"] is None
+    assert list(collect_stats()["bulkheads"]) == ["limited"]
+
+
+def test_agent_registration_cache_ttl():
+    """Test that agents opt into response caching with a TTL."""
+    agent("cached", cache_ttl=60)(TestAgent)
+    agent("uncached")(TestAgent)
+
+    assert AGENT_REGISTRY["cached"]["cache_ttl"] == 60
+    assert AGENT_REGISTRY["uncached"]["cache_ttl"] is None
+
+
 def test_agent_registration_missing_description():
     """Test that registering an agent without a description raises ValueError."""
 
@@ -49,6 +97,35 @@ def test_agent_registration_missing_description():
     assert "invalid_agent" not in AGENT_REGISTRY
 
 
+def test_agent_instantiated_on_first_use():
+    """Test that registering an agent does not build it until it is used."""
+    built = []
+
+    class LazyAgent:
+        description = "A lazily built agent"
+
+        def __init__(self) -> None:
+            built.append(self)
+
+    agent("lazy")(LazyAgent)
+    assert built == []
+    assert AGENT_REGISTRY["lazy"]["instance"] is None
+
+    instance = get_agent_instance("lazy")
+    assert get_agent_instance("lazy") is instance
+    assert built == [instance]
+
+
+def test_is_agent_enabled():
+    """Test that CONFIG["agents"] acts as an allowlist besides the default."""
+    with patch.dict(CONFIG, {"agents": ["math"]}):
+        assert is_agent_enabled("math")
+        assert is_agent_enabled("default")
+        assert not is_agent_enabled("writing")
+    with patch.dict(CONFIG, {"agents": None}):
+        assert is_agent_enabled("writing")
+
+
 def test_multiple_agent_registration():
     """Test registering multiple agents in the registry."""
 
@@ -63,7 +140,60 @@ def test_multiple_agent_registration():
     assert len(AGENT_REGISTRY) == 2
     assert "agent1" in AGENT_REGISTRY
     assert "agent2" in AGENT_REGISTRY
-    assert isinstance(AGENT_REGISTRY["agent1"]["instance"], TestAgent)
-    assert isinstance(AGENT_REGISTRY["agent2"]["instance"], AnotherAgent)
+    assert isinstance(get_agent_instance("agent1"), TestAgent)
+    assert isinstance(get_agent_instance("agent2"), AnotherAgent)
     assert AGENT_REGISTRY["agent1"]["description"] == "A test agent for unit testing"
     assert AGENT_REGISTRY["agent2"]["description"] == "Another test agent"
+
+
+def test_registry_fingerprint_tracks_agents():
+    """Test that the registry fingerprint changes when agents are registered."""
+    empty = registry_fingerprint()
+    assert empty == ()
+
+    agent("agent1")(TestAgent)
+
+    assert registry_fingerprint() == (("agent1", "A test agent for unit testing"),)
+    assert registry_fingerprint() != empty
+
+
+def test_agent_registry_version_tracks_mutations():
+    """Test that every registry mutation bumps the version."""
+    registry = AgentRegistry()
+    versions = [registry.version]
+
+    registry["a"] = {"description": "A"}
+    versions.append(registry.version)
+    registry.update({"b": {"description": "B"}})
+    versions.append(registry.version)
+    registry.setdefault("c", {"description": "C"})
+    versions.append(registry.version)
+    registry.pop("a")
+    versions.append(registry.version)
+    del registry["b"]
+    versions.append(registry.version)
+    registry.popitem()
+    versions.append(registry.version)
+    registry.clear()
+    versions.append(registry.version)
+
+    assert versions == sorted(set(versions))
+
+
+def test_registry_fingerprint_is_memoized():
+    """Test that the fingerprint is reused until the registry changes."""
+    agent("agent1")(TestAgent)
+    first = registry_fingerprint()
+
+    assert registry_fingerprint() is first
+
+    agent("agent2")(TestAgent)
+    assert registry_fingerprint() is not first
+    assert len(registry_fingerprint()) == 2
+
+
+def test_registry_fingerprint_of_plain_dict():
+    """Test fingerprinting a registry that is a plain dictionary."""
+    registry = {"b": {"description": "B"}, "a": {"description": "A"}}
+
+    assert registry_fingerprint(registry) == (("a", "A"), ("b", "B"))
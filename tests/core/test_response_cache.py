@@ -0,0 +1,186 @@
+"""Tests for the response cache module."""
+
+from collections.abc import Generator
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import core.response_cache
+from core.config import CONFIG
+from core.metrics import collect_stats
+from core.response_cache import (
+    MemoryResponseBackend,
+    RedisResponseBackend,
+    ResponseCache,
+    agent_model,
+    close_response_cache,
+    get_response_cache,
+)
+
+
+class FakeRedis:
+    """Local stand-in for the asyncio Redis client."""
+
+    def __init__(self) -> None:
+        """Initialize an empty store."""
+        self.store: dict[str, str] = {}
+        self.expiries: dict[str, int | None] = {}
+        self.closed = False
+
+    async def get(self, key: str) -> str | None:
+        """Return the stored value for a key."""
+        return self.store.get(key)
+
+    async def set(self, key: str, value: str, ex: int | None = None) -> None:
+        """Store a value with an optional expiry in seconds."""
+        self.store[key] = value
+        self.expiries[key] = ex
+
+    async def aclose(self) -> None:
+        """Mark the client as closed."""
+        self.closed = True
+
+
+class BrokenRedis(FakeRedis):
+    """Redis client whose server is unreachable."""
+
+    async def get(self, key: str) -> str | None:
+        """Fail to reach the server."""
+        raise ConnectionError("Redis unavailable")
+
+    async def set(self, key: str, value: str, ex: int | None = None) -> None:
+        """Fail to reach the server."""
+        raise ConnectionError("Redis unavailable")
+
+
+@pytest.fixture
+def shared_cache() -> Generator[None, None, None]:
+    """Discard the process-wide response cache around a test."""
+    core.response_cache._response_cache = None
+    yield
+    core.response_cache._response_cache = None
+
+
+def test_key_covers_agent_model_input_and_context() -> None:
+    """Test that every part of a call changes the cache key."""
+    key = ResponseCache.key("math", None, "2+2", {})
+
+    assert ResponseCache.key("math", None, "2+2", {}) == key
+    assert ResponseCache.key("weather", None, "2+2", {}) != key
+    assert ResponseCache.key("math", "gpt-4", "2+2", {}) != key
+    assert ResponseCache.key("math", None, "2+3", {}) != key
+    assert ResponseCache.key("math", None, "2+2", {"x": 1}) != key
+
+
+@pytest.mark.asyncio
+async def test_memory_backend() -> None:
+    """Test caching responses in process."""
+    cache = ResponseCache(MemoryResponseBackend(max_size=2))
+
+    assert await cache.get("key") is None
+    await cache.set("key", "4", ttl_seconds=60)
+
+    assert await cache.get("key") == "4"
+    assert cache.stats() == {
+        "backend": "memory",
+        "hits": 1,
+        "misses": 1,
+        "errors": 0,
+        "hit_rate": 0.5,
+    }
+
+
+@pytest.mark.asyncio
+async def test_redis_backend() -> None:
+    """Test caching responses in Redis with a prefix and expiry."""
+    client = FakeRedis()
+    cache = ResponseCache(RedisResponseBackend(client=client, prefix="test:"))
+
+    await cache.set("key", "4", ttl_seconds=0.5)
+    await cache.set("forever", "5", ttl_seconds=None)
+
+    assert await cache.get("key") == "4"
+    assert client.store == {"test:key": "4", "test:forever": "5"}
+    assert client.expiries == {"test:key": 1, "test:forever": None}
+
+    await cache.backend.aclose()
+    assert client.closed
+
+
+@pytest.mark.asyncio
+async def test_backend_errors_are_misses() -> None:
+    """Test that an unavailable backend never fails the request."""
+    cache = ResponseCache(RedisResponseBackend(client=BrokenRedis()))
+
+    await cache.set("key", "4", ttl_seconds=60)
+
+    assert await cache.get("key") is None
+    assert cache.stats()["errors"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_redis_backend_from_url() -> None:
+    """Test that the Redis client is created from the URL."""
+    with patch("core.response_cache.aioredis") as mock_redis:
+        backend = RedisResponseBackend(url="redis://cache:6379/1")
+
+    assert backend.client is mock_redis.from_url.return_value
+    assert mock_redis.from_url.call_args.args == ("redis://cache:6379/1",)
+
+
+def test_redis_backend_requires_redis() -> None:
+    """Test that a missing redis package is reported clearly."""
+    with patch("core.response_cache.aioredis", None):
+        with pytest.raises(RuntimeError, match="redis package"):
+            RedisResponseBackend()
+
+
+@pytest.mark.asyncio
+async def test_get_response_cache(shared_cache: None) -> None:
+    """Test that the configured backend is created once and closed."""
+    with patch.dict(CONFIG["response_cache"], {"backend": "memory"}):
+        cache = get_response_cache()
+        assert get_response_cache() is cache
+
+    assert isinstance(cache.backend, MemoryResponseBackend)
+    assert collect_stats()["response_cache"]["backend"] == "memory"
+
+    await close_response_cache()
+    assert core.response_cache._response_cache is None
+
+
+def test_get_response_cache_redis(shared_cache: None) -> None:
+    """Test that the Redis backend uses REDIS_URL."""
+    with (
+        patch.dict(CONFIG["response_cache"], {"backend": "redis"}),
+        patch.dict("os.environ", {"REDIS_URL": "redis://cache:6379/0"}),
+        patch("core.response_cache.aioredis"),
+    ):
+        cache = get_response_cache()
+
+    assert isinstance(cache.backend, RedisResponseBackend)
+
+
+def test_get_response_cache_disabled_or_unknown(shared_cache: None) -> None:
+    """Test a disabled cache and an unknown backend."""
+    with patch.dict(CONFIG["response_cache"], {"enabled": False}):
+        assert get_response_cache() is None
+    with patch.dict(CONFIG["response_cache"], {"backend": "memcached"}):
+        with pytest.raises(ValueError, match="Unknown response cache backend"):
+            get_response_cache()
+
+
+@pytest.mark.parametrize(
+    ("llm", "expected"),
+    [
+        (MagicMock(model_name="gpt-4"), "gpt-4"),
+        (MagicMock(spec=["model"], model="claude"), "claude"),
+        (None, None),
+    ],
+)
+def test_agent_model(llm: Any, expected: str | None) -> None:
+    """Test reading the model name from an agent's llm."""
+    agent = MagicMock(spec=["llm"], llm=llm)
+
+    assert agent_model(agent) == expected
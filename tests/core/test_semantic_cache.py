@@ -0,0 +1,148 @@
+"""Tests for the semantic cache module."""
+
+from collections.abc import Generator
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from core.config import CONFIG
+from core.metrics import collect_stats
+from core.semantic_cache import (
+    SEMANTIC_CACHES,
+    SemanticCache,
+    embed,
+    get_semantic_cache,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_semantic_caches() -> Generator[None, None, None]:
+    """Start each test without semantic caches."""
+    SEMANTIC_CACHES.clear()
+    yield
+    SEMANTIC_CACHES.clear()
+
+
+def test_embed_is_normalized_and_deterministic() -> None:
+    """Test that embeddings are unit vectors that do not change between calls."""
+    vector = embed("reverse a list in python")
+
+    assert vector.dtype == np.float32
+    assert np.isclose(np.linalg.norm(vector), 1.0)
+    assert np.array_equal(vector, embed("reverse a list in python"))
+    assert not embed("the a of").any()
+
+
+def test_embed_paraphrases_are_similar() -> None:
+    """Test that paraphrases are closer than unrelated inputs."""
+    query = embed("how do I reverse a list in python")
+
+    assert query @ embed("python reverse list") > 0.9
+    assert query @ embed("how do I sort a dict in python") < 0.5
+
+
+def test_lookup_returns_near_duplicate() -> None:
+    """Test that a paraphrase is answered from the cache."""
+    cache = SemanticCache(threshold=0.85, dim=256)
+    cache.add("how do I reverse a list in python", "Use list.reverse()")
+
+    assert cache.lookup("python reverse list") == "Use list.reverse()"
+    assert cache.lookup("how do I sort a dict in python") is None
+
+
+def test_lookup_misses_reordered_words() -> None:
+    """Test that the same words in a different order are a different input."""
+    cache = SemanticCache(threshold=0.85, dim=256)
+    cache.add("convert celsius to fahrenheit", "F = C * 9 / 5 + 32")
+
+    assert cache.lookup("convert fahrenheit to celsius") is None
+    assert cache.lookup("convert celsius to fahrenheit") == "F = C * 9 / 5 + 32"
+
+
+def test_lookup_respects_threshold() -> None:
+    """Test that a similar input below the threshold is a miss."""
+    cache = SemanticCache(threshold=0.99, dim=256)
+    cache.add("write a poem about autumn", "Leaves fall")
+
+    assert cache.lookup("write a poem about spring") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_add_replaces_identical_input() -> None:
+    """Test that re-adding the same input updates its entry in place."""
+    cache = SemanticCache(threshold=0.9, dim=256)
+    cache.add("python reverse list", "old")
+    cache.add("Python: reverse list!", "new")
+
+    assert len(cache) == 1
+    assert cache.lookup("python reverse list") == "new"
+
+
+def test_add_evicts_oldest_when_full() -> None:
+    """Test that the oldest entry is overwritten once the cache is full."""
+    cache = SemanticCache(threshold=0.9, dim=256, max_size=2)
+    cache.add("reverse a list", "first")
+    cache.add("sort a dictionary", "second")
+    cache.add("write an autumn poem", "third")
+
+    assert len(cache) == 2
+    assert cache.lookup("reverse a list") is None
+    assert cache.lookup("write an autumn poem") == "third"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lookup_ignores_expired_entries() -> None:
+    """Test that entries older than the TTL are not returned."""
+    cache = SemanticCache(threshold=0.9, dim=256, ttl_seconds=60)
+    with patch("core.semantic_cache.time.monotonic", return_value=1000.0):
+        cache.add("reverse a list", "Use reversed()")
+    with patch("core.semantic_cache.time.monotonic", return_value=1030.0):
+        assert cache.lookup("reverse a list") == "Use reversed()"
+    with patch("core.semantic_cache.time.monotonic", return_value=1061.0):
+        assert cache.lookup("reverse a list") is None
+
+
+def test_invalid_max_size() -> None:
+    """Test that an empty cache cannot be created."""
+    with pytest.raises(ValueError, match="max_size"):
+        SemanticCache(threshold=0.9, max_size=0)
+
+
+def test_stats_report_hit_quality() -> None:
+    """Test that hits report their similarity to the cached input."""
+    cache = SemanticCache(threshold=0.5, dim=256)
+    cache.add("how do I reverse a list in python", "Use list.reverse()")
+    cache.lookup("how do I reverse a list in python")
+    cache.lookup("reversing a python list")
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["hit_rate"] == 1.0
+    assert stats["hit_similarity_min"] < 0.99
+    assert stats["hit_similarity_min"] < stats["hit_similarity_avg"] < 1.0
+    assert stats["borderline_hits"] == 0
+
+
+def test_get_semantic_cache_is_opt_in() -> None:
+    """Test that only configured agents get a cache, and only when enabled."""
+    settings = {
+        "enabled": True,
+        "agents": {"programming": {"threshold": 0.8, "max_size": 10}},
+    }
+    with patch.dict(CONFIG["semantic_cache"], settings):
+        cache = get_semantic_cache("programming")
+        assert cache is get_semantic_cache("programming")
+        assert get_semantic_cache("math") is None
+
+    assert cache.threshold == 0.8
+    assert cache.max_size == 10
+    with patch.dict(CONFIG["semantic_cache"], {"enabled": False}):
+        assert get_semantic_cache("programming") is None
+
+
+def test_semantic_cache_stats_registered() -> None:
+    """Test that per-agent stats are exposed through the metrics registry."""
+    SEMANTIC_CACHES["programming"] = SemanticCache(threshold=0.9, dim=64)
+
+    assert collect_stats()["semantic_cache"]["programming"]["size"] == 0
@@ -0,0 +1,126 @@
+"""Tests for the speculation module."""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+import core.speculation
+from core.speculation import (
+    SPECULATION_STATS,
+    can_speculate,
+    predict_agent,
+    record_route,
+    resolve,
+    speculate,
+    speculation_stats,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_speculation():
+    """Reset the speculation counters and last route around each test."""
+    saved = dict(SPECULATION_STATS)
+    for key in SPECULATION_STATS:
+        SPECULATION_STATS[key] = 0
+    core.speculation._last_routes.clear()
+    yield
+    SPECULATION_STATS.update(saved)
+    core.speculation._last_routes.clear()
+
+
+@pytest.fixture
+def registry():
+    """Build a small registry for predictions."""
+    return {
+        "default": {"description": "Default agent"},
+        "weather": {"description": "A weather agent that provides forecasts"},
+        "math": {"description": "A math agent that performs calculations"},
+    }
+
+
+async def _slow(result: str, started: asyncio.Event | None = None) -> str:
+    """Simulate a slow agent run."""
+    if started is not None:
+        started.set()
+    await asyncio.sleep(10)
+    return result
+
+
+def test_predict_agent_uses_best_guess(registry):
+    """Test that a lexical guess is used as the prediction."""
+    assert predict_agent("weather tomorrow?", registry) == "weather"
+
+
+def test_predict_agent_falls_back_to_last_route(registry):
+    """Test that the thread's previous agent is used without a guess."""
+    assert predict_agent("hello there", registry, "t1") is None
+
+    record_route("math", "t1")
+
+    assert predict_agent("hello there", registry, "t1") == "math"
+
+
+def test_predict_agent_keeps_routes_per_thread(registry):
+    """Test that one thread's route does not steer another's prediction."""
+    record_route("math", "t1")
+    record_route("weather", None)
+
+    assert predict_agent("hello there", registry, "t2") is None
+    assert predict_agent("hello there", registry) is None
+
+
+def test_can_speculate_respects_config():
+    """Test that speculation is opt-in and can be limited to some agents."""
+    with patch.dict(core.speculation.CONFIG, {"speculation": {"enabled": False}}):
+        assert not can_speculate("weather")
+    with patch.dict(
+        core.speculation.CONFIG,
+        {"speculation": {"enabled": True, "agents": ["weather"]}},
+    ):
+        assert can_speculate("weather")
+        assert not can_speculate("math")
+
+
+@pytest.mark.asyncio
+async def test_resolve_hit_keeps_speculation():
+    """Test that a correct prediction keeps the in-flight run."""
+    speculation = speculate("weather", asyncio.sleep(0, result="sunny"))
+
+    assert resolve(speculation, "weather") is speculation
+    assert await speculation.result() == "sunny"
+    assert speculation_stats()["hits"] == 1
+    assert speculation_stats()["hit_rate"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_resolve_miss_cancels_speculation():
+    """Test that a wrong prediction cancels the in-flight run."""
+    started = asyncio.Event()
+    speculation = speculate("weather", _slow("sunny", started))
+    await started.wait()
+
+    assert resolve(speculation, "math") is None
+    with pytest.raises(asyncio.CancelledError):
+        await speculation.task
+
+    stats = speculation_stats()
+    assert stats["started"] == 1
+    assert stats["misses"] == 1
+    assert stats["cancelled"] == 1
+    assert stats["hit_rate"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_speculation_error_is_not_reported_unhandled():
+    """Test that a failing speculative run does not leak its exception."""
+
+    async def broken() -> str:
+        raise RuntimeError("boom")
+
+    speculation = speculate("weather", broken())
+    await asyncio.sleep(0)
+
+    assert speculation.task.done()
+    with pytest.raises(RuntimeError, match="boom"):
+        await speculation.result()
@@ -4,6 +4,7 @@ This module contains test cases for the OllamaClient class, including initializa
 environment variable handling, and LLM generation functionality.
 """
 
+import asyncio
 import os
 from collections.abc import Generator
 from unittest.mock import AsyncMock, patch
@@ -12,7 +13,9 @@ import pytest
 from langchain.schema import Generation, LLMResult
 from pydantic import BaseModel
 
-from llm.ollama_client import OllamaClient
+import llm.ollama_client
+from llm.ollama_client import OllamaClient, close_ollama_client, get_ollama_client
+from llm.resilience import policy_for
 
 
 class SampleFormat(BaseModel):
@@ -85,13 +88,31 @@ async def test_generate(client: OllamaClient, mock_llm: AsyncMock) -> None:
 
 @pytest.mark.asyncio
 async def test_generate_llm_error(client: OllamaClient, mock_llm: AsyncMock) -> None:
-    """Test generate method when LLM raises an error."""
+    """Test generate method when LLM raises an error on every attempt."""
     test_prompt = "Test prompt"
     test_format = SampleFormat(name="test", age=25)
     mock_llm.agenerate.side_effect = Exception("LLM service error")
 
-    with pytest.raises(Exception, match="LLM service error"):
-        await client.generate(test_prompt, test_format)
+    with patch("llm.resilience.backoff_delay", return_value=0):
+        with pytest.raises(Exception, match="LLM service error"):
+            await client.generate(test_prompt, test_format)
+
+    assert mock_llm.agenerate.call_count == policy_for("ollama").attempts
+
+
+@pytest.mark.asyncio
+async def test_generate_retries_transient_error(
+    client: OllamaClient, mock_llm: AsyncMock
+) -> None:
+    """Test that a transient failure is retried."""
+    expected_result = LLMResult(generations=[[Generation(text="{}")]])
+    mock_llm.agenerate.side_effect = [ConnectionError("reset"), expected_result]
+
+    with patch("llm.resilience.backoff_delay", return_value=0):
+        result = await client.generate("Test prompt", SampleFormat)
+
+    assert result == expected_result
+    assert mock_llm.agenerate.call_count == 2
 
 
 @pytest.mark.asyncio
@@ -111,8 +132,143 @@ async def test_generate_empty_prompt(client: OllamaClient, mock_llm: AsyncMock)
     )
 
 
+@pytest.mark.asyncio
+async def test_generate_batch(client: OllamaClient, mock_llm: AsyncMock) -> None:
+    """Test that batched prompts are sent concurrently and returned in order."""
+    client.pool_size = 2
+    in_flight = 0
+    peak = 0
+
+    async def generate(prompts: list[str], **kwargs) -> LLMResult:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return LLMResult(generations=[[Generation(text=prompts[0])]])
+
+    mock_llm.agenerate.side_effect = generate
+
+    result = await client.generate_batch(
+        ["a", "b", "c", "d"], SampleFormat, system="Route requests"
+    )
+
+    assert [g[0].text for g in result.generations] == ["a", "b", "c", "d"]
+    assert peak == 2
+    assert mock_llm.agenerate.call_args.kwargs["system"] == "Route requests"
+
+
+@pytest.mark.asyncio
+async def test_generate_batch_isolates_failures(
+    client: OllamaClient, mock_llm: AsyncMock
+) -> None:
+    """Test that a failed prompt leaves the other prompts' results intact."""
+
+    async def generate(prompts: list[str], **kwargs) -> LLMResult:
+        if prompts[0] == "b":
+            raise ConnectionError("Ollama down")
+        return LLMResult(generations=[[Generation(text=prompts[0])]])
+
+    mock_llm.agenerate.side_effect = generate
+
+    with patch("llm.resilience.backoff_delay", return_value=0):
+        result = await client.generate_batch(["a", "b", "c"], SampleFormat)
+
+    assert [[g.text for g in gens] for gens in result.generations] == [
+        ["a"],
+        [],
+        ["c"],
+    ]
+
+
 def test_init_invalid_url() -> None:
     """Test initialization with an invalid URL."""
     with patch.dict(os.environ, {"OLLAMA_BASE_URL": "invalid-url"}):
         with pytest.raises(ValueError, match="Invalid URL"):
             OllamaClient()
+
+
+@pytest.mark.asyncio
+async def test_generate_with_system(client: OllamaClient, mock_llm: AsyncMock) -> None:
+    """Test that a system prompt is passed through to the model."""
+    test_format = SampleFormat(name="test", age=25)
+
+    await client.generate("Input: hi", test_format, system="Route requests")
+
+    mock_llm.agenerate.assert_called_once_with(
+        ["Input: hi"],
+        format=test_format.model_json_schema(),
+        system="Route requests",
+    )
+
+
+def test_init_keep_alive(mock_env_vars: None) -> None:
+    """Test that the model keep-alive defaults and can be overridden."""
+    with patch("llm.ollama_client.OllamaLLM") as mock:
+        OllamaClient()
+        assert mock.call_args.kwargs["keep_alive"] == "30m"
+
+        with patch.dict(os.environ, {"OLLAMA_KEEP_ALIVE": "-1"}):
+            client = OllamaClient()
+        assert client.keep_alive == "-1"
+        assert mock.call_args.kwargs["keep_alive"] == "-1"
+
+
+def test_init_pool_and_timeouts() -> None:
+    """Test that pool size and timeouts are read from the environment."""
+    env = {
+        "OLLAMA_POOL_SIZE": "4",
+        "OLLAMA_TIMEOUT": "30",
+        "OLLAMA_CONNECT_TIMEOUT": "2",
+        "OLLAMA_KEEPALIVE_EXPIRY": "15",
+    }
+    with patch.dict(os.environ, env), patch("llm.ollama_client.OllamaLLM") as mock:
+        client = OllamaClient()
+
+    assert client.pool_size == 4
+    assert client.timeout == 30.0
+    assert client.connect_timeout == 2.0
+    client_kwargs = mock.call_args.kwargs["client_kwargs"]
+    assert client_kwargs["limits"].max_connections == 4
+    assert client_kwargs["limits"].max_keepalive_connections == 4
+    assert client_kwargs["limits"].keepalive_expiry == 15.0
+    assert client_kwargs["timeout"].read == 30.0
+    assert client_kwargs["timeout"].connect == 2.0
+
+
+@pytest.mark.parametrize("value", ["abc", "0", "-1"])
+def test_init_invalid_pool_size(value: str) -> None:
+    """Test that an invalid numeric setting is rejected."""
+    with patch.dict(os.environ, {"OLLAMA_POOL_SIZE": value}):
+        with pytest.raises(ValueError, match="Invalid OLLAMA_POOL_SIZE"):
+            OllamaClient()
+
+
+@pytest.mark.asyncio
+async def test_aclose(client: OllamaClient, mock_llm: AsyncMock) -> None:
+    """Test that closing the client closes both HTTP clients."""
+    mock_llm._async_client.close = AsyncMock()
+
+    await client.aclose()
+
+    mock_llm._async_client.close.assert_awaited_once()
+    mock_llm._client.close.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_shared_client_lifecycle(
+    mock_env_vars: None, mock_llm: AsyncMock
+) -> None:
+    """Test that the shared client is created once and discarded on close."""
+    mock_llm._async_client.close = AsyncMock()
+    llm.ollama_client._shared_client = None
+
+    first = get_ollama_client()
+    assert get_ollama_client() is first
+
+    await close_ollama_client()
+    mock_llm._async_client.close.assert_awaited_once()
+    assert llm.ollama_client._shared_client is None
+
+    # Closing again without a client is a no-op
+    await close_ollama_client()
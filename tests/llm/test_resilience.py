@@ -0,0 +1,277 @@
+"""Tests for the LLM call resilience module."""
+
+import asyncio
+import time
+from collections.abc import Generator
+from unittest.mock import patch
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from core.config import CONFIG
+from core.metrics import collect_stats
+from llm.resilience import (
+    CALL_STATS,
+    LATENCIES,
+    CallPolicy,
+    LatencyTracker,
+    backoff_delay,
+    call_with_resilience,
+    is_retryable,
+    policy_for,
+)
+
+
+class FakeBackend:
+    """Fake provider whose calls take scripted delays and may fail."""
+
+    def __init__(self, *script: float | Exception) -> None:
+        """Initialize the backend with one delay or error per call.
+
+        Calls beyond the script answer immediately.
+        """
+        self.script = list(script)
+        self.calls = 0
+        self.cancelled = 0
+
+    async def call(self) -> str:
+        """Answer after the scripted delay, or raise the scripted error."""
+        step = self.script[self.calls] if self.calls < len(self.script) else 0.0
+        self.calls += 1
+        number = self.calls
+        if isinstance(step, Exception):
+            raise step
+        try:
+            await asyncio.sleep(step)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return f"response {number}"
+
+
+class StatusError(Exception):
+    """Provider error carrying an HTTP status code."""
+
+    def __init__(self, status_code: int) -> None:
+        """Initialize the error with its status code."""
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture(autouse=True)
+def clean_stats() -> Generator[None, None, None]:
+    """Reset the latencies and counters of the test call."""
+    LATENCIES.pop("test", None)
+    CALL_STATS.pop("test", None)
+    with patch("llm.resilience.backoff_delay", return_value=0):
+        yield
+    LATENCIES.pop("test", None)
+    CALL_STATS.pop("test", None)
+
+
+@pytest.mark.asyncio
+async def test_call_succeeds_first_time() -> None:
+    """Test that a successful call is returned and its latency recorded."""
+    backend = FakeBackend(0.0)
+
+    result = await call_with_resilience("test", backend.call, CallPolicy())
+
+    assert result == "response 1"
+    assert len(LATENCIES["test"].samples) == 1
+    assert CALL_STATS["test"]["calls"] == 1
+    assert CALL_STATS["test"]["retries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_call_retries_after_timeout() -> None:
+    """Test that a slow attempt times out and is retried."""
+    backend = FakeBackend(1.0, 0.0)
+
+    result = await call_with_resilience("test", backend.call, CallPolicy(timeout=0.02))
+
+    assert result == "response 2"
+    assert backend.cancelled == 1
+    assert CALL_STATS["test"]["timeouts"] == 1
+    assert CALL_STATS["test"]["retries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_streamed_call_is_not_retried_or_hedged() -> None:
+    """Test that a call whose tokens are streamed makes a single attempt."""
+    backend = FakeBackend(ConnectionError("down"))
+
+    async def call(_: None) -> str:
+        return await call_with_resilience(
+            "test", backend.call, CallPolicy(attempts=3, hedge=True, hedge_after=0)
+        )
+
+    with pytest.raises(ConnectionError):
+        await RunnableLambda(call).ainvoke(
+            None, config={"configurable": {"stream_tokens": True}}
+        )
+
+    assert backend.calls == 1
+    assert CALL_STATS["test"]["hedges"] == 0
+
+
+@pytest.mark.asyncio
+async def test_call_raises_after_last_attempt() -> None:
+    """Test that the last error is raised once the attempts are used up."""
+    backend = FakeBackend(ConnectionError("down"), ConnectionError("still down"))
+
+    with pytest.raises(ConnectionError, match="still down"):
+        await call_with_resilience("test", backend.call, CallPolicy(attempts=2))
+
+    assert backend.calls == 2
+    assert CALL_STATS["test"]["failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_call_does_not_retry_client_errors() -> None:
+    """Test that errors that would fail again are raised immediately."""
+    backend = FakeBackend(StatusError(400))
+
+    with pytest.raises(StatusError):
+        await call_with_resilience("test", backend.call, CallPolicy())
+
+    assert backend.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_call_respects_deadline() -> None:
+    """Test that the whole call is bounded by its deadline."""
+    backend = FakeBackend(1.0, 1.0, 1.0)
+    start = time.monotonic()
+
+    with pytest.raises(asyncio.TimeoutError):
+        await call_with_resilience(
+            "test", backend.call, CallPolicy(timeout=None, deadline=0.05)
+        )
+
+    assert time.monotonic() - start < 0.5
+    assert backend.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_call_hedges_slow_request() -> None:
+    """Test that a second request is sent when the first is slow."""
+    backend = FakeBackend(1.0, 0.0)
+    start = time.monotonic()
+
+    result = await call_with_resilience(
+        "test", backend.call, CallPolicy(hedge=True, hedge_after=0.02)
+    )
+
+    assert result == "response 2"
+    assert time.monotonic() - start < 0.5
+    await asyncio.sleep(0)
+    assert backend.cancelled == 1
+    assert CALL_STATS["test"]["hedges"] == 1
+    assert CALL_STATS["test"]["hedge_wins"] == 1
+
+
+@pytest.mark.asyncio
+async def test_call_hedge_not_needed() -> None:
+    """Test that no second request is sent when the first is fast."""
+    backend = FakeBackend(0.0)
+
+    result = await call_with_resilience(
+        "test", backend.call, CallPolicy(hedge=True, hedge_after=0.5)
+    )
+
+    assert result == "response 1"
+    assert backend.calls == 1
+    assert CALL_STATS["test"]["hedges"] == 0
+
+
+@pytest.mark.asyncio
+async def test_call_hedge_survives_one_failure() -> None:
+    """Test that a hedged call succeeds if either request succeeds."""
+    backend = FakeBackend(0.05, ConnectionError("down"))
+
+    result = await call_with_resilience(
+        "test", backend.call, CallPolicy(hedge=True, hedge_after=0.01, attempts=1)
+    )
+
+    assert result == "response 1"
+    assert CALL_STATS["test"]["hedge_wins"] == 0
+
+
+@pytest.mark.asyncio
+async def test_call_hedges_after_observed_p95() -> None:
+    """Test that hedging waits for the observed p95 latency when unset."""
+    LATENCIES["test"] = LatencyTracker(min_samples=1)
+    LATENCIES["test"].record(0.02)
+    backend = FakeBackend(1.0, 0.0)
+
+    result = await call_with_resilience("test", backend.call, CallPolicy(hedge=True))
+
+    assert result == "response 2"
+
+
+@pytest.mark.asyncio
+async def test_call_does_not_hedge_without_latencies() -> None:
+    """Test that hedging is skipped until enough latencies are observed."""
+    backend = FakeBackend(0.05)
+
+    result = await call_with_resilience("test", backend.call, CallPolicy(hedge=True))
+
+    assert result == "response 1"
+    assert backend.calls == 1
+
+
+@pytest.mark.parametrize(
+    ("error", "retryable"),
+    [
+        (ConnectionError("down"), True),
+        (TimeoutError(), True),
+        (StatusError(429), True),
+        (StatusError(503), True),
+        (StatusError(401), False),
+        (ValueError("bad schema"), False),
+    ],
+)
+def test_is_retryable(error: Exception, retryable: bool) -> None:
+    """Test which errors are worth retrying."""
+    assert is_retryable(error) is retryable
+
+
+def test_backoff_delay_grows_and_is_capped() -> None:
+    """Test that the backoff cap doubles per attempt up to the maximum."""
+    policy = CallPolicy(backoff_base=0.5, backoff_max=2.0)
+    with patch("llm.resilience.random.uniform", side_effect=lambda a, b: b):
+        caps = [backoff_delay(policy, attempt) for attempt in (1, 2, 3, 4)]
+
+    assert caps == [0.5, 1.0, 2.0, 2.0]
+
+
+def test_latency_tracker_percentile() -> None:
+    """Test percentiles over the rolling window."""
+    tracker = LatencyTracker(window=100, min_samples=10)
+    for latency in range(1, 10):
+        tracker.record(latency)
+    assert tracker.percentile(95) is None
+
+    tracker.record(10)
+    assert tracker.percentile(95) == 10
+    assert tracker.percentile(50) == 5
+
+
+def test_policy_for_merges_overrides() -> None:
+    """Test that per-name settings override the defaults."""
+    with patch.dict(CONFIG["llm_calls"], {"test": {"attempts": 5, "hedge": True}}):
+        policy = policy_for("test")
+
+    assert policy.attempts == 5
+    assert policy.hedge is True
+    assert policy.timeout == CONFIG["llm_calls"]["default"]["timeout"]
+
+
+@pytest.mark.asyncio
+async def test_llm_call_stats() -> None:
+    """Test that call counters are exposed through the metrics registry."""
+    await call_with_resilience("test", FakeBackend(0.0).call, CallPolicy())
+
+    stats = collect_stats()["llm_calls"]["test"]
+    assert stats["calls"] == 1
+    assert stats["p95_ms"] is None
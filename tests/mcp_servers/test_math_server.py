@@ -2,7 +2,7 @@
 
 import pytest
 
-from mcp_servers.math_server import MathServer
+from mcp_servers.math_server import MathServer, get_math_server
 
 
 @pytest.fixture
@@ -52,6 +52,10 @@ async def test_math_server_error_handling(math_server):
         ),
         ("abc", "Error evaluating expression: Unsupported node type: Name"),
         ("1j", "Error evaluating expression: Complex numbers are not supported"),
+        (
+            "1" + "0" * 400,
+            "Error evaluating expression: Number is too large to represent",
+        ),
     ]
 
     for expression, expected in test_cases:
@@ -71,3 +75,185 @@ async def test_math_server_unsupported_operations(math_server):
     for expression, expected in test_cases:
         result = await math_server.send_request(expression)
         assert result == expected, f"Expected '{expected}' but got '{result}'"
+
+
+def test_math_server_is_expression(math_server):
+    """Test recognizing supported arithmetic without evaluating it."""
+    assert math_server.is_expression("2 + 3 * 4")
+    assert math_server.is_expression("-(1.5 ** 2) / 3")
+    assert not math_server.is_expression("what is 2 + 2")
+    assert not math_server.is_expression("2 % 3")
+    assert not math_server.is_expression("abs(2)")
+    assert not math_server.is_expression("'2'")
+    assert not math_server.is_expression("1j")
+    assert not math_server.is_expression("2 + ")
+    assert not MathServer(offload_length=None).is_expression("1" + "0" * 400)
+
+
+@pytest.mark.asyncio
+async def test_math_server_deeply_nested_expression():
+    """Test that long chains of operations don't hit the recursion limit."""
+    math_server = MathServer(max_nodes=10_000, offload_length=None)
+    expression = " + ".join(["1"] * 1500)
+    assert await math_server.send_request(expression) == "Result: 1500.0"
+    assert await math_server.send_request("-" * 2000 + "2") == "Result: 2.0"
+
+
+@pytest.mark.asyncio
+async def test_math_server_caches_compiled_expressions(math_server):
+    """Test that an expression is compiled once and reused."""
+    assert await math_server.send_request("2 * 21") == "Result: 42.0"
+    assert await math_server.send_request(" 2 * 21\n") == "Result: 42.0"
+    assert math_server.is_expression("2 * 21")
+
+    info = math_server.cache_info()
+    assert info["misses"] == 1
+    assert info["hits"] == 2
+    assert info["size"] == 1
+
+
+def test_math_server_cache_is_bounded():
+    """Test that the least recently used expressions are evicted."""
+    server = MathServer(cache_size=2)
+    for expression in ("1 + 1", "2 + 2", "3 + 3"):
+        server.compile(expression)
+
+    assert server.cache_info()["size"] == 2
+
+
+def test_get_math_server_is_shared():
+    """Test that callers share one math server."""
+    assert get_math_server() is get_math_server()
+
+
+@pytest.mark.asyncio
+async def test_math_server_bounds_results(math_server):
+    """Test that huge powers fail fast and results must be finite."""
+    assert await math_server.send_request("9 ** 9 ** 9") == (
+        "Error evaluating expression: Result is too large to represent"
+    )
+    assert await math_server.send_request("1 / 0") == (
+        "Error evaluating expression: Division by zero"
+    )
+    assert await math_server.send_request("1e308 * 10") == (
+        "Error evaluating expression: Result is too large to represent"
+    )
+
+
+@pytest.mark.asyncio
+async def test_math_server_size_limits():
+    """Test that overly long or complex expressions are rejected."""
+    math_server = MathServer(max_length=20, max_nodes=5, offload_length=None)
+
+    assert await math_server.send_request("1 + " * 10 + "1") == (
+        "Error evaluating expression: Expression is too long, the limit is 20 "
+        "characters"
+    )
+    assert await math_server.send_request("1+1+1+1") == (
+        "Error evaluating expression: Expression is too complex, the limit is 5 "
+        "numbers and operators"
+    )
+    assert await math_server.send_request("1+1+1") == "Result: 3.0"
+    assert not math_server.is_expression("1+1+1+1")
+
+
+@pytest.mark.asyncio
+async def test_math_server_offloads_long_expressions():
+    """Test that long expressions are compiled in the process pool."""
+    math_server = MathServer(offload_length=10, timeout_seconds=30)
+    try:
+        assert await math_server.send_request("1 + 2 + 3 + 4 + 5") == "Result: 15.0"
+        assert await math_server.send_request("1 + 2 + 3 + abc") == (
+            "Error evaluating expression: Unsupported node type: Name"
+        )
+        math_server.timeout_seconds = 0.001
+        assert await math_server.send_request("1 + 2 + 3 + 4 + 5") == "Result: 15.0"
+        assert math_server.cache_info()["hits"] == 1
+    finally:
+        math_server.close()
+
+
+@pytest.mark.asyncio
+async def test_math_server_offload_timeout():
+    """Test that an offloaded evaluation is abandoned after the timeout."""
+    math_server = MathServer(offload_length=10, timeout_seconds=0.001)
+    try:
+        assert await math_server.send_request("1 + 2 + 3 + 4 + 5") == (
+            "Error evaluating expression: Parsing took longer than 0.001 seconds"
+        )
+        assert math_server._pool is None
+    finally:
+        math_server.close()
+
+
+def test_math_server_evaluate_batch(math_server):
+    """Test evaluating an expression over many variable bindings."""
+    values, errors = math_server.evaluate_batch(
+        "a * x ** 2 + b", {"x": list(range(10)), "a": 2, "b": 1}
+    )
+
+    assert values == [2 * x**2 + 1.0 for x in range(10)]
+    assert errors == {}
+
+
+@pytest.mark.parametrize("size", [2, 20])
+def test_math_server_evaluate_batch_errors(math_server, size):
+    """Test that failed bindings get the scalar path's error messages."""
+    values, errors = math_server.evaluate_batch("1 / x", {"x": [0] + [2] * (size - 1)})
+
+    assert values == [None] + [0.5] * (size - 1)
+    assert errors == {0: "Division by zero"}
+
+
+def test_math_server_evaluate_batch_limits_scalar_fallbacks():
+    """Test that only a few failed bindings are re-evaluated one at a time."""
+    math_server = MathServer(max_scalar_fallbacks=1)
+    values, errors = math_server.evaluate_batch("x ** 1000", {"x": [10] * 10})
+
+    assert values == [None] * 10
+    assert errors[0] == "Result is too large to represent"
+    assert errors[9] == "Result is not a finite number"
+
+
+@pytest.mark.parametrize(
+    ("expression", "bindings", "message"),
+    [
+        ("x + y", {"x": [1, 2]}, "Unknown variable: y"),
+        ("x + y", {"x": [1, 2], "y": [1]}, "same number of values"),
+        ("x", {"x": [[1, 2]]}, "x must be a number or a list of numbers"),
+        ("x", {"x": [1] * 11}, "Batch is too large, the limit is 10 bindings"),
+        ("x", {"1x": [1]}, "Invalid variable name: 1x"),
+    ],
+)
+def test_math_server_evaluate_batch_rejects(expression, bindings, message):
+    """Test that invalid batches are rejected as a whole."""
+    math_server = MathServer(max_batch_size=10)
+    with pytest.raises(ValueError, match=message):
+        math_server.evaluate_batch(expression, bindings)
+
+
+@pytest.mark.asyncio
+async def test_math_server_send_batch(math_server):
+    """Test the batch response lists results and errors by index."""
+    response = await math_server.send_batch("10 / x", {"x": [5, 0, 2]})
+
+    assert response == {
+        "results": [2.0, None, 5.0],
+        "errors": [{"index": 1, "error": "Division by zero"}],
+    }
+
+
+@pytest.mark.asyncio
+async def test_math_server_matching_long_expressions_does_not_parse():
+    """Test that long inputs are screened lexically and parsed in the pool."""
+    math_server = MathServer(offload_length=10, timeout_seconds=30)
+    try:
+        assert math_server.is_expression("1 + 2 + 3 + 4 + 5")
+        assert not math_server.is_expression("what is 1 + 2 + 3")
+        assert not math_server.is_expression("1 + 2 + 3 % 4 + 5")
+        assert math_server.cache_info()["size"] == 0
+
+        assert await math_server.send_request("1 + 2 + 3 + 4 + 5") == "Result: 15.0"
+        assert math_server._pool is not None
+    finally:
+        math_server.close()